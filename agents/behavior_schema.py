@@ -0,0 +1,105 @@
+import numpy as np
+import pandas as pd
+
+# 행동 로그 코드 테이블 (int8 코드 = 튜플 인덱스, 해당 없음 = -1)
+BEHAVIOR_TYPES = ('Bank', 'Card', 'Securities', 'Life')
+SECTORS = ('IT', '금융', '바이오', '제조', '에너지', '소비재')
+CARD_CATEGORIES = ('식비', '교통', '쇼핑', '온라인배달', '의료')
+ACTIONS = (
+    '예금입금', '예금출금', '대출상환',     # Bank
+    '매수', '매도',                        # Securities
+    '보험료납입', '사고접수', '해지상담',   # Life
+)
+RISK_PROFILES = ('안정형', '중립형', '공격형')
+
+# 자주 쓰는 코드 값
+TYPE_BANK, TYPE_CARD, TYPE_SECURITIES, TYPE_LIFE = range(4)
+BANK_ACTION_START = ACTIONS.index('예금입금')
+SECURITIES_ACTION_START = ACTIONS.index('매수')
+LIFE_ACTION_START = ACTIONS.index('보험료납입')
+ACTION_WITHDRAW = ACTIONS.index('예금출금')
+ACTION_BUY = ACTIONS.index('매수')
+ACTION_ACCIDENT = ACTIONS.index('사고접수')
+CATEGORY_SHOPPING = CARD_CATEGORIES.index('쇼핑')
+CATEGORY_DELIVERY = CARD_CATEGORIES.index('온라인배달')
+
+# 매수/매도 방향 (side)
+SIDE_NONE, SIDE_BUY, SIDE_SELL = 0, 1, -1
+
+COLUMNS = ['timestamp', 'user_id', 'type', 'action', 'category', 'sector', 'side', 'amount', 'risk_profile']
+CODED_COLUMNS = {
+    'type': BEHAVIOR_TYPES,
+    'action': ACTIONS,
+    'category': CARD_CATEGORIES,
+    'sector': SECTORS,
+    'risk_profile': RISK_PROFILES,
+}
+_DTYPES = {name: pd.CategoricalDtype(labels) for name, labels in CODED_COLUMNS.items()}
+
+
+def decode(name, codes):
+    """int8 코드 배열을 코드 테이블 범주형으로 변환"""
+    return pd.Categorical.from_codes(codes, dtype=_DTYPES[name])
+
+
+def to_frame(batch, timestamp, user_id_dtype):
+    """컬럼형 행동 배치를 범주형 스키마 DataFrame으로 변환
+
+    user_id_dtype은 페르소나 ID 전체를 범주로 가진 CategoricalDtype입니다.
+    """
+    user_idx = batch['user_idx']
+    return pd.DataFrame({
+        'timestamp': pd.Series(pd.Timestamp(timestamp), index=range(len(user_idx))),
+        'user_id': pd.Categorical.from_codes(user_idx, dtype=user_id_dtype),
+        'type': decode('type', batch['type']),
+        'action': decode('action', batch['action']),
+        'category': decode('category', batch['category']),
+        'sector': decode('sector', batch['sector']),
+        'side': batch['side'].astype(np.int8, copy=False),
+        'amount': batch['amount'].astype(np.float32),
+        'risk_profile': decode('risk_profile', batch['risk_profile']),
+    }, columns=COLUMNS)
+
+
+def column_codes(frame, name):
+    """행동 로그 컬럼의 int8 코드 배열 (범주형이 아니면 코드 테이블 기준으로 변환)"""
+    column = frame[name]
+    if not isinstance(column.dtype, pd.CategoricalDtype) or tuple(column.cat.categories) != CODED_COLUMNS[name]:
+        column = column.astype(_DTYPES[name])
+    return column.cat.codes.to_numpy(dtype=np.int8)
+
+
+def frame_to_batch(frame):
+    """행동 로그 DataFrame을 코드 배열 배치로 변환 (벡터화 집계용)"""
+    action = column_codes(frame, 'action')
+    if 'side' in frame:
+        side = frame['side'].to_numpy(dtype=np.int8)
+    else:
+        side = np.where(action == ACTION_BUY, SIDE_BUY,
+                        np.where(action == ACTION_BUY + 1, SIDE_SELL, SIDE_NONE)).astype(np.int8)
+    batch = {
+        'type': column_codes(frame, 'type'),
+        'action': action,
+        'category': column_codes(frame, 'category'),
+        'sector': column_codes(frame, 'sector'),
+        'side': side,
+    }
+    if 'risk_profile' in frame:
+        batch['risk_profile'] = column_codes(frame, 'risk_profile')
+    return batch
+
+
+def render_detail(frame):
+    """화면 표시용 상세 문자열 생성 (표시 대상 행에 대해서만 호출)"""
+    details = []
+    for t, a, c, s, amount in zip(frame['type'], frame['action'], frame['category'],
+                                  frame['sector'], frame['amount']):
+        if t == 'Bank':
+            details.append(f"{a}: {int(amount)}원")
+        elif t == 'Card':
+            details.append(f"{c} 결제: {int(max(0, amount))}원")
+        elif t == 'Securities':
+            details.append(f"{s} 섹터 {a}: {int(amount)}원")
+        else:
+            details.append(f"보험 {a}")
+    return pd.Series(details, index=frame.index, name='detail', dtype=object)
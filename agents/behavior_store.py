@@ -0,0 +1,206 @@
+import glob
+import os
+import uuid
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+from pyarrow import fs
+
+from agents import behavior_schema as schema
+
+DEFAULT_STORE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 's-maes', 'behaviors')
+
+# 저장 스키마: 코드 컬럼은 behavior_schema 코드 테이블의 int8 코드 (해당 없음 -1)
+SCHEMA = pa.schema([
+    ('timestamp', pa.timestamp('s')),
+    ('user_id', pa.string()),
+    ('type', pa.int8()),
+    ('action', pa.int8()),
+    ('category', pa.int8()),
+    ('sector', pa.int8()),
+    ('side', pa.int8()),
+    ('amount', pa.float32()),
+    ('risk_profile', pa.int8()),
+])
+_PARTITIONING = ds.partitioning(pa.schema([('day', pa.string())]), flavor='hive')
+_CODED = ('type', 'action', 'category', 'sector', 'risk_profile')
+
+
+def new_store_path(root=None):
+    """실행별 저장 경로 (기본값: 환경변수 SMAES_BEHAVIOR_STORE 또는 ~/.cache/s-maes/behaviors 아래 실행 시각)"""
+    root = root or os.environ.get('SMAES_BEHAVIOR_STORE', DEFAULT_STORE_DIR)
+    return os.path.join(root, datetime.now().strftime('%Y%m%d-%H%M%S-') + uuid.uuid4().hex[:6])
+
+
+def to_frame(table):
+    """저장소 조회 결과(Arrow Table)를 행동 로그 DataFrame으로 변환"""
+    frame = {
+        'timestamp': pd.to_datetime(table['timestamp'].to_numpy()),
+        'user_id': pd.Categorical(table['user_id'].to_numpy(zero_copy_only=False)),
+    }
+    for name in _CODED:
+        frame[name] = schema.decode(name, table[name].to_numpy())
+    frame['side'] = table['side'].to_numpy()
+    frame['amount'] = table['amount'].to_numpy()
+    return pd.DataFrame(frame, columns=schema.COLUMNS)
+
+
+class BehaviorStore:
+    """시간별 CSA 행동 배치를 쌓는 추가 전용(append-only) 디스크 저장소
+
+    <root>/day=YYYY-MM-DD/part-HHMMSS-<id>.arrow 형식의 Arrow IPC 파일로 기록합니다.
+    배치는 메모리에 모아 두었다가 날짜가 바뀌거나 max_buffer_rows를 넘을 때(또는 flush 호출 시)
+    날짜별로 파일 하나씩 쓰므로, 짧은 진행을 반복해도 작은 파일이 쌓이지 않습니다.
+    조회는 아직 기록하지 않은 버퍼도 포함하며, 파일은 메모리 맵으로 열고 날짜 파티션으로
+    대상 파일을 먼저 거른 뒤 조건을 적용합니다. 기본값(compression=None)은 무압축이라
+    메모리 맵 버퍼를 복호화 없이 그대로 읽습니다 ('zstd' 등을 지정하면 디스크는 줄지만 조회 시 해제).
+    """
+
+    def __init__(self, root, compression=None, max_buffer_rows=1_000_000):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+        self.max_buffer_rows = max_buffer_rows
+        self._options = pa.ipc.IpcWriteOptions(compression=compression)
+        self._pending = [] # [(날짜, RecordBatch)]
+        self._pending_rows = 0
+        self.rows_written = 0
+
+    def append(self, batch, timestamp, user_ids):
+        """1시간 행동 배치 추가 (user_ids: 페르소나 user_id 배열, batch['user_idx']로 인덱싱)"""
+        n = len(batch['user_idx'])
+        if n == 0:
+            return
+        ts = np.datetime64(timestamp, 's')
+        record = pa.record_batch([
+            pa.array(np.full(n, ts)),
+            pa.array(np.asarray(user_ids)[batch['user_idx']]).cast(pa.string()),
+            *(pa.array(batch[name].astype(np.int8, copy=False)) for name in ('type', 'action', 'category', 'sector', 'side')),
+            pa.array(batch['amount'].astype(np.float32)),
+            pa.array(batch['risk_profile'].astype(np.int8, copy=False)),
+        ], schema=SCHEMA)
+        day = str(ts.astype('datetime64[D]'))
+        if self._pending and self._pending[-1][0] != day:
+            self.flush() # 지난 날짜는 파일 하나로 기록
+        self._pending.append((day, record))
+        self._pending_rows += n
+        if self._pending_rows >= self.max_buffer_rows:
+            self.flush()
+
+    def flush(self):
+        """버퍼의 배치를 날짜별 IPC 파일로 기록 (임시 파일에 쓴 뒤 교체)"""
+        by_day = {}
+        for day, record in self._pending:
+            by_day.setdefault(day, []).append(record)
+        for day, records in by_day.items():
+            directory = os.path.join(self.root, f'day={day}')
+            os.makedirs(directory, exist_ok=True)
+            first = records[0]['timestamp'][0].as_py()
+            name = f"part-{first:%H%M%S}-{uuid.uuid4().hex[:8]}.arrow"
+            tmp = os.path.join(directory, f'.{name}.tmp') # '.'으로 시작하는 파일은 조회에서 제외
+            with pa.OSFile(tmp, 'wb') as sink, pa.ipc.new_file(sink, SCHEMA, options=self._options) as writer:
+                for record in records:
+                    writer.write_batch(record)
+            os.replace(tmp, os.path.join(directory, name))
+        self.rows_written += self._pending_rows
+        self._pending = []
+        self._pending_rows = 0
+
+    @property
+    def total_rows(self):
+        """기록한 행 + 버퍼에 남은 행"""
+        return self.rows_written + self._pending_rows
+
+    def _pending_dataset(self):
+        """아직 기록하지 않은 버퍼를 파일과 같은 스키마(day 컬럼 포함)의 메모리 데이터셋으로"""
+        pending = list(self._pending)
+        if not pending:
+            return None
+        table = pa.Table.from_batches([record for _, record in pending], SCHEMA)
+        days = pa.array([day for day, record in pending for _ in range(record.num_rows)], pa.string())
+        return ds.dataset(table.append_column('day', days))
+
+    def dataset(self):
+        return ds.dataset(self.root, schema=SCHEMA.append(pa.field('day', pa.string())), format='ipc',
+                          partitioning=_PARTITIONING, filesystem=fs.LocalFileSystem(use_mmap=True))
+
+    @staticmethod
+    def _filter(start=None, end=None, types=None, user_ids=None):
+        """조회 조건식 (start 이상 end 미만, types는 유형 이름 또는 코드)"""
+        conditions = []
+        if start is not None:
+            start = pd.Timestamp(start)
+            conditions.append(ds.field('day') >= start.strftime('%Y-%m-%d'))
+            conditions.append(ds.field('timestamp') >= pa.scalar(start.to_pydatetime(), pa.timestamp('s')))
+        if end is not None:
+            end = pd.Timestamp(end)
+            conditions.append(ds.field('day') <= end.strftime('%Y-%m-%d'))
+            conditions.append(ds.field('timestamp') < pa.scalar(end.to_pydatetime(), pa.timestamp('s')))
+        if types is not None:
+            codes = [schema.BEHAVIOR_TYPES.index(t) if isinstance(t, str) else t for t in types]
+            conditions.append(ds.field('type').isin(pa.array(codes, pa.int8())))
+        if user_ids is not None:
+            conditions.append(ds.field('user_id').isin(pa.array(list(user_ids), pa.string())))
+        expr = None
+        for condition in conditions:
+            expr = condition if expr is None else expr & condition
+        return expr
+
+    def scan(self, start=None, end=None, types=None, user_ids=None, columns=None):
+        """조건에 맞는 행을 Arrow Table로 조회"""
+        columns = list(columns) if columns is not None else SCHEMA.names
+        expr = self._filter(start, end, types, user_ids)
+        table = self.dataset().to_table(columns=columns, filter=expr)
+        pending = self._pending_dataset()
+        if pending is None:
+            return table
+        return pa.concat_tables([table, pending.to_table(columns=columns, filter=expr)])
+
+    def read_frame(self, start=None, end=None, types=None, user_ids=None):
+        """조건에 맞는 행을 행동 로그 DataFrame으로 조회"""
+        return to_frame(self.scan(start, end, types, user_ids))
+
+    def count_rows(self, start=None, end=None, types=None, user_ids=None):
+        expr = self._filter(start, end, types, user_ids)
+        pending = self._pending_dataset()
+        return self.dataset().count_rows(filter=expr) + (pending.count_rows(filter=expr) if pending is not None else 0)
+
+    def latest(self, n=10):
+        """가장 최근 n개 행 (버퍼, 최신 파일 순으로 필요한 만큼만 읽음, 최신순)"""
+        tables = [pa.Table.from_batches([record for _, record in self._pending[-n:]], SCHEMA)]
+        rows = tables[0].num_rows
+        for path in sorted(glob.glob(os.path.join(self.root, 'day=*', 'part-*.arrow')), reverse=True):
+            if rows >= n:
+                break
+            with pa.memory_map(path) as source:
+                table = pa.ipc.open_file(source).read_all()
+            tables.append(table)
+            rows += table.num_rows
+        if not rows:
+            return pd.DataFrame(columns=schema.COLUMNS)
+        frame = to_frame(pa.concat_tables(tables))
+        return frame.sort_values('timestamp', ascending=False, kind='stable').head(n).reset_index(drop=True)
+
+
+if __name__ == "__main__":
+    import tempfile
+    import time
+
+    from agents.csa import CrowdSimulatorAgent
+
+    # 한 달치(720시간) 행동 저장 (조건 조회 검증은 tests/test_behavior_store.py)
+    csa = CrowdSimulatorAgent(num_personas=10_000, seed=0)
+    times = pd.date_range('2024-05-23 09:00', periods=24 * 30, freq='h')
+    with tempfile.TemporaryDirectory() as tmp:
+        store = BehaviorStore(tmp)
+        t0 = time.perf_counter()
+        for t in times:
+            store.append(csa.generate_hourly_batch(), t, csa.personas.user_id)
+        store.flush()
+        written = time.perf_counter() - t0
+        size = sum(os.path.getsize(p) for p in glob.glob(os.path.join(tmp, '*', '*.arrow')))
+        print(f"{store.rows_written:,}행 기록 {written:.2f}s, 디스크 {size / 2**20:.1f}MiB")
+
+        print(store.latest(5))
@@ -1,95 +1,172 @@
 import pandas as pd
 import numpy as np
-import random
+
+from agents import behavior_schema as schema
+from agents.behavior_schema import (
+    BANK_ACTION_START, SECURITIES_ACTION_START, LIFE_ACTION_START, SIDE_BUY, SIDE_SELL,
+)
+from agents.personas import PersonaStore
+from agents.signals import SectorSignals
+
+# 비관 시 행동 유형 후보 (Bank, Card, Securities, Securities, Life)
+_PESSIMISTIC_TYPES = np.array([0, 1, 2, 2, 3], dtype=np.int8)
+# 불안 시 은행 행동 후보 (예금출금, 예금출금, 대출상환)
+_ANXIOUS_BANK_ACTIONS = np.array([1, 1, 2], dtype=np.int8) + BANK_ACTION_START
+# 행동 유형별 금액 범위 (Bank, Card, Securities, Life)
+_AMOUNT_LOW = np.array([10_000, 5_000, 100_000, 0], dtype=np.float64)
+_AMOUNT_HIGH = np.array([1_000_000, 200_000, 5_000_000, 0], dtype=np.float64)
+# 위험 성향별 (안정형, 중립형, 공격형) 행동 배율 (risk_effects=True일 때만 적용)
+# - 행동 발생 확률 배율: 안정형은 덜, 공격형은 더 자주 거래
+# - 증권 매수 확률 가감: 공격형일수록 매수 쪽으로 치우침
+# - 증권 거래 금액 배율: 공격형일수록 큰 금액
+_RISK_ACTIVITY = np.array([0.8, 1.0, 1.2], dtype=np.float64)
+_RISK_BUY_SHIFT = np.array([-0.1, 0.0, 0.1], dtype=np.float64)
+_RISK_TRADE_SIZE = np.array([0.6, 1.0, 1.5], dtype=np.float64)
 
 class CrowdSimulatorAgent:
-    def __init__(self, num_personas=500):
-        self.num_personas = num_personas
-        self.personas = self._generate_personas()
+    def __init__(self, num_personas=500, seed=None, personas=None, risk_probs=None, risk_effects=False):
+        """personas: 미리 만들어 둔 PersonaStore (없으면 seed로 생성), risk_probs: 위험 성향 분포
+
+        risk_effects: 위험 성향이 행동 발생 확률/매수 확률/거래 금액에 영향을 주도록 함
+        (기본값 False: 위험 성향은 기록만 하고 행동 확률은 기존과 동일, 앙상블의 위험 성향 시나리오용)
+        """
+        self.rng = np.random.default_rng(seed)
+        if personas is None:
+            personas = PersonaStore.generate(num_personas, self.rng, risk_probs=risk_probs)
+        self.personas = personas
+        self.num_personas = len(personas)
         self.global_sentiment = 0.0 # -1.0(비관) ~ 1.0(낙관)
-        
-    def _generate_personas(self):
-        personas = []
-        age_groups = [20, 30, 40, 50, 60]
-        risk_profiles = ['안정형', '중립형', '공격형']
-        
-        for i in range(self.num_personas):
-            persona = {
-                'user_id': f'user_{i:03d}',
-                'age': random.choice(age_groups) + random.randint(0, 9),
-                'risk_profile': random.choice(risk_profiles),
-                'base_asset': random.uniform(10_000_000, 500_000_000), # 1천만 ~ 5억
-                'preferred_sectors': random.sample(['IT', '금융', '바이오', '제조', '에너지', '소비재'], 2),
-                'sentiment_sensitivity': random.uniform(0.5, 1.5) # 감도 개인차
-            }
-            personas.append(persona)
-        return pd.DataFrame(personas)
+
+        # 일괄 생성용 컬럼 배열 (저장소 배열을 그대로 사용)
+        self._risk_codes = personas.risk
+        self._sensitivity = personas.sensitivity
+        self._preferred_sectors = personas.sectors
+        self.risk_effects = risk_effects
+        self._user_id_dtype = None
+        self.last_batch = None # 마지막으로 생성한 행동 배치
+
+    @property
+    def user_id_dtype(self):
+        """user_id 범주형 dtype (로그 변환 시점에 한 번만 생성)"""
+        if self._user_id_dtype is None:
+            self._user_id_dtype = pd.CategoricalDtype(self.personas.user_ids())
+        return self._user_id_dtype
+
+    def get_state(self):
+        """체크포인트용 상태 (난수 생성기 상태 포함, 페르소나는 PersonaStore.save로 별도 저장)"""
+        state = {'rng': self.rng.bit_generator.state, 'global_sentiment': float(self.global_sentiment),
+                 'risk_effects': self.risk_effects}
+        if self.last_batch is not None:
+            state.update({f'last_batch.{name}': values for name, values in self.last_batch.items()})
+        return state
+
+    def set_state(self, state):
+        bit_generator = getattr(np.random, state['rng']['bit_generator'])()
+        bit_generator.state = state['rng']
+        self.rng = np.random.Generator(bit_generator)
+        self.global_sentiment = state['global_sentiment']
+        self.risk_effects = state.get('risk_effects', False)
+        batch = {name[len('last_batch.'):]: values for name, values in state.items() if name.startswith('last_batch.')}
+        self.last_batch = batch or None
 
     def update_sentiment(self, risk_sentiment):
         """Debater 피드백에 따라 시장 심리 업데이트"""
         # 점진적 반영 (Smoothing)
         self.global_sentiment = self.global_sentiment * 0.7 + risk_sentiment * 0.3
 
+    def generate_hourly_batch(self):
+        """1시간 단위 금융 행동을 전체 페르소나에 대해 일괄 생성 (컬럼형 출력)
+
+        반환값은 행동이 발생한 페르소나만 담은 배열 dict이며, 코드 값은
+        behavior_schema의 BEHAVIOR_TYPES / ACTIONS / CARD_CATEGORIES / SECTORS
+        인덱스입니다. 해당 없는 항목은 -1.
+        """
+        # 전체 행동 발생 확률: 기본 30% + 센티먼트에 따른 변동 (risk_effects면 위험 성향별 배율)
+        base_prob = max(0.1, 0.3 + (self.global_sentiment * 0.1))
+        if self.risk_effects:
+            base_prob = base_prob * _RISK_ACTIVITY[self._risk_codes]
+        user_idx = np.flatnonzero(self.rng.random(self.num_personas) < base_prob)
+        k = len(user_idx)
+        risk = self._risk_codes[user_idx]
+
+        # 페르소나별 리스크 프로필과 센티먼트 감도 반영
+        sentiment_adj = self.global_sentiment * self._sensitivity[user_idx]
+        u_type, u_action, u_sector, u_amount = self.rng.random((4, k))
+
+        # 비관적일 때는 매도(Securities) 비중 증가 (Bank, Card, Securities, Securities, Life)
+        pessimistic = sentiment_adj < -0.3
+        behavior_type = np.where(
+            pessimistic,
+            _PESSIMISTIC_TYPES[(u_type * 5).astype(np.int8)],
+            (u_type * 4).astype(np.int8),
+        ).astype(np.int8)
+
+        action = np.full(k, -1, dtype=np.int8)
+        category = np.full(k, -1, dtype=np.int8)
+        sector = np.full(k, -1, dtype=np.int8)
+        side = np.zeros(k, dtype=np.int8)
+
+        is_bank = behavior_type == 0
+        is_card = behavior_type == 1
+        is_sec = behavior_type == 2
+        is_life = behavior_type == 3
+
+        # Bank: 불안 시 출금 증가
+        bank_pick = (u_action * 3).astype(np.int8)
+        bank_action = np.where(sentiment_adj < -0.5, _ANXIOUS_BANK_ACTIONS[bank_pick], bank_pick + BANK_ACTION_START)
+        action[is_bank] = bank_action[is_bank]
+
+        # Card: 업종 선택
+        category[is_card] = (u_action[is_card] * 5).astype(np.int8)
+
+        # Securities: 심리(와 위험 성향)에 따른 매수 확률
+        buy_prob = np.where(pessimistic, 0.3, np.where(sentiment_adj > 0.3, 0.7, 0.5))
+        if self.risk_effects:
+            buy_prob += _RISK_BUY_SHIFT[risk]
+        is_sell = u_action[is_sec] >= buy_prob[is_sec]
+        action[is_sec] = SECURITIES_ACTION_START + is_sell
+        side[is_sec] = np.where(is_sell, SIDE_SELL, SIDE_BUY)
+        pref_slot = (u_sector[is_sec] * 2).astype(np.intp)
+        sector[is_sec] = self._preferred_sectors[user_idx[is_sec], pref_slot]
+
+        # Life: 보험 행동
+        action[is_life] = (u_action[is_life] * 3).astype(np.int8) + LIFE_ACTION_START
+
+        # 금액: 유형별 균등분포, 카드 결제는 소비 위축 반영
+        amount = _AMOUNT_LOW[behavior_type] + (_AMOUNT_HIGH[behavior_type] - _AMOUNT_LOW[behavior_type]) * u_amount
+        amount[is_card] *= 1.0 + sentiment_adj[is_card] * 0.2
+        if self.risk_effects:
+            amount[is_sec] *= _RISK_TRADE_SIZE[risk[is_sec]]
+
+        return {
+            'user_idx': user_idx,
+            'type': behavior_type,
+            'action': action,
+            'category': category,
+            'sector': sector,
+            'side': side,
+            'amount': amount,
+            'risk_profile': risk,
+        }
+
     def generate_hourly_behavior(self, current_time):
         """1시간 단위 금융 행동 생성"""
-        behaviors = []
-        
-        # 전체 행동 발생 확률: 기본 30% + 센티먼트에 따른 변동
-        base_prob = max(0.1, 0.3 + (self.global_sentiment * 0.1))
-        
-        for idx, persona in self.personas.iterrows():
-            # 페르소나별 리스크 프로필과 센티먼트 감도 반영
-            sentiment_adj = self.global_sentiment * persona['sentiment_sensitivity']
-            
-            # 랜덤한 확률로 행동 발생
-            if random.random() < base_prob:
-                # 비관적일 때는 출금/매도 확률 증가, 낙관적일 때는 입금/매수 확률 증가
-                if sentiment_adj < -0.3:
-                    behavior_types = ['Bank', 'Card', 'Securities', 'Securities', 'Life'] # 매도(Securities) 비중 높임 (간이)
-                else:
-                    behavior_types = ['Bank', 'Card', 'Securities', 'Life']
-                
-                behavior_type = random.choice(behavior_types)
-                
-                detail = ""
-                amount = 0
-                
-                if behavior_type == 'Bank':
-                    if sentiment_adj < -0.5:
-                        action = random.choice(['예금출금', '예금출금', '대출상환']) # 불안 시 출금 증가
-                    else:
-                        action = random.choice(['예금입금', '예금출금', '대출상환'])
-                    amount = random.uniform(10_000, 1_000_000)
-                    detail = f"{action}: {int(amount)}원"
-                elif behavior_type == 'Card':
-                    category = random.choice(['식비', '교통', '쇼핑', '온라인배달', '의료'])
-                    # 소비 위축 반영
-                    amount = random.uniform(5_000, 200_000) * (1.0 + sentiment_adj * 0.2)
-                    detail = f"{category} 결제: {int(max(0, amount))}원"
-                elif behavior_type == 'Securities':
-                    if sentiment_adj < -0.3:
-                        action = '매도' if random.random() < 0.7 else '매수'
-                    elif sentiment_adj > 0.3:
-                        action = '매수' if random.random() < 0.7 else '매도'
-                    else:
-                        action = random.choice(['매수', '매도'])
-                        
-                    sector = random.choice(persona['preferred_sectors'])
-                    amount = random.uniform(100_000, 5_000_000)
-                    detail = f"{sector} 섹터 {action}: {int(amount)}원"
-                elif behavior_type == 'Life':
-                    action = random.choice(['보험료납입', '사고접수', '해지상담'])
-                    detail = f"보험 {action}"
-                
-                behaviors.append({
-                    'timestamp': current_time,
-                    'user_id': persona['user_id'],
-                    'type': behavior_type,
-                    'detail': detail,
-                    'amount': amount,
-                    'risk_profile': persona['risk_profile']
-                })
-        return pd.DataFrame(behaviors)
+        return self.batch_to_frame(self.generate_hourly_batch(), current_time)
+
+    def generate_hourly_signals(self):
+        """1시간 행동을 생성하고 섹터 시그널만 반환 (원본 배치는 last_batch에 보관)"""
+        self.last_batch = self.generate_hourly_batch()
+        return SectorSignals.from_batch(self.last_batch)
+
+    def last_behaviors(self, current_time):
+        """마지막으로 생성한 배치의 로그 DataFrame"""
+        if self.last_batch is None:
+            return pd.DataFrame(columns=schema.COLUMNS)
+        return self.batch_to_frame(self.last_batch, current_time)
+
+    def batch_to_frame(self, batch, current_time):
+        """컬럼형 행동 배치를 로그 DataFrame으로 변환 (detail 문자열은 표시 시점에 생성)"""
+        return schema.to_frame(batch, current_time, self.user_id_dtype)
 
 if __name__ == "__main__":
     csa = CrowdSimulatorAgent()
@@ -97,4 +174,4 @@ if __name__ == "__main__":
     print(csa.personas.head())
     behaviors = csa.generate_hourly_behavior("2024-05-23 09:00")
     print("\nBehaviors Sample:")
-    print(behaviors.head())
+    print(behaviors.head().assign(detail=schema.render_detail(behaviors.head())))
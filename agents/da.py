@@ -1,118 +1,205 @@
+import functools
+from collections import deque, namedtuple
+
+import numpy as np
+
+from agents.signals import SECTORS, SectorSignals
+from engine.universe import default_universe
+
+# 비평 알림 코드별 마크다운 템플릿 (params로 포맷)
+ALERT_TEMPLATES = {
+    'FEW_STOCKS': "- ⚠️ **ALERT**: 포트폴리오 종목 수가 너무 적습니다. 최소 5개 이상으로 분산하여 섹터별 리스크를 관리하세요.\n",
+    'CONCENTRATION': "- ⚠️ **CAUTION**: **{stock}** 비중이 {weight:.1%}입니다. 단일 종목 20% 초과 금지 룰을 검토하세요.\n",
+    'HEALTH_OK': "- ✅ 포트폴리오 기본 구성이 안정적입니다.\n",
+    'NO_DATA': "- 🔍 분석 가능한 행동 데이터가 현재 없습니다.\n",
+    'OPPORTUNITY': "- 💡 **OPPORTUNITY**: 현재 고객 데이터에서 **{sector}** 섹터 시그널이 강하나, 포트폴리오에 반영되지 않았습니다. 추가를 검토하세요.\n",
+    'LOW_SAMPLE': "- ℹ️ 행동 데이터 샘플이 다소 부족하여 시그널 신뢰도가 낮을 수 있습니다.\n",
+    'TRENDS_OK': "- ✅ 주요 고객 트렌드가 포트폴리오에 적절히 반영되어 있습니다.\n",
+    'NO_MACRO_DATA': "- 특이 사항 없음\n",
+    'MACRO_RISK': "- 🚨 **MACRO RISK**: 예금 출금 행동이 빈번하게 감지됩니다. 시장 유동성 저하 또는 불안 심리 확산 가능성을 주시하세요.\n",
+    'SYSTEMIC_RISK': "- 🚨 **SYSTEMIC RISK**: 보험 사고 접수가 증가하고 있습니다. 관련 섹터(손해보험 등) 변동성 대비가 필요합니다.\n",
+    'MACRO_OK': "- ✅ 거시 리스크 측면에서 특이 시그널이 감지되지 않았습니다.\n",
+}
+
+# 피드백 규칙 기준값 (수치 피드백 feedback_from_signals와 비평 analyze_strategy 공용)
+OPPORTUNITY_MIN_SCORE = 3 # 미편입 섹터의 DA 점수가 이 이상이면 추가 제안
+OPPORTUNITY_WEIGHT = 0.05 # 추가 제안 가중치 (5%)
+LOW_SAMPLE_ROWS = 15 # 행동 건수가 이보다 적으면 시그널 신뢰도 낮음
+# 거시 리스크 규칙: (SectorSignals 속성, 초과 기준 건수, 심리 가감, 알림 코드)
+MACRO_RULES = (
+    ('bank_withdrawals', 5, -0.4, 'MACRO_RISK'),
+    ('life_incidents', 3, -0.2, 'SYSTEMIC_RISK'),
+)
+
+
+def opportunity_mask(signals, active):
+    """시그널이 강하지만 편입 종목이 없는 섹터 (active와 같은 SECTORS 순서 bool 벡터)"""
+    return (signals.da_scores >= OPPORTUNITY_MIN_SCORE) & ~active
+
+
+def macro_risks(signals):
+    """기준을 넘은 거시 리스크 규칙 [(알림 코드, 심리 가감)]"""
+    return [(code, delta) for attr, limit, delta, code in MACRO_RULES if getattr(signals, attr) > limit]
+
+
+# 구조화된 비평: 섹션별 알림 튜플 ((코드, ((파라미터명, 값), ...)), ...)
+Critique = namedtuple('Critique', ['time', 'health', 'trends', 'macro'])
+
+
+def _alert(code, **params):
+    return code, tuple(sorted(params.items()))
+
+
+@functools.lru_cache(maxsize=64)
+def render_critique(critique):
+    """구조화된 비평을 마크다운으로 변환 (같은 비평은 한 번만 렌더링)"""
+    sections = (
+        ("#### 📌 포트폴리오 건전성\n", critique.health),
+        ("\n#### 📊 행동 데이터 및 트렌드 분석\n", critique.trends),
+        ("\n#### 🌐 거시적 리스크 및 기타 제안\n", critique.macro),
+    )
+    parts = [f"### ⚖️ Debater Critique ({critique.time})\n\n"]
+    for title, alerts in sections:
+        parts.append(title)
+        parts.extend(ALERT_TEMPLATES[code].format(**dict(params)) for code, params in alerts)
+    return ''.join(parts)
+
+
 class DebaterAgent:
-    def __init__(self):
-        self.critiques = []
-
-    def analyze_strategy(self, current_time, portfolio, behaviors):
-        """현재 상태와 포트폴리오 전략 비판 및 개선 제안"""
-        critique = f"### ⚖️ Debater Critique ({current_time})\n\n"
-        
-        # 구조화된 피드백 데이터 초기화
-        feedback_data = {
-            'sector_recs': {},
-            'risk_sentiment': 0.0, # -1.0(비관) ~ 1.0(낙관)
-            'csa_instructions': []
-        }
+    def __init__(self, weight=1.0, max_critiques=100, render_text=True, universe=None):
+        self.critiques = deque(maxlen=max_critiques) # 최근 비평 (Critique, 링 버퍼)
+        self.weight = weight # 피드백(sector_recs, risk_sentiment) 반영 강도 (0이면 피드백 없음)
+        self.render_text = render_text # False면 마크다운을 만들지 않음 (헤드리스/배치 실행용)
+        # 종목 -> 섹터 분류 (StockEngine과 같은 유니버스, 포트폴리오 dict의 섹터 판별용)
+        self.universe = universe if universe is not None else default_universe()
+        self.sector_index = self.universe.sector_index(SECTORS)
+
+    def analyze_strategy(self, current_time, portfolio, behaviors, signals=None):
+        """현재 상태와 포트폴리오 전략 비판 및 개선 제안
+
+        signals: OA가 이미 추출한 SectorSignals (없으면 behaviors에서 직접 추출)
+        반환: (비평, 피드백 dict). 비평은 render_text면 마크다운, 아니면 Critique
+        """
+        if signals is None:
+            signals = SectorSignals.from_frame(behaviors)
 
         # 1. 기본 건전성 체크 (종목 수, 비중)
-        critique += "#### 📌 포트폴리오 건전성\n"
-        health_report = self._check_portfolio_health(portfolio)
-        critique += health_report
-        
+        health = self._check_portfolio_health(portfolio)
         # 2. 행동 데이터 기반 트렌드 분석
-        critique += "\n#### 📊 행동 데이터 및 트렌드 분석\n"
-        behavior_report, sector_recs = self._analyze_behaviors_and_trends(behaviors, portfolio)
-        critique += behavior_report
-        feedback_data['sector_recs'] = sector_recs
-        
+        trends, sector_recs = self._analyze_behaviors_and_trends(behaviors, portfolio, signals)
         # 3. 거시적 위험 시그널 (은행/보험 데이터)
-        critique += "\n#### 🌐 거시적 리스크 및 기타 제안\n"
-        macro_report, risk_sentiment = self._check_macro_signals(behaviors)
-        critique += macro_report
-        feedback_data['risk_sentiment'] = risk_sentiment
+        macro, risk_sentiment = self._check_macro_signals(behaviors, signals)
 
-        # CSA 지시사항 요약 생성
+        # 구조화된 피드백 데이터 (반영 강도 weight로 조정)
+        sector_recs = {sector: rec * self.weight for sector, rec in sector_recs.items()}
+        risk_sentiment *= self.weight
+        feedback_data = {
+            'sector_recs': sector_recs,
+            'risk_sentiment': risk_sentiment, # -1.0(비관) ~ 1.0(낙관)
+            'csa_instructions': []
+        }
+
+        # CSA 지시사항 요약 생성 (조정된 피드백 기준)
         if risk_sentiment < -0.3:
             feedback_data['csa_instructions'].append("거시 리스크 감지로 인한 소비 위축 반영")
         for sector, score in sector_recs.items():
             if score > 0:
                 feedback_data['csa_instructions'].append(f"{sector} 섹터 관심도 상향 유도")
 
+        critique = Critique(str(current_time), health, trends, macro)
         self.critiques.append(critique)
-        return critique, feedback_data
+        return (render_critique(critique) if self.render_text else critique), feedback_data
+
+    def latest_critique(self):
+        """가장 최근 비평 마크다운 (필요할 때만 렌더링, 비평이 없으면 None)"""
+        if not self.critiques:
+            return None
+        return render_critique(self.critiques[-1])
+
+    def get_state(self):
+        """체크포인트용 상태 (비평은 JSON으로 옮길 수 있는 중첩 리스트)"""
+        return {
+            'weight': self.weight,
+            'render_text': self.render_text,
+            'max_critiques': self.critiques.maxlen,
+            'critiques': [list(c) for c in self.critiques],
+        }
+
+    def set_state(self, state):
+        self.weight = state['weight']
+        self.render_text = state['render_text']
+        self.critiques = deque(
+            (Critique(time, *(tuple((code, tuple(tuple(p) for p in params)) for code, params in alerts)
+                              for alerts in sections))
+             for time, *sections in state['critiques']),
+            maxlen=state['max_critiques'],
+        )
+
+    def feedback_from_signals(self, signals, weights, sector_index):
+        """OA와 공유하는 SectorSignals로부터 수치 피드백만 산출 (비평 텍스트 생략)
+
+        weights: 종목 비중 벡터, sector_index: 같은 종목 순서의 SectorIndex (SECTORS 기준)
+        반환: (sector_recs 벡터(SECTORS 순서), risk_sentiment)
+        """
+        # 미반영 트렌드 포착: 편입 종목이 없는 섹터에 가중치 추가 제안
+        sector_recs = np.where(opportunity_mask(signals, sector_index.active(weights)), OPPORTUNITY_WEIGHT, 0.0)
+
+        risk_sentiment = 0.0
+        for _, delta in macro_risks(signals):
+            risk_sentiment += delta
+        return sector_recs * self.weight, risk_sentiment * self.weight
 
     def _check_portfolio_health(self, portfolio):
-        health_report = ""
-        # 종목 수 체크
-        if len(portfolio) < 5:
-            health_report += "- ⚠️ **ALERT**: 포트폴리오 종목 수가 너무 적습니다. 최소 5개 이상으로 분산하여 섹터별 리스크를 관리하세요.\n"
-        
+        alerts = []
+        # 종목 수 체크 (portfolio는 유니버스 전체를 담으므로 편입 종목만 셈)
+        if sum(1 for weight in portfolio.values() if weight > 0) < 5:
+            alerts.append(_alert('FEW_STOCKS'))
+
         # 특정 종목 편중도 체크
         for stock, weight in portfolio.items():
             if weight > 0.20:
-                 health_report += f"- ⚠️ **CAUTION**: **{stock}** 비중이 {weight:.1%}입니다. 단일 종목 20% 초과 금지 룰을 검토하세요.\n"
-        
-        if not health_report:
-            health_report = "- ✅ 포트폴리오 기본 구성이 안정적입니다.\n"
-        return health_report
-
-    def _analyze_behaviors_and_trends(self, behaviors, portfolio):
-        if behaviors.empty:
-            return "- 🔍 분석 가능한 행동 데이터가 현재 없습니다.\n", {}
-            
-        report = ""
+                alerts.append(_alert('CONCENTRATION', stock=stock, weight=float(weight)))
+
+        if not alerts:
+            alerts.append(_alert('HEALTH_OK'))
+        return tuple(alerts)
+
+    def _analyze_behaviors_and_trends(self, behaviors, portfolio, signals):
+        if signals.total == 0:
+            return (_alert('NO_DATA'),), {}
+
+        alerts = []
         sector_recs = {}
-        # 섹터별 시그널 추출 (OA 로직과 유사하지만 '미반영'을 찾기 위함)
-        sector_signals = {}
-        for _, row in behaviors.iterrows():
-            if row['type'] == 'Card' and '온라인배달' in row['detail']:
-                sector_signals['플랫폼'] = sector_signals.get('플랫폼', 0) + 1
-            if row['type'] == 'Securities' and '매수' in row['detail']:
-                for s in ['IT', '금융', '바이오', '제조', '에너지', '소비재']:
-                    if s in row['detail']:
-                        sector_signals[s] = sector_signals.get(s, 0) + 1
-
-        # 현재 포트폴리오의 섹터 분포 (간이 맵핑)
-        stock_sectors = {
-            '삼성전자': 'IT', 'SK하이닉스': 'IT', 'LG에너지솔루션': '에너지',
-            '삼성바이오로직스': '바이오', '현대차': '제조', 'NAVER': '플랫폼',
-            '카카오': '플랫폼', 'POSCO홀딩스': '제조', '기아': '제조', '셀트리온': '바이오'
-        }
-        active_sectors = {stock_sectors.get(s, '기타') for s, w in portfolio.items() if w > 0}
+        # 현재 포트폴리오에 편입된 섹터 (유니버스 밖 종목은 미분류)
+        active = self.sector_index.active(self.universe.vector(portfolio))
 
         # 미반영 트렌드 포착
-        for sector, score in sector_signals.items():
-            if score >= 3 and sector not in active_sectors:
-                report += f"- 💡 **OPPORTUNITY**: 현재 고객 데이터에서 **{sector}** 섹터 시그널이 강하나, 포트폴리오에 반영되지 않았습니다. 추가를 검토하세요.\n"
-                sector_recs[sector] = 0.05 # 5% 가중치 추가 제안
+        for i in np.flatnonzero(opportunity_mask(signals, active)):
+            alerts.append(_alert('OPPORTUNITY', sector=SECTORS[i]))
+            sector_recs[SECTORS[i]] = OPPORTUNITY_WEIGHT
 
         # 데이터 부족 알림
-        if len(behaviors) < 15:
-            report += "- ℹ️ 행동 데이터 샘플이 다소 부족하여 시그널 신뢰도가 낮을 수 있습니다.\n"
-        elif not report:
-            report = "- ✅ 주요 고객 트렌드가 포트폴리오에 적절히 반영되어 있습니다.\n"
-            
-        return report, sector_recs
-
-    def _check_macro_signals(self, behaviors):
-        if behaviors.empty:
-            return "- 특이 사항 없음\n", 0.0
-            
-        report = ""
+        if signals.total < LOW_SAMPLE_ROWS:
+            alerts.append(_alert('LOW_SAMPLE'))
+        elif not alerts:
+            alerts.append(_alert('TRENDS_OK'))
+
+        return tuple(alerts), sector_recs
+
+    def _check_macro_signals(self, behaviors, signals):
+        if signals.total == 0:
+            return (_alert('NO_MACRO_DATA'),), 0.0
+
+        alerts = []
         risk_sentiment = 0.0
-        # 은행/보험 데이터 분석
-        bank_withdrawals = len(behaviors[(behaviors['type'] == 'Bank') & (behaviors['detail'].str.contains('예금출금'))])
-        life_incidents = len(behaviors[(behaviors['type'] == 'Life') & (behaviors['detail'].str.contains('사고접수'))])
-        
-        if bank_withdrawals > 5:
-            report += "- 🚨 **MACRO RISK**: 예금 출금 행동이 빈번하게 감지됩니다. 시장 유동성 저하 또는 불안 심리 확산 가능성을 주시하세요.\n"
-            risk_sentiment -= 0.4
-        if life_incidents > 3:
-            report += "- 🚨 **SYSTEMIC RISK**: 보험 사고 접수가 증가하고 있습니다. 관련 섹터(손해보험 등) 변동성 대비가 필요합니다.\n"
-            risk_sentiment -= 0.2
-            
-        if not report:
-            report = "- ✅ 거시 리스크 측면에서 특이 시그널이 감지되지 않았습니다.\n"
-        return report, risk_sentiment
+        # 은행/보험 데이터 분석 (예금 출금, 보험 사고 접수 건수)
+        for code, delta in macro_risks(signals):
+            alerts.append(_alert(code))
+            risk_sentiment += delta
+
+        if not alerts:
+            alerts.append(_alert('MACRO_OK'))
+        return tuple(alerts), risk_sentiment
 
 if __name__ == "__main__":
     import pandas as pd
@@ -121,15 +208,15 @@ if __name__ == "__main__":
     
     # 샘플 행동 데이터 생성
     sample_behaviors = pd.DataFrame([
-        {'type': 'Card', 'detail': '온라인배달 결제', 'amount': 20000},
-        {'type': 'Card', 'detail': '온라인배달 결제', 'amount': 15000},
-        {'type': 'Card', 'detail': '온라인배달 결제', 'amount': 30000},
-        {'type': 'Bank', 'detail': '예구출금', 'amount': 1000000},
-        {'type': 'Bank', 'detail': '예금출금', 'amount': 1000000},
-        {'type': 'Bank', 'detail': '예금출금', 'amount': 1000000},
-        {'type': 'Bank', 'detail': '예금출금', 'amount': 1000000},
-        {'type': 'Bank', 'detail': '예금출금', 'amount': 1000000},
-        {'type': 'Bank', 'detail': '예금출금', 'amount': 1000000},
+        {'type': 'Card', 'action': None, 'category': '온라인배달', 'sector': None, 'amount': 20000},
+        {'type': 'Card', 'action': None, 'category': '온라인배달', 'sector': None, 'amount': 15000},
+        {'type': 'Card', 'action': None, 'category': '온라인배달', 'sector': None, 'amount': 30000},
+        {'type': 'Bank', 'action': '예금입금', 'category': None, 'sector': None, 'amount': 1000000},
+        {'type': 'Bank', 'action': '예금출금', 'category': None, 'sector': None, 'amount': 1000000},
+        {'type': 'Bank', 'action': '예금출금', 'category': None, 'sector': None, 'amount': 1000000},
+        {'type': 'Bank', 'action': '예금출금', 'category': None, 'sector': None, 'amount': 1000000},
+        {'type': 'Bank', 'action': '예금출금', 'category': None, 'sector': None, 'amount': 1000000},
+        {'type': 'Bank', 'action': '예금출금', 'category': None, 'sector': None, 'amount': 1000000},
     ])
     
     print(da.analyze_strategy("2024-05-23 09:00", sample_portfolio, sample_behaviors))
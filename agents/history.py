@@ -0,0 +1,79 @@
+from datetime import datetime
+
+import numpy as np
+
+
+class PortfolioHistory:
+    """OA 시간별 포트폴리오 이력
+
+    시각, (시각 x 종목) 비중 행렬, 행동 건수를 미리 할당한 배열에 누적합니다
+    (용량은 2배씩 확장). 비중 열 순서는 tickers 순서입니다.
+    """
+
+    def __init__(self, tickers, capacity=24 * 30):
+        self.tickers = list(tickers)
+        self.size = 0
+        self._times = np.empty(capacity, dtype='datetime64[ns]')
+        self._weights = np.empty((capacity, len(self.tickers)), dtype=np.float64)
+        self._behaviors = np.empty(capacity, dtype=np.int64)
+
+    def _reserve(self, n):
+        capacity = len(self._times)
+        if self.size + n <= capacity:
+            return
+        while capacity < self.size + n:
+            capacity *= 2
+        self._times = np.resize(self._times, capacity)
+        self._weights = np.resize(self._weights, (capacity, len(self.tickers)))
+        self._behaviors = np.resize(self._behaviors, capacity)
+
+    def append(self, time, weights, behaviors_count):
+        """1시간 기록 (weights: tickers 순서 (N,) 벡터)"""
+        self.extend([np.datetime64(time, 'ns')], np.asarray(weights)[None], [behaviors_count])
+
+    def extend(self, times, weights, behaviors_count):
+        """여러 시간 일괄 기록 (times: (T,), weights: (T, N), behaviors_count: (T,))"""
+        n = len(times)
+        self._reserve(n)
+        self._times[self.size:self.size + n] = times
+        self._weights[self.size:self.size + n] = weights
+        self._behaviors[self.size:self.size + n] = behaviors_count
+        self.size += n
+
+    def __len__(self):
+        return self.size
+
+    @property
+    def times(self):
+        return self._times[:self.size]
+
+    @property
+    def weights(self):
+        return self._weights[:self.size]
+
+    @property
+    def behaviors_count(self):
+        return self._behaviors[:self.size]
+
+    def __getitem__(self, i):
+        """i번째 시간 기록 ({'time', 'portfolio', 'behaviors_count'} dict, 음수 인덱스 가능)"""
+        if not -self.size <= i < self.size:
+            raise IndexError(i)
+        i %= self.size
+        return {
+            'time': self._times[i].astype('datetime64[us]').astype(datetime),
+            'portfolio': dict(zip(self.tickers, self._weights[i].tolist())),
+            'behaviors_count': int(self._behaviors[i]),
+        }
+
+    def get_state(self):
+        return {'tickers': self.tickers, 'times': self.times, 'weights': self.weights,
+                'behaviors_count': self.behaviors_count}
+
+    def set_state(self, state):
+        self.tickers = list(state['tickers'])
+        self.size = 0
+        self._times = np.empty(max(len(state['times']), 1), dtype='datetime64[ns]')
+        self._weights = np.empty((len(self._times), len(self.tickers)), dtype=np.float64)
+        self._behaviors = np.empty(len(self._times), dtype=np.int64)
+        self.extend(state['times'], state['weights'], state['behaviors_count'])
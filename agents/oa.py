@@ -1,14 +1,37 @@
+import logging
+
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 
+from agents.history import PortfolioHistory
+from agents.rolling import RollingSignalState
+from engine.instrumentation import metrics
+from engine.lag import LagModel
+from agents.signals import SECTORS, SectorSignals
+
+logger = logging.getLogger(__name__)
+
 class OrchestratorAgent:
-    def __init__(self, stock_engine, csa_agent):
+    def __init__(self, stock_engine, csa_agent, optimizer=None, lag_weight=10.0, behavior_store=None):
         self.stock_engine = stock_engine
         self.csa_agent = csa_agent
+        # 제약 최적화기 (engine.optimizer.ConstrainedOptimizer), 없으면 기본 가중치 규칙 사용
+        self.optimizer = optimizer
         self.current_sim_time = datetime(2024, 5, 23, 9, 0)
         self.etf_portfolio = {} # {종목명: 가중치}
-        self.history = []
+        self.last_signals = None # 최근 1시간 섹터 시그널 (DA와 공유)
+        self.signal_state = RollingSignalState(capacity=24 * 90) # 시간/일/월 누적 시그널 (최근 90일 보관)
+        self.lag_model = None # 행동 -> 주가 시차 모델 (fit_lag_model로 추정)
+        self.lag_weight = lag_weight # 선행 점수 반영 강도 (섹터 점수 척도)
+        self.behavior_store = behavior_store # 시간별 행동 배치 기록 (agents.behavior_store.BehaviorStore)
+
+        # 유니버스 종목 순서와 SECTORS 기준 섹터 인덱스 (생성 시 한 번만 계산, 미분류 종목은 -1)
+        self.universe = self.stock_engine.universe
+        self.sector_index = self.universe.sector_index(SECTORS)
+        self._stock_list = list(self.universe.names)
+        self._weights = np.zeros(len(self._stock_list)) # 현재 비중 벡터 (etf_portfolio와 같은 값)
+        self.history = PortfolioHistory(self._stock_list) # 시간별 비중 행렬 / 행동 건수
 
     def step_hour(self, extra_signals=None):
         """1시간 진행"""
@@ -17,18 +40,16 @@ class OrchestratorAgent:
         # 1. CSA로부터 행동 데이터 수집
         behaviors = self.csa_agent.generate_hourly_behavior(self.current_sim_time.strftime("%Y-%m-%d %H:%M"))
         
-        # 2. 행동 데이터 분석 및 시장 시그널 생성
-        signals = self._analyze_behaviors(behaviors)
+        # 2. 행동 데이터 분석 및 시장 시그널 생성 (DA와 공유)
+        self.last_signals = SectorSignals.from_frame(behaviors)
+        self.signal_state.push(self.last_signals)
+        signals = self.last_signals.oa_signals() if not behaviors.empty else {}
         
         # 3. 포트폴리오 최적화 (재균형) - DA의 추가 시그널 반영
         self._optimize_portfolio(signals, extra_signals)
         
         # 4. 결과 저장
-        self.history.append({
-            'time': self.current_sim_time,
-            'portfolio': self.etf_portfolio.copy(),
-            'behaviors_count': len(behaviors)
-        })
+        self.history.append(self.current_sim_time, [self.etf_portfolio[s] for s in self._stock_list], len(behaviors))
         
         # 5. 시간 업데이트
         self.current_sim_time += timedelta(hours=1)
@@ -38,55 +59,175 @@ class OrchestratorAgent:
         """행동 데이터를 섹터별 시그널로 변환"""
         if behaviors.empty:
             return {}
-            
-        # 간단한 로직: 카드 결제 카테고리/증권 매수 섹터를 기반으로 점수 산출
-        sector_scores = {
-            'IT': 0.0, '금융': 0.0, '바이오': 0.0, '제조': 0.0, '에너지': 0.0, '소비재': 0.0, '플랫폼': 0.0
-        }
-        
-        for _, row in behaviors.iterrows():
-            if row['type'] == 'Card':
-                if '온라인배달' in row['detail']:
-                    sector_scores['플랫폼'] += 1
-                elif '쇼핑' in row['detail']:
-                    sector_scores['소비재'] += 1
-            elif row['type'] == 'Securities':
-                for sector in sector_scores.keys():
-                    if sector in row['detail']:
-                        if '매수' in row['detail']:
-                            sector_scores[sector] += 2
-                        else:
-                            sector_scores[sector] -= 1
-                            
-        return sector_scores
+        return SectorSignals.from_frame(behaviors).oa_signals()
 
     def _optimize_portfolio(self, signals, extra_signals=None):
         """시그널을 바탕으로 ETF 종목 선정 및 비중 조절"""
         # extra_signals는 DA의 제안: {'sector_recs': {'IT': 0.05, ...}}
         sector_recs = extra_signals.get('sector_recs', {}) if extra_signals else {}
+        scores = np.array([signals.get(sector, 0) for sector in SECTORS], dtype=np.float64)
+        recs = np.array([sector_recs.get(sector, 0) for sector in SECTORS], dtype=np.float64)
+        self._weights = self._optimize_weights(scores, recs)
+        self.etf_portfolio = dict(zip(self._stock_list, self._weights.tolist()))
+
+    def _optimize_weights(self, scores, recs):
+        """섹터 점수/DA 제안 벡터(SECTORS 순서)로 종목 비중 벡터 산출"""
+        # 미분류('기타') 종목은 점수 0
+        scores = self.sector_index.expand(scores)
+        recs = self.sector_index.expand(recs)
+
+        # Time-Lag 선행 지표: 종목별 예측 점수 가산
+        if self.lag_model is not None:
+            history = self.signal_state.sector_score_history(self.lag_model.max_lag + 1)
+            scores = scores + self.lag_weight * self.lag_model.predict(history)
+
+        if self.optimizer is not None:
+            # DA 제안(비중)을 점수 척도로 환산해 함께 반영, 직전 비중 기준 turnover 페널티
+            ticker_scores = scores + recs / self.optimizer.score_scale
+            return self.optimizer.optimize(ticker_scores, self.sector_index.codes, self._weights)
+
+        # 기본 비중 10% + 시그널에 따른 가감 + DA 제안 반영
+        weights = np.maximum(0.05, 0.10 + (scores * 0.01) + recs)
 
-        stock_list = list(self.stock_engine.tickers.keys())
-        
-        # 종목별 섹터 매핑 (예시)
-        stock_sectors = {
-            '삼성전자': 'IT', 'SK하이닉스': 'IT', 'LG에너지솔루션': '에너지',
-            '삼성바이오로직스': '바이오', '현대차': '제조', 'NAVER': '플랫폼',
-            '카카오': '플랫폼', 'POSCO홀딩스': '제조', '기아': '제조', '셀트리온': '바이오'
-        }
-        
-        weights = {}
-        for stock in stock_list:
-            sector = stock_sectors.get(stock, '기타')
-            score = signals.get(sector, 0)
-            
-            # 기본 비중 10% + 시그널에 따른 가감 + DA 제안 반영
-            da_adj = sector_recs.get(sector, 0)
-            weight = max(0.05, 0.10 + (score * 0.01) + da_adj)
-            weights[stock] = weight
-            
         # 가중치 정규화 (합계 1.0)
-        total_weight = sum(weights.values())
-        self.etf_portfolio = {k: v / total_weight for k, v in weights.items()}
+        return weights / weights.sum()
+
+    def fit_lag_model(self, max_lag=48, min_hours=72):
+        """누적 섹터 시그널과 StockEngine 시간봉 수익률로 시차 모델 추정
+
+        시그널 이력이 min_hours보다 짧으면 추정하지 않고 None을 반환합니다.
+        """
+        hours = min(self.signal_state.hours, self.signal_state.capacity)
+        if hours < min_hours:
+            return None
+        signals = self.signal_state.sector_score_history(hours)
+
+        # 시각 t의 수익률 = t ~ t+1 보유 수익률 (시그널 t와 같은 행)
+        end = np.datetime64(self.current_sim_time, 'h')
+        times = np.arange(end - np.timedelta64(hours, 'h'), end + np.timedelta64(1, 'h'))
+        prices = self.stock_engine.get_price_matrix(times)
+        returns = np.divide(prices[1:], prices[:-1], out=np.ones((hours, prices.shape[1])), where=prices[:-1] > 0) - 1.0
+
+        with metrics.stage('oa.lag_fit', rows=hours):
+            self.lag_model = LagModel(max_lag=max_lag).fit(signals, np.nan_to_num(returns, nan=0.0))
+        return self.lag_model
+
+    def best_active_etf(self, window='1d'):
+        """누적 시그널 윈도우('1d' 일간, '1m' 월간) 기준 Best Active ETF 비중 산출
+
+        윈도우 점수를 시간당 평균으로 환산해 시간 단위 최적화와 같은 척도로 비중을 계산합니다.
+        """
+        hours = self.signal_state.window_hours(window)
+        if hours == 0:
+            return {}
+        scores = self.signal_state.signals(window).oa_scores / hours
+        weights = self._optimize_weights(scores, np.zeros(len(SECTORS)))
+        return dict(zip(self._stock_list, weights.tolist()))
+
+    def step_hours(self, hours, debater=None, feedback=None):
+        """여러 시간을 한 번에 시뮬레이션 (CSA -> OA -> DA 피드백 루프 유지)
+
+        시간별 결과를 누적 배열로 반환합니다. debater가 주어지면 매 시간 DA
+        피드백(risk_sentiment, sector_recs)이 다음 시간의 CSA 심리와
+        포트폴리오 최적화에 반영되며, 마크다운 비평은 마지막 시간에 대해서만 생성합니다.
+        csa_agent는 CrowdSimulatorAgent 또는 agents.sharded.ShardedCrowdSimulator입니다.
+        시간당 비용은 페르소나 500명 기준 약 0.3~0.6ms(CSA 배치 생성이 가장 큼)로,
+        720시간(1개월)은 기본 비중 계산 약 0.2~0.3초, ConstrainedOptimizer 약 0.3~0.45초입니다.
+        """
+        logger.info("Simulating %d hours from %s", hours, self.current_sim_time)
+        n_stocks = len(self._stock_list)
+        n_sectors = len(SECTORS)
+
+        times = np.datetime64(self.current_sim_time, 'h') + np.arange(hours)
+        weights = np.empty((hours, n_stocks), dtype=np.float64)
+        signals = np.empty((hours, n_sectors), dtype=np.float64)
+        risk_sentiment = np.zeros(hours, dtype=np.float64)
+        sector_recs = np.zeros((hours, n_sectors), dtype=np.float64)
+        behaviors_count = np.empty(hours, dtype=np.int64)
+
+        recs = np.array([feedback['sector_recs'].get(s, 0) for s in SECTORS], dtype=np.float64) \
+            if feedback else np.zeros(n_sectors)
+        risk = feedback['risk_sentiment'] if feedback else None
+        last_time = self.current_sim_time
+
+        for i in range(hours):
+            # 1. 이전 피드백을 CSA 시장 심리에 반영
+            if risk is not None:
+                self.csa_agent.update_sentiment(risk)
+
+            # 2. 행동 데이터 생성 및 섹터 시그널 산출
+            with metrics.stage('csa.generate') as stage:
+                self.last_signals = self.csa_agent.generate_hourly_signals()
+                stage.rows = self.last_signals.total
+            if self.behavior_store is not None and self.csa_agent.last_batch is not None:
+                with metrics.stage('store.append') as stage:
+                    self.behavior_store.append(self.csa_agent.last_batch, self.current_sim_time, self.csa_agent.personas.user_id)
+                    stage.rows = self.last_signals.total
+            with metrics.stage('oa.signals'):
+                self.signal_state.push(self.last_signals)
+            scores = self.last_signals.oa_scores
+
+            # 3. 포트폴리오 최적화 (DA 제안 반영)
+            with metrics.stage('oa.optimize'):
+                w = self._optimize_weights(scores, recs)
+            self._weights = w
+
+            weights[i] = w
+            signals[i] = scores
+            behaviors_count[i] = self.last_signals.total
+            last_time = self.current_sim_time
+            self.current_sim_time += timedelta(hours=1)
+
+            # 4. DA 피드백 (다음 시간에 반영)
+            if debater is not None:
+                with metrics.stage('da.feedback'):
+                    recs, risk = debater.feedback_from_signals(self.last_signals, w, self.sector_index)
+                sector_recs[i] = recs
+                risk_sentiment[i] = risk
+
+        self.history.extend(times, weights, behaviors_count)
+        # 종목명 dict는 마지막 시간에 대해서만 생성 (시간별 비중은 history 행렬)
+        self.etf_portfolio = dict(zip(self._stock_list, self._weights.tolist()))
+        with metrics.stage('csa.frame') as stage:
+            last_behaviors = self.csa_agent.last_behaviors(last_time.strftime("%Y-%m-%d %H:%M")) \
+                if hours > 0 else pd.DataFrame()
+            stage.rows = len(last_behaviors)
+        if debater is not None and hours > 0:
+            # 마지막 시간에 대해서만 비평 텍스트 및 전체 피드백 생성
+            with metrics.stage('da.critique'):
+                _, feedback = debater.analyze_strategy(self.current_sim_time, self.etf_portfolio, last_behaviors,
+                                                       signals=self.last_signals)
+
+        return {
+            'time': times,
+            'tickers': self._stock_list,
+            'sectors': SECTORS,
+            'weights': weights,
+            'signals': signals,
+            'risk_sentiment': risk_sentiment,
+            'sector_recs': sector_recs,
+            'behaviors_count': behaviors_count,
+            'last_behaviors': last_behaviors,
+            'feedback': feedback,
+        }
+
+    def get_state(self):
+        """체크포인트용 상태 (CSA/누적 시그널/시차 모델은 각 객체의 get_state로 별도 저장)"""
+        return {
+            'current_sim_time': self.current_sim_time.isoformat(),
+            'etf_portfolio': self.etf_portfolio,
+            'lag_weight': self.lag_weight,
+            'last_counts': self.last_signals.counts if self.last_signals is not None else None,
+            'last_risk_counts': self.last_signals.risk_counts if self.last_signals is not None else None,
+        }
+
+    def set_state(self, state):
+        self.current_sim_time = datetime.fromisoformat(state['current_sim_time'])
+        self.etf_portfolio = dict(state['etf_portfolio'])
+        self._weights = self.universe.vector(self.etf_portfolio)
+        self.lag_weight = state['lag_weight']
+        counts = state.get('last_counts')
+        self.last_signals = SectorSignals(counts, state['last_risk_counts']) if counts is not None else None
 
 if __name__ == "__main__":
     from agents.csa import CrowdSimulatorAgent
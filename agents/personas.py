@@ -0,0 +1,118 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from agents.behavior_schema import SECTORS, RISK_PROFILES
+
+AGE_GROUPS = np.array([20, 30, 40, 50, 60], dtype=np.int8)
+_COLUMNS = ('user_id', 'age', 'risk', 'sectors', 'base_asset', 'sensitivity')
+
+
+def _format_user_ids(idx, width):
+    """'user_000' 형식의 고정폭 바이트 문자열 배열 (자릿수 연산으로 일괄 생성)"""
+    prefix = np.frombuffer(b'user_', dtype=np.uint8)
+    digits = (idx[:, None] // 10 ** np.arange(width - 1, -1, -1, dtype=np.int64)) % 10 + ord('0')
+    chars = np.empty((len(idx), len(prefix) + width), dtype=np.uint8)
+    chars[:, :len(prefix)] = prefix
+    chars[:, len(prefix):] = digits
+    return chars.view(f'S{chars.shape[1]}').ravel()
+
+
+class PersonaStore:
+    """컬럼형 가상 고객(페르소나) 저장소
+
+    user_id: 고정폭 바이트 문자열, age/risk: int8 (risk는 RISK_PROFILES 코드),
+    sectors: (n, 2) int8 선호 섹터 코드 (SECTORS 인덱스, 서로 다름),
+    base_asset/sensitivity: float32
+    """
+
+    def __init__(self, user_id, age, risk, sectors, base_asset, sensitivity):
+        self.user_id = user_id
+        self.age = age
+        self.risk = risk
+        self.sectors = sectors
+        self.base_asset = base_asset
+        self.sensitivity = sensitivity
+
+    def __len__(self):
+        return len(self.age)
+
+    @classmethod
+    def generate(cls, n, seed=None, risk_probs=None, id_offset=0):
+        """시드 기반 일괄 생성
+
+        seed: 정수 또는 np.random.Generator, risk_probs: 위험 성향 분포 (기본 균등),
+        id_offset: user_id 시작 번호 (샤드별 생성 시 사용)
+        """
+        rng = np.random.default_rng(seed)
+        width = max(3, len(str(id_offset + n - 1)))
+        user_id = _format_user_ids(np.arange(id_offset, id_offset + n, dtype=np.int64), width)
+
+        age = (AGE_GROUPS[rng.integers(0, len(AGE_GROUPS), n)] + rng.integers(0, 10, n)).astype(np.int8)
+        risk = rng.choice(len(RISK_PROFILES), size=n, p=risk_probs).astype(np.int8)
+        base_asset = rng.uniform(10_000_000, 500_000_000, n).astype(np.float32) # 1천만 ~ 5억
+
+        # 서로 다른 선호 섹터 2개 (random.sample과 같은 분포)
+        first = rng.integers(0, len(SECTORS), n)
+        second = (first + rng.integers(1, len(SECTORS), n)) % len(SECTORS)
+        sectors = np.stack([first, second], axis=1).astype(np.int8)
+
+        sensitivity = rng.uniform(0.5, 1.5, n).astype(np.float32) # 감도 개인차
+        return cls(user_id, age, risk, sectors, base_asset, sensitivity)
+
+    def save(self, path):
+        """컬럼별 .npy 파일로 저장"""
+        os.makedirs(path, exist_ok=True)
+        for name in _COLUMNS:
+            np.save(os.path.join(path, f'{name}.npy'), getattr(self, name))
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        """저장된 페르소나 로드 (mmap=True면 메모리 맵으로 즉시 로드)"""
+        mode = 'r' if mmap else None
+        return cls(*(np.load(os.path.join(path, f'{name}.npy'), mmap_mode=mode) for name in _COLUMNS))
+
+    def slice(self, start, stop):
+        """[start, stop) 구간 페르소나 (샤드 분할용, 배열 복사 없음)"""
+        return PersonaStore(*(getattr(self, name)[start:stop] for name in _COLUMNS))
+
+    def user_ids(self):
+        """user_id 문자열 배열"""
+        return self.user_id.astype(str)
+
+    def to_frame(self, limit=None):
+        """화면 표시용 DataFrame (limit개 행만 변환 가능)"""
+        rows = slice(None, limit)
+        sector_names = np.asarray(SECTORS, dtype=object)
+        return pd.DataFrame({
+            'user_id': self.user_id[rows].astype(str),
+            'age': self.age[rows],
+            'risk_profile': np.asarray(RISK_PROFILES, dtype=object)[self.risk[rows]],
+            'base_asset': self.base_asset[rows],
+            'preferred_sectors': list(sector_names[self.sectors[rows]]),
+            'sentiment_sensitivity': self.sensitivity[rows],
+        })
+
+    def head(self, n=5):
+        return self.to_frame(limit=n)
+
+
+if __name__ == "__main__":
+    import tempfile
+    import time
+
+    n = 1_000_000
+    t0 = time.perf_counter()
+    store = PersonaStore.generate(n, seed=0)
+    generated = time.perf_counter() - t0
+    with tempfile.TemporaryDirectory() as tmp:
+        store.save(tmp)
+        t0 = time.perf_counter()
+        loaded = PersonaStore.load(tmp)
+        risk_mix = np.bincount(loaded.risk, minlength=len(RISK_PROFILES)) / len(loaded)
+        elapsed = time.perf_counter() - t0
+        nbytes = sum(getattr(store, name).nbytes for name in _COLUMNS)
+        print(f"{n:,}명 생성 {generated:.2f}s, mmap 로드+집계 {elapsed * 1000:.1f}ms, {nbytes / 2**20:.1f}MiB")
+        print("위험 성향 분포:", dict(zip(RISK_PROFILES, risk_mix.round(3).tolist())))
+        print(loaded.head())
@@ -0,0 +1,92 @@
+import numpy as np
+
+from agents import behavior_schema as schema
+from agents.signals import COUNTS_SHAPE, SectorSignals, oa_scores_from_counts
+
+# 누적 윈도우 (이름: 시간 수)
+WINDOWS = {'1h': 1, '1d': 24, '1m': 24 * 30}
+
+_N_COUNTS = COUNTS_SHAPE[0] * COUNTS_SHAPE[1]
+_N_RISK = len(schema.RISK_PROFILES)
+
+
+class RollingSignalState:
+    """시간별 행동 카운터의 증분 누적 상태
+
+    최근 capacity 시간의 (유형 x 세부 코드) 카운터와 위험 성향별 건수를 링 버퍼에
+    보관하고, 1h/1d/1m 윈도우 합계와 지수 감쇠 합계를 시간당 O(1)로 갱신합니다.
+    섹터 점수는 카운터에 대해 선형이므로 윈도우 합계에서 바로 SectorSignals로 복원합니다.
+    """
+
+    def __init__(self, capacity=WINDOWS['1m'], half_lives=(6, 24, 168)):
+        if capacity < max(WINDOWS.values()):
+            raise ValueError(f"capacity는 최소 {max(WINDOWS.values())}시간 이상이어야 합니다.")
+        self.capacity = capacity
+        self.half_lives = tuple(half_lives)
+        self.hours = 0  # 누적 반영 시간 수
+
+        dim = _N_COUNTS + _N_RISK
+        self._buffer = np.zeros((capacity, dim), dtype=np.int64)
+        self._sums = {name: np.zeros(dim, dtype=np.int64) for name in WINDOWS}
+        self._decay = np.exp(-np.log(2) / np.asarray(self.half_lives, dtype=np.float64))[:, None]
+        self._ewm = np.zeros((len(self.half_lives), dim), dtype=np.float64)
+
+    def get_state(self):
+        state = {'capacity': self.capacity, 'half_lives': list(self.half_lives), 'hours': self.hours,
+                 'buffer': self._buffer, 'ewm': self._ewm}
+        state.update({f'sum.{name}': values for name, values in self._sums.items()})
+        return state
+
+    def set_state(self, state):
+        self.__init__(state['capacity'], state['half_lives'])
+        self.hours = state['hours']
+        self._buffer[:] = state['buffer']
+        self._ewm[:] = state['ewm']
+        for name in WINDOWS:
+            self._sums[name][:] = state[f'sum.{name}']
+
+    def push(self, signals):
+        """1시간 시그널 반영"""
+        row = np.concatenate([signals.counts.ravel(), signals.risk_counts])
+        for name, size in WINDOWS.items():
+            if self.hours >= size:
+                # 윈도우를 벗어나는 시간의 카운터 제거 (덮어쓰기 전에 읽음)
+                self._sums[name] -= self._buffer[(self.hours - size) % self.capacity]
+            self._sums[name] += row
+        self._buffer[self.hours % self.capacity] = row
+        self._ewm *= self._decay
+        self._ewm += row
+        self.hours += 1
+
+    def signals(self, window='1d'):
+        """윈도우 합계 기준 SectorSignals"""
+        return self._to_signals(self._sums[window])
+
+    def decayed(self, half_life):
+        """지수 감쇠 합계 기준 SectorSignals"""
+        return self._to_signals(self._ewm[self.half_lives.index(half_life)])
+
+    def window_hours(self, window='1d'):
+        """윈도우에 실제로 포함된 시간 수"""
+        return min(self.hours, WINDOWS[window])
+
+    def type_counts(self, window='1d'):
+        """행동 유형별 건수 (BEHAVIOR_TYPES 순서)"""
+        return self._sums[window][:_N_COUNTS].reshape(COUNTS_SHAPE).sum(axis=1)
+
+    def risk_counts(self, window='1d'):
+        """위험 성향별 건수 (RISK_PROFILES 순서)"""
+        return self._sums[window][_N_COUNTS:]
+
+    def recent_counts(self, hours):
+        """최근 hours 시간의 카운터 (시간순, shape: (hours, 유형, 세부 코드))"""
+        hours = min(hours, self.hours, self.capacity)
+        idx = np.arange(self.hours - hours, self.hours) % self.capacity
+        return self._buffer[idx, :_N_COUNTS].reshape((hours,) + COUNTS_SHAPE)
+
+    def sector_score_history(self, hours):
+        """최근 hours 시간의 OA 섹터 점수 시계열 (시간순, shape: (hours, SECTORS))"""
+        return oa_scores_from_counts(self.recent_counts(hours))
+
+    def _to_signals(self, row):
+        return SectorSignals(row[:_N_COUNTS].reshape(COUNTS_SHAPE), row[_N_COUNTS:])
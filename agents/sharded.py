@@ -0,0 +1,166 @@
+import multiprocessing as mp
+import os
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+from agents import behavior_schema as schema
+from agents.csa import CrowdSimulatorAgent
+from agents.personas import PersonaStore
+from agents.signals import COUNTS_SHAPE, SectorSignals
+
+# 샤드별 공유 메모리 행: (유형 x 세부 코드) 카운터 + 위험 성향별 건수
+_N_COUNTS = COUNTS_SHAPE[0] * COUNTS_SHAPE[1]
+_ROW = _N_COUNTS + len(schema.RISK_PROFILES)
+# 난수 스트림 단위 페르소나 블록 크기 (샤드 수와 무관하게 고정)
+DEFAULT_BLOCK_SIZE = 50_000
+
+
+def _shard_worker(conn, shm_name, n_shards, row, blocks, risk_probs, risk_effects):
+    """샤드 프로세스: 맡은 블록의 페르소나를 직접 생성하고, 시간마다 받은 심리로 행동을 생성해 카운터만 기록
+
+    blocks: [(페르소나 수, user_id 시작 번호, SeedSequence)] 블록별로 독립된 CSA를 둡니다.
+    """
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        out = np.ndarray((n_shards, _ROW), dtype=np.int64, buffer=shm.buf)[row]
+        agents = []
+        for size, id_offset, seed_seq in blocks:
+            persona_seq, behavior_seq = seed_seq.spawn(2)
+            personas = PersonaStore.generate(size, persona_seq, risk_probs=risk_probs, id_offset=id_offset)
+            agents.append(CrowdSimulatorAgent(personas=personas, seed=behavior_seq, risk_effects=risk_effects))
+        conn.send(True) # 준비 완료
+
+        while True:
+            sentiment = conn.recv()
+            if sentiment is None:
+                break
+            out[:] = 0
+            total = 0
+            for csa in agents:
+                csa.global_sentiment = sentiment
+                signals = csa.generate_hourly_signals()
+                out[:_N_COUNTS] += signals.counts.ravel()
+                out[_N_COUNTS:] += signals.risk_counts
+                total += signals.total
+            conn.send(total)
+        del out
+    finally:
+        shm.close()
+        conn.close()
+
+
+class ShardedCrowdSimulator:
+    """페르소나를 여러 프로세스(샤드)에 나누어 실행하는 CSA
+
+    페르소나를 block_size명 단위 블록으로 나누고 블록마다 SeedSequence.spawn으로 독립된
+    난수 스트림을 쓰며, 샤드는 연속된 블록을 맡습니다. 블록 구성이 샤드 수와 무관하므로
+    seed가 같으면 샤드 수가 달라도 합산 결과가 같습니다. 매 시간 global_sentiment를 모든 샤드에 전달하고, 각 샤드는
+    행동 로그 대신 (유형 x 세부 코드) 카운터와 위험 성향별 건수만 공유 메모리에 기록합니다.
+    CrowdSimulatorAgent와 같은 update_sentiment / generate_hourly_signals / last_behaviors를
+    제공하므로 OrchestratorAgent.step_hours에 그대로 사용할 수 있습니다.
+    """
+
+    def __init__(self, num_personas, n_shards=None, seed=None, risk_probs=None, risk_effects=False, context='spawn',
+                 block_size=DEFAULT_BLOCK_SIZE):
+        self.num_personas = num_personas
+        starts = np.arange(0, num_personas, block_size)
+        seeds = np.random.SeedSequence(seed).spawn(len(starts))
+        blocks = [(int(min(block_size, num_personas - lo)), int(lo), seq) for lo, seq in zip(starts, seeds)]
+        self.n_shards = max(1, min(n_shards or os.cpu_count(), len(blocks)))
+        self.global_sentiment = 0.0 # -1.0(비관) ~ 1.0(낙관)
+        self.last_batch = None # 행동 로그는 샤드 밖으로 넘기지 않음
+
+        bounds = np.linspace(0, len(blocks), self.n_shards + 1).astype(np.int64)
+        self._shm = shared_memory.SharedMemory(create=True, size=self.n_shards * _ROW * 8)
+        self._rows = np.ndarray((self.n_shards, _ROW), dtype=np.int64, buffer=self._shm.buf)
+        self._rows[:] = 0
+
+        ctx = mp.get_context(context)
+        self._conns = []
+        self._procs = []
+        for i in range(self.n_shards):
+            parent, child = ctx.Pipe()
+            proc = ctx.Process(
+                target=_shard_worker,
+                args=(child, self._shm.name, self.n_shards, i, blocks[bounds[i]:bounds[i + 1]], risk_probs,
+                      risk_effects),
+                daemon=True,
+            )
+            proc.start()
+            child.close()
+            self._conns.append(parent)
+            self._procs.append(proc)
+        for conn in self._conns:
+            conn.recv()
+
+    def update_sentiment(self, risk_sentiment):
+        """Debater 피드백에 따라 시장 심리 업데이트 (CrowdSimulatorAgent와 같은 smoothing)"""
+        self.global_sentiment = self.global_sentiment * 0.7 + risk_sentiment * 0.3
+
+    def generate_hourly_signals(self):
+        """모든 샤드에서 1시간 행동을 생성하고 합산한 SectorSignals 반환"""
+        for conn in self._conns:
+            conn.send(self.global_sentiment)
+        for conn in self._conns:
+            conn.recv()
+        row = self._rows.sum(axis=0)
+        return SectorSignals(row[:_N_COUNTS].reshape(COUNTS_SHAPE), row[_N_COUNTS:])
+
+    def last_behaviors(self, current_time):
+        """샤드는 행동 로그를 넘기지 않으므로 빈 로그 DataFrame"""
+        return pd.DataFrame(columns=schema.COLUMNS)
+
+    def close(self):
+        if self._shm is None:
+            return
+        for conn in self._conns:
+            try:
+                conn.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+        for proc in self._procs:
+            proc.join(timeout=5)
+            if proc.is_alive():
+                proc.terminate()
+        for conn in self._conns:
+            conn.close()
+        del self._rows
+        self._shm.close()
+        self._shm.unlink()
+        self._shm = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __del__(self):
+        try:
+            self.close()
+        except Exception:
+            pass
+
+
+if __name__ == "__main__":
+    import time
+
+    # 샤드 수에 따른 처리량 비교 (페르소나 수 고정)
+    n, hours = 4_000_000, 24
+    cores = os.cpu_count()
+    print(f"페르소나 {n:,}명, {hours}시간, CPU {cores}개")
+    shard_counts = sorted({1, 2, 4, cores} & set(range(1, cores + 1)))
+    base = None
+    for n_shards in shard_counts:
+        with ShardedCrowdSimulator(n, n_shards=n_shards, seed=0) as sim:
+            sim.generate_hourly_signals() # 워밍업
+            t0 = time.perf_counter()
+            total = 0
+            for _ in range(hours):
+                sim.update_sentiment(-0.2)
+                total += sim.generate_hourly_signals().total
+            elapsed = time.perf_counter() - t0
+        base = base or elapsed
+        print(f"  샤드 {n_shards:2d}개: {elapsed:6.2f}s, {total / elapsed / 1e6:6.2f}M 행동/s, 가속 {base / elapsed:4.1f}x")
@@ -0,0 +1,84 @@
+import numpy as np
+
+from agents import behavior_schema as schema
+
+# 행동 로그 섹터(schema.SECTORS) + 카드 결제 기반 플랫폼 섹터
+SECTORS = schema.SECTORS + ('플랫폼',)
+PLATFORM = SECTORS.index('플랫폼')
+CONSUMER = SECTORS.index('소비재')
+
+# 행동 카운터 레이아웃: 유형(BEHAVIOR_TYPES) x 세부 코드
+#   Bank: ACTIONS 중 은행 행동, Card: CARD_CATEGORIES,
+#   Securities: 섹터 * 2 + (매도 여부), Life: ACTIONS 중 보험 행동
+N_SUBCODES = len(schema.SECTORS) * 2
+COUNTS_SHAPE = (len(schema.BEHAVIOR_TYPES), N_SUBCODES)
+
+
+def behavior_counts(batch):
+    """행동 배치를 (유형 x 세부 코드) 카운터로 집계 (bincount 1회)"""
+    types = batch['type'].astype(np.intp)
+    # 유형별 세부 코드 (마스크 인덱싱 대신 np.where로 한 번에 선택)
+    action_start = np.where(types == schema.TYPE_BANK, schema.BANK_ACTION_START, schema.LIFE_ACTION_START)
+    sub = np.where(types == schema.TYPE_SECURITIES, batch['sector'] * 2 + (batch['side'] == schema.SIDE_SELL),
+                   np.where(types == schema.TYPE_CARD, batch['category'], batch['action'] - action_start))
+
+    key = types * N_SUBCODES + sub
+    valid = (types >= 0) & (sub >= 0)
+    counts = np.bincount(key[valid], minlength=COUNTS_SHAPE[0] * N_SUBCODES)
+    return counts.reshape(COUNTS_SHAPE)
+
+
+def oa_scores_from_counts(counts):
+    """카운터((..., 유형, 세부 코드))에서 OA 섹터 점수((..., SECTORS)) 산출 (카운터에 대해 선형)"""
+    counts = np.asarray(counts)
+    securities = counts[..., schema.TYPE_SECURITIES, :].reshape(counts.shape[:-2] + (-1, 2))
+    cards = counts[..., schema.TYPE_CARD, :]
+
+    scores = np.zeros(counts.shape[:-2] + (len(SECTORS),), dtype=np.float64)
+    scores[..., :PLATFORM] = 2.0 * securities[..., 0] - securities[..., 1]
+    scores[..., PLATFORM] += cards[..., schema.CATEGORY_DELIVERY]
+    scores[..., CONSUMER] += cards[..., schema.CATEGORY_SHOPPING]
+    return scores
+
+
+class SectorSignals:
+    """1시간 행동 데이터에서 추출한 섹터/거시 시그널 (OA·DA 공용)
+
+    oa_scores: OA 점수 (증권 매수 +2 / 매도 -1, 온라인배달 -> 플랫폼, 쇼핑 -> 소비재 +1)
+    da_scores: DA 점수 (증권 매수 +1, 온라인배달 -> 플랫폼 +1)
+    """
+
+    def __init__(self, counts, risk_counts=None):
+        self.counts = counts
+        self.total = int(counts.sum())
+        # 위험 성향별 행동 건수 (RISK_PROFILES 순서)
+        self.risk_counts = risk_counts if risk_counts is not None else np.zeros(len(schema.RISK_PROFILES), dtype=np.int64)
+
+        securities = counts[schema.TYPE_SECURITIES].reshape(-1, 2)
+        buys = securities[:, 0]
+        cards = counts[schema.TYPE_CARD]
+
+        self.oa_scores = oa_scores_from_counts(counts)
+
+        self.da_scores = np.zeros(len(SECTORS), dtype=np.int64)
+        self.da_scores[:PLATFORM] = buys
+        self.da_scores[PLATFORM] = cards[schema.CATEGORY_DELIVERY]
+
+        self.bank_withdrawals = int(counts[schema.TYPE_BANK, schema.ACTION_WITHDRAW - schema.BANK_ACTION_START])
+        self.life_incidents = int(counts[schema.TYPE_LIFE, schema.ACTION_ACCIDENT - schema.LIFE_ACTION_START])
+
+    @classmethod
+    def from_batch(cls, batch):
+        risk_counts = None
+        if 'risk_profile' in batch:
+            risk = batch['risk_profile']
+            risk_counts = np.bincount(risk[risk >= 0], minlength=len(schema.RISK_PROFILES))
+        return cls(behavior_counts(batch), risk_counts)
+
+    @classmethod
+    def from_frame(cls, behaviors):
+        return cls.from_batch(schema.frame_to_batch(behaviors))
+
+    def oa_signals(self):
+        """OA 섹터 점수 dict"""
+        return dict(zip(SECTORS, self.oa_scores))
@@ -1,136 +1,220 @@
+import os
+
 import streamlit as st
 import pandas as pd
-import numpy as np
 import plotly.express as px
-import plotly.graph_objects as go
-from datetime import datetime, timedelta
-import time
 
-from agents.csa import CrowdSimulatorAgent
-from agents.oa import OrchestratorAgent
-from agents.da import DebaterAgent
-from engine.stock_api import StockEngine
+import checkpoint
+from agents import behavior_schema
+from agents.behavior_store import BehaviorStore, new_store_path
+from engine.instrumentation import metrics
+from simulation_service import SimulationService
 
 # 페이지 설정
 st.set_page_config(page_title="Shinhan Active ETF S-MAES", layout="wide")
 
-# 세션 상태 초기화
+# 화면 갱신(touch)이 이 시간 동안 없으면 서비스 스레드 종료 (브라우저 탭을 닫은 세션)
+# 백그라운드 탭의 타이머가 분 단위로 늦춰져도 끊기지 않도록 넉넉하게 설정
+SESSION_LEASE = 300.0
+
+# 세션 상태 초기화: 에이전트는 백그라운드 시뮬레이션 서비스가 소유
 if 'initialized' not in st.session_state:
-    st.session_state.stock_engine = StockEngine()
-    st.session_state.csa = CrowdSimulatorAgent()
-    st.session_state.oa = OrchestratorAgent(st.session_state.stock_engine, st.session_state.csa)
-    st.session_state.da = DebaterAgent()
-    st.session_state.all_behaviors = pd.DataFrame()
-    st.session_state.performance_history = pd.DataFrame(columns=['Time', 'Return'])
-    st.session_state.last_feedback = None # 최근 DA의 피드백 데이터
+    st.session_state.service = SimulationService(lease=SESSION_LEASE)
+    st.session_state.service.start()
     st.session_state.initialized = True
 
-# 사이드바: 컨트롤 인터페이스
+service = st.session_state.service
+if not service.is_alive():
+    # 유휴 종료된 서비스는 같은 상태에서 다시 시작
+    service = st.session_state.service = service.restart()
+service.touch()
+
+# 사이드바: 컨트롤 인터페이스 (서비스에 요청만 전달하고 바로 반환)
 st.sidebar.title("🎮 제어 센터")
-st.sidebar.markdown(f"**현재 가상 시간:** {st.session_state.oa.current_sim_time.strftime('%Y-%m-%d %H:%M')}")
-
-def run_simulation(steps=1):
-    for _ in range(steps):
-        # 1. 이전 피드백을 CSA/OA에 반영
-        if st.session_state.last_feedback:
-            # CSA 시장 심리 업데이트
-            st.session_state.csa.update_sentiment(st.session_state.last_feedback['risk_sentiment'])
-            # OA 포트폴리오 최적화에 DA 제안 전달 (이미 step_hour 내부에서 반영되도록 수정됨)
-
-        # 2. 시뮬레이션 한 스텝 진행 (DA 제안 포함)
-        behaviors = st.session_state.oa.step_hour(extra_signals=st.session_state.last_feedback)
-        
-        if not behaviors.empty:
-            st.session_state.all_behaviors = pd.concat([st.session_state.all_behaviors, behaviors]).tail(1000)
-        
-        # 가상 수익률 시뮬레이션 (간단하게 랜덤+시그널 기반)
-        last_return = st.session_state.performance_history['Return'].iloc[-1] if not st.session_state.performance_history.empty else 0.0
-        new_return = last_return + (np.random.normal(0.001, 0.005))
-        new_row = pd.DataFrame({'Time': [st.session_state.oa.current_sim_time], 'Return': [new_return]})
-        st.session_state.performance_history = pd.concat([st.session_state.performance_history, new_row])
-        
-        # 3. 새로운 피드백 생성 및 저장
-        critique, feedback_data = st.session_state.da.analyze_strategy(
-            st.session_state.oa.current_sim_time, 
-            st.session_state.oa.etf_portfolio, 
-            behaviors
-        )
-        st.session_state.last_feedback = feedback_data
 
 col1, col2, col3 = st.sidebar.columns(3)
 if col1.button("1H"):
-    run_simulation(1)
+    service.advance(1)
 if col2.button("1D"):
-    run_simulation(24)
+    service.advance(24)
 if col3.button("1M"):
-    run_simulation(24 * 30)
+    service.advance(24 * 30)
 
 auto_run = st.sidebar.toggle("실시간 자동 업데이트")
-if auto_run:
-    run_simulation(1)
-    time.sleep(1)
-    st.rerun()
-
-# 메인 화면
-st.title("🏦 Shinhan Active ETF Real-time Intelligence")
-st.markdown("---")
-
-# 상단 지표
-m1, m2, m3 = st.columns(3)
-m1.metric("총 운용 자산 (AUM)", "₩ 1.2T", "+1.2%")
-curr_return = st.session_state.performance_history['Return'].iloc[-1] if not st.session_state.performance_history.empty else 0.0
-m2.metric("현재 수익률", f"{curr_return:.2%}", f"{(curr_return*100):.2f}%")
-m3.metric("가상 고객 수", f"{st.session_state.csa.num_personas}명", "Active")
-
-# 중간 실시간 차트
-c1, c2 = st.columns([2, 1])
-
-with c1:
-    st.subheader("📈 ETF 누적 수익률 추이")
-    if not st.session_state.performance_history.empty:
-        fig = px.line(st.session_state.performance_history, x='Time', y='Return', template="plotly_dark")
-        st.plotly_chart(fig, use_container_width=True)
+rate = st.sidebar.select_slider("자동 진행 속도 (가상 시간/초)", options=[1, 2, 6, 24, 72], value=1)
+service.set_rate(rate)
+service.set_auto(auto_run)
+
+# 체크포인트: 현재 상태 저장 / 저장된 상태로 서비스 교체
+st.sidebar.markdown("---")
+st.sidebar.subheader("💾 체크포인트")
+if st.sidebar.button("현재 상태 저장"):
+    # 결과(경로 또는 예외)는 다음 대시보드 갱신에서 표시
+    st.session_state.checkpoint_future = service.save_checkpoint()
+saved = checkpoint.list_checkpoints()
+if saved:
+    labels = {path: f"{meta['sim_time'][:16].replace('T', ' ')} · {meta['hours']}시간 ({os.path.basename(path)})"
+              for path, meta in saved}
+    selected = st.sidebar.selectbox("저장된 상태", list(labels), format_func=labels.get)
+    if st.sidebar.button("불러오기"):
+        # 이전 서비스는 남은 요청을 마치고 종료되므로 분기 실행은 새 행동 로그 저장소에 기록
+        service.stop()
+        service = SimulationService.from_checkpoint(selected, behavior_store=BehaviorStore(new_store_path()),
+                                                    lease=SESSION_LEASE)
+        service.start()
+        st.session_state.service = service
+        st.rerun()
+
+# 성능 계측 (기본 꺼짐, 켜면 다음 스텝부터 단계별 시간/행 수/캐시 적중 기록)
+profiling = st.sidebar.toggle("성능 계측", value=metrics.enabled, key='profiling')
+trace_memory = st.sidebar.toggle("메모리 할당 추적 (느려짐)", value=metrics.trace_memory, key='trace_memory',
+                                 disabled=not profiling)
+metrics.configure(enabled=profiling, trace_memory=profiling and trace_memory)
+
+# 진행 중이거나 저장 결과를 기다리는 동안만 대시보드 영역을 주기적으로 다시 그림
+pending_save = st.session_state.get('checkpoint_future')
+polling = service.active() or (pending_save is not None and not pending_save.done())
+
+
+def show_checkpoint_result():
+    """요청한 체크포인트 저장의 진행/결과 표시 (완료 결과는 한 번만 표시)"""
+    future = st.session_state.get('checkpoint_future')
+    if future is None:
+        return
+    if not future.done():
+        st.info("체크포인트 저장 중 (진행 중인 요청이 끝난 뒤 저장)")
+        return
+    del st.session_state.checkpoint_future
+    error = future.exception()
+    if error is not None:
+        st.error(f"체크포인트 저장 실패: {type(error).__name__}: {error}")
     else:
-        st.info("시뮬레이션을 시작해주세요.")
-
-with c2:
-    st.subheader("🍩 현재 ETF 구성비")
-    portfolio = st.session_state.oa.etf_portfolio
-    if portfolio:
-        df_p = pd.DataFrame(list(portfolio.items()), columns=['종목', '비중'])
-        fig = px.pie(df_p, values='비중', names='종목', hole=0.4, template="plotly_dark")
-        st.plotly_chart(fig, use_container_width=True)
-    else:
-        st.info("포트폴리오 데이터가 없습니다.")
+        st.success(f"체크포인트 저장 완료: {future.result()}")
 
-# 하단 분석 리포트
-st.markdown("---")
-b1, b2 = st.columns(2)
 
-with b1:
-    st.subheader("🔍 Orchestrator's Analysis")
-    if not st.session_state.all_behaviors.empty:
-        st.write("최근 고객 행동 로그 (Top 10)")
-        st.dataframe(st.session_state.all_behaviors.sort_values('timestamp', ascending=False).head(10), use_container_width=True)
-    else:
-        st.write("대기 중...")
-        
-    # CSA 지시사항 반영 기록 창 추가
+@st.fragment(run_every=1.0 if polling else None)
+def dashboard():
+    service.touch()
+    snap = service.snapshot()
+
+    # 메인 화면
+    st.title("🏦 Shinhan Active ETF Real-time Intelligence")
+    status = f"진행 중 (남은 {snap.pending_hours}시간)" if snap.pending_hours else ("자동 진행 중" if snap.auto else "대기")
+    st.caption(f"현재 가상 시간: {snap.sim_time.strftime('%Y-%m-%d %H:%M')} · {status}")
+    if snap.error:
+        st.error(snap.error)
+    show_checkpoint_result()
     st.markdown("---")
-    st.subheader("🤖 CSA Instruction Log")
-    if st.session_state.last_feedback and st.session_state.last_feedback['csa_instructions']:
-        for inst in st.session_state.last_feedback['csa_instructions']:
-            st.success(f"📌 {inst}")
-    else:
-        st.write("반영된 지시사항이 없습니다.")
 
-with b2:
-    st.subheader("⚖️ Debater's Critique")
-    if st.session_state.da.critiques:
-        latest_critique = st.session_state.da.critiques[-1]
-        st.info(latest_critique)
-    else:
-        st.write("전략 분석 중...")
+    # 상단 지표
+    m1, m2, m3 = st.columns(3)
+    m1.metric("총 운용 자산 (AUM)", "₩ 1.2T", "+1.2%")
+    m2.metric("현재 수익률", f"{snap.cumulative_return:.2%}", f"MDD {snap.max_drawdown:.2%}")
+    m3.metric("가상 고객 수", f"{snap.num_personas}명", "Active")
+
+    # 중간 실시간 차트
+    c1, c2 = st.columns([2, 1])
+
+    with c1:
+        st.subheader("📈 ETF 누적 수익률 추이")
+        if len(snap.performance):
+            fig = px.line(snap.performance, x='Time', y='Return', template="plotly_dark")
+            st.plotly_chart(fig, use_container_width=True)
+        else:
+            st.info("시뮬레이션을 시작해주세요.")
+
+    with c2:
+        st.subheader("🍩 현재 ETF 구성비")
+        if snap.portfolio:
+            # 유니버스 전체 중 편입 종목만 표시
+            df_p = pd.DataFrame([(name, w) for name, w in snap.portfolio.items() if w > 0], columns=['종목', '비중'])
+            fig = px.pie(df_p, values='비중', names='종목', hole=0.4, template="plotly_dark")
+            st.plotly_chart(fig, use_container_width=True)
+        else:
+            st.info("포트폴리오 데이터가 없습니다.")
+
+    # 유저 행동 지표 히트맵 (누적 링 버퍼 기준)
+    h1, h2 = st.columns([2, 1])
+
+    with h1:
+        st.subheader("🔥 고객 행동 히트맵 (최근 24시간)")
+        if len(snap.heatmap_times):
+            fig = px.imshow(
+                snap.heatmap,
+                x=snap.heatmap_times.strftime('%m-%d %H시'),
+                y=list(behavior_schema.BEHAVIOR_TYPES),
+                aspect='auto',
+                color_continuous_scale='Blues',
+                template="plotly_dark"
+            )
+            st.plotly_chart(fig, use_container_width=True)
+        else:
+            st.info("시뮬레이션을 시작해주세요.")
+
+    with h2:
+        st.subheader("🏆 Best Active ETF (일간/월간)")
+        if snap.best_daily:
+            best = pd.DataFrame({'일간': snap.best_daily, '월간': snap.best_monthly})
+            st.dataframe(best.style.format('{:.1%}'), use_container_width=True)
+        else:
+            st.write("누적 시그널 대기 중...")
+
+    # 하단 분석 리포트
+    st.markdown("---")
+    b1, b2 = st.columns(2)
+
+    with b1:
+        st.subheader("🔍 Orchestrator's Analysis")
+        recent = snap.recent_behaviors
+        if not recent.empty:
+            st.write(f"최근 고객 행동 로그 (Top 10 / 누적 {snap.rows_written:,}건)")
+            # detail 문자열은 표시되는 행에 대해서만 생성
+            recent = recent.assign(detail=behavior_schema.render_detail(recent))
+            st.dataframe(recent[['timestamp', 'user_id', 'type', 'detail', 'amount', 'risk_profile']], use_container_width=True)
+        else:
+            st.write("대기 중...")
+
+        # CSA 지시사항 반영 기록 창 추가
+        st.markdown("---")
+        st.subheader("🤖 CSA Instruction Log")
+        if snap.csa_instructions:
+            for inst in snap.csa_instructions:
+                st.success(f"📌 {inst}")
+        else:
+            st.write("반영된 지시사항이 없습니다.")
+
+    with b2:
+        st.subheader("⚖️ Debater's Critique")
+        if snap.critique:
+            st.info(snap.critique)
+        else:
+            st.write("전략 분석 중...")
+
+    # 단계별 계측 결과 (계측을 켠 경우에만 표시)
+    if snap.metrics is not None:
+        with st.expander("⏱️ 파이프라인 계측"):
+            stages = pd.DataFrame.from_dict(snap.metrics['stages'], orient='index')
+            if len(stages):
+                columns = ['count', 'mean_ms', 'p50_ms', 'p95_ms', 'max_ms', 'rows', 'peak_kib']
+                st.dataframe(stages[columns].sort_values('mean_ms', ascending=False).style.format(
+                    {c: '{:.3f}' for c in ['mean_ms', 'p50_ms', 'p95_ms', 'max_ms']} | {'rows': '{:,}', 'peak_kib': '{:,.1f}'}
+                ), use_container_width=True)
+            else:
+                st.write("다음 스텝부터 기록됩니다.")
+            for name, rate in snap.metrics['hit_rates'].items():
+                st.caption(f"{name} 적중률: {rate:.1%}" if rate is not None else f"{name} 적중률: -")
+            d1, d2, d3 = st.columns(3)
+            d1.download_button("JSON", metrics.to_json(), file_name="smaes_metrics.json", mime="application/json")
+            d2.download_button("Prometheus", metrics.to_prometheus(), file_name="smaes_metrics.prom", mime="text/plain")
+            if d3.button("초기화"):
+                metrics.reset()
+
+    # 진행이 끝나면 전체 화면을 한 번 다시 실행해 폴링 중지
+    if polling and not service.active():
+        st.rerun()
+
+
+dashboard()
 
 # CSS 포인트 컬러 적용
 st.markdown("""
@@ -0,0 +1,61 @@
+"""시뮬레이션 주요 경로 벤치마크 (asv 스타일: setup + time_* 메서드, params별 실행)
+
+시세는 네트워크/디스크 없이 SyntheticBackend로 생성합니다.
+"""
+from agents.csa import CrowdSimulatorAgent
+from agents.da import DebaterAgent
+from agents.oa import OrchestratorAgent
+from engine.optimizer import ConstrainedOptimizer
+from engine.price_backend import SyntheticBackend
+from engine.stock_api import StockEngine
+
+PERSONAS = [500, 10_000, 100_000]
+_TIME = "2024-05-23 09:00"
+
+
+def make_agents(num_personas, seed=0):
+    """오프라인 시세 스텁으로 CSA/OA/DA 구성"""
+    csa = CrowdSimulatorAgent(num_personas, seed=seed)
+    oa = OrchestratorAgent(StockEngine(backend=SyntheticBackend()), csa, optimizer=ConstrainedOptimizer())
+    return csa, oa, DebaterAgent()
+
+
+class HourlyPipeline:
+    """1시간 단위 CSA -> OA -> DA 단계별 시간"""
+
+    params = PERSONAS
+    param_names = ['personas']
+
+    def setup(self, num_personas):
+        self.csa, self.oa, self.da = make_agents(num_personas)
+        self.behaviors = self.csa.generate_hourly_behavior(_TIME)
+        self.signals = self.oa._analyze_behaviors(self.behaviors)
+        self.oa._optimize_portfolio(self.signals)
+
+    def time_generate_hourly_batch(self, num_personas):
+        self.csa.generate_hourly_batch()
+
+    def time_generate_hourly_behavior(self, num_personas):
+        self.csa.generate_hourly_behavior(_TIME)
+
+    def time_analyze_behaviors(self, num_personas):
+        self.oa._analyze_behaviors(self.behaviors)
+
+    def time_optimize_portfolio(self, num_personas):
+        self.oa._optimize_portfolio(self.signals)
+
+    def time_analyze_strategy(self, num_personas):
+        self.da.analyze_strategy(_TIME, self.oa.etf_portfolio, self.behaviors)
+
+
+class StepLoop:
+    """step_hours 전체 루프 (1일 = 24시간, DA 피드백 포함)"""
+
+    params = PERSONAS
+    param_names = ['personas']
+
+    def setup(self, num_personas):
+        self.csa, self.oa, self.da = make_agents(num_personas)
+
+    def time_step_hours_1d(self, num_personas):
+        self.oa.step_hours(24, debater=self.da)
@@ -0,0 +1,127 @@
+import contextlib
+import importlib
+import inspect
+import io
+import json
+import platform
+import subprocess
+import time
+from datetime import datetime
+
+import numpy as np
+
+DEFAULT_MODULES = ('benchmarks.bench_simulation',)
+
+
+def discover(modules=DEFAULT_MODULES, pattern=None):
+    """(이름, 클래스, 메서드명) 목록 (time_으로 시작하는 메서드, pattern은 이름 부분 문자열)"""
+    found = []
+    for module_name in modules:
+        module = importlib.import_module(module_name)
+        for cls_name, cls in inspect.getmembers(module, inspect.isclass):
+            if cls.__module__ != module.__name__:
+                continue
+            for method in sorted(name for name in vars(cls) if name.startswith('time_')):
+                name = f"{cls_name}.{method}"
+                if pattern is None or pattern in name:
+                    found.append((name, cls, method))
+    return found
+
+
+def measure(func, repeat=7, min_time=0.2):
+    """호출 1회당 소요 시간 측정 (샘플 1개가 min_time 이상이 되도록 반복 횟수 자동 결정)
+
+    반환: median/min/q25/q75 (샘플 간 사분위 범위로 잡음 정도를 함께 기록)
+    """
+    number = 1
+    while True:
+        t0 = time.perf_counter()
+        for _ in range(number):
+            func()
+        elapsed = time.perf_counter() - t0
+        if elapsed >= min_time or number >= 1000:
+            break
+        number *= 10 if elapsed < min_time / 10 else 2
+    samples = [elapsed / number]
+    for _ in range(repeat - 1):
+        t0 = time.perf_counter()
+        for _ in range(number):
+            func()
+        samples.append((time.perf_counter() - t0) / number)
+    samples = np.array(samples)
+    q25, q75 = np.quantile(samples, [0.25, 0.75])
+    return {'median': float(np.median(samples)), 'min': float(samples.min()), 'q25': float(q25), 'q75': float(q75),
+            'number': number, 'repeat': repeat}
+
+
+def run_suite(pattern=None, params=None, repeat=7, modules=DEFAULT_MODULES, log=print):
+    """벤치마크 실행 결과 {이름: {파라미터: 측정값}} (params로 파라미터 제한 가능)"""
+    by_class = {}
+    for name, cls, method in discover(modules, pattern):
+        by_class.setdefault(cls, []).append((name, method))
+
+    results = {}
+    for cls, methods in by_class.items():
+        for param in cls.params:
+            if params is not None and param not in params:
+                continue
+            # setup은 클래스/파라미터마다 한 번만 수행하고 time_ 메서드끼리 공유
+            instance = cls()
+            with contextlib.redirect_stdout(io.StringIO()):
+                instance.setup(param)
+            for name, method in methods:
+                bench = getattr(instance, method)
+                with contextlib.redirect_stdout(io.StringIO()):
+                    stats = measure(lambda: bench(param), repeat)
+                results.setdefault(name, {})[str(param)] = stats
+                if log:
+                    log(f"{name} [{param}] {stats['median'] * 1000:10.3f} ms")
+    return results
+
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def save(path, results):
+    """실행 환경 정보와 함께 JSON 저장"""
+    document = {
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'commit': _git_commit(),
+        'machine': {
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'processor': platform.processor(),
+        },
+        'results': results,
+    }
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(document, f, ensure_ascii=False, indent=2)
+
+
+def load(path):
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)['results']
+
+
+def compare(results, baseline, threshold=1.5):
+    """기준 결과 대비 threshold배 이상 느려진 항목 [(이름, 파라미터, 기준, 현재, 배율)]
+
+    잡음에 덜 민감한 최솟값끼리 비교하고, 사분위 범위가 기록된 경우 현재 하위 사분위가
+    기준 상위 사분위보다 클 때(분포가 겹치지 않을 때)만 회귀로 판단합니다.
+    """
+    regressions = []
+    for name, by_param in results.items():
+        for param, stats in by_param.items():
+            base = baseline.get(name, {}).get(param)
+            if base is None:
+                continue
+            ratio = stats['min'] / base['min']
+            separated = 'q75' not in base or 'q25' not in stats or stats['q25'] > base['q75']
+            if ratio >= threshold and separated:
+                regressions.append((name, param, base['min'], stats['min'], ratio))
+    return regressions
@@ -0,0 +1,206 @@
+"""시뮬레이션 전체 상태 체크포인트 저장/복원
+
+<path>/meta.json       버전, 가상 시각, 난수 생성기 상태, 스칼라 상태, DA 비평, 최근 피드백
+<path>/state.npz       배열 상태 (누적 시그널 링 버퍼, 비중 이력 행렬, 성과 배열 등)
+<path>/personas/*.npy  페르소나 컬럼 (PersonaStore.save)
+
+복원 후 같은 입력으로 진행하면 원래 실행과 비트 단위로 같은 결과가 나오므로
+저장 시점에서 여러 갈래로 분기 실행할 수 있습니다.
+"""
+import json
+import os
+import shutil
+import uuid
+from collections import namedtuple
+from datetime import datetime
+
+import numpy as np
+
+from agents.behavior_store import BehaviorStore
+from agents.csa import CrowdSimulatorAgent
+from agents.da import DebaterAgent
+from agents.oa import OrchestratorAgent
+from agents.personas import PersonaStore
+from engine.lag import LagModel
+from engine.optimizer import ConstrainedOptimizer
+from engine.performance import PerformanceTracker
+from engine.stock_api import StockEngine
+from engine.universe import Universe
+
+CHECKPOINT_VERSION = 1
+DEFAULT_CHECKPOINT_DIR = os.path.join(os.path.expanduser('~'), '.cache', 's-maes', 'checkpoints')
+
+# 복원 결과
+Checkpoint = namedtuple('Checkpoint', ['oa', 'da', 'performance', 'feedback', 'meta'])
+
+
+def new_checkpoint_path(root=None):
+    """저장 경로 (기본값: 환경변수 SMAES_CHECKPOINT_DIR 또는 ~/.cache/s-maes/checkpoints 아래 저장 시각)"""
+    root = root or os.environ.get('SMAES_CHECKPOINT_DIR', DEFAULT_CHECKPOINT_DIR)
+    return os.path.join(root, datetime.now().strftime('%Y%m%d-%H%M%S-') + uuid.uuid4().hex[:6])
+
+
+def _split(states):
+    """{구성요소: 상태 dict}를 (npz 배열 dict, JSON 상태 dict)로 분리"""
+    arrays, scalars = {}, {}
+    for component, state in states.items():
+        scalars[component] = {}
+        for key, value in state.items():
+            if isinstance(value, np.ndarray):
+                arrays[f'{component}/{key}'] = value
+            else:
+                scalars[component][key] = value
+    return arrays, scalars
+
+
+def _merge(arrays, scalars):
+    states = {component: dict(state) for component, state in scalars.items()}
+    for name in arrays.files:
+        component, key = name.split('/', 1)
+        states[component][key] = arrays[name]
+    return states
+
+
+def _json_default(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"JSON으로 저장할 수 없는 값입니다: {type(value).__name__}")
+
+
+def save(path, oa, da, performance, feedback=None):
+    """에이전트/성과 상태 저장 (임시 디렉터리에 쓴 뒤 교체하므로 중간 상태가 남지 않음)"""
+    csa = oa.csa_agent
+    if not hasattr(csa, 'get_state'):
+        raise TypeError(f"{type(csa).__name__}는 체크포인트를 지원하지 않습니다.")
+
+    states = {
+        'csa': csa.get_state(),
+        'oa': oa.get_state(),
+        'history': oa.history.get_state(),
+        'signals': oa.signal_state.get_state(),
+        'da': da.get_state(),
+        'performance': performance.get_state(),
+    }
+    if oa.lag_model is not None:
+        states['lag'] = oa.lag_model.get_state()
+    arrays, scalars = _split(states)
+
+    store = oa.behavior_store
+    if store is not None:
+        store.flush() # 저장 시점까지의 행동 로그를 디스크에 기록
+    meta = {
+        'version': CHECKPOINT_VERSION,
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'sim_time': oa.current_sim_time.isoformat(),
+        'hours': len(oa.history),
+        'num_personas': csa.num_personas,
+        'optimizer': oa.optimizer.get_state() if oa.optimizer is not None else None,
+        'universe': oa.universe.get_state(),
+        'behavior_store': {'root': store.root, 'rows_written': store.rows_written} if store is not None else None,
+        'feedback': feedback,
+        'state': scalars,
+    }
+
+    tmp = f'{path}.tmp-{uuid.uuid4().hex[:6]}'
+    os.makedirs(tmp)
+    try:
+        csa.personas.save(os.path.join(tmp, 'personas'))
+        np.savez(os.path.join(tmp, 'state.npz'), **arrays)
+        with open(os.path.join(tmp, 'meta.json'), 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False, default=_json_default)
+        if os.path.exists(path):
+            shutil.rmtree(path)
+        os.replace(tmp, path)
+    except BaseException:
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise
+    return path
+
+
+def read_meta(path):
+    with open(os.path.join(path, 'meta.json'), encoding='utf-8') as f:
+        return json.load(f)
+
+
+def load(path, stock_engine=None):
+    """저장된 상태로 OA(CSA 포함)/DA/성과 추적기 복원
+
+    stock_engine: 시세 조회 엔진 (기본값: 저장 시점 유니버스의 StockEngine), 종목 구성이 저장 시점과 같아야 합니다.
+    행동 로그 저장소는 저장 시점의 경로를 다시 열어 이어서 기록합니다
+    (분기 실행 시에는 oa.behavior_store를 새 저장소로 교체하세요).
+    """
+    meta = read_meta(path)
+    if meta['version'] != CHECKPOINT_VERSION:
+        raise ValueError(f"지원하지 않는 체크포인트 버전입니다: {meta['version']}")
+    with np.load(os.path.join(path, 'state.npz')) as arrays:
+        states = _merge(arrays, meta['state'])
+
+    csa = CrowdSimulatorAgent(personas=PersonaStore.load(os.path.join(path, 'personas'), mmap=False))
+    csa.set_state(states['csa'])
+
+    store = None
+    if meta['behavior_store'] is not None:
+        store = BehaviorStore(meta['behavior_store']['root'])
+        store.rows_written = meta['behavior_store']['rows_written']
+    optimizer = ConstrainedOptimizer(**meta['optimizer']) if meta['optimizer'] is not None else None
+
+    if stock_engine is None:
+        stock_engine = StockEngine(universe=Universe.from_state(meta['universe']))
+    oa = OrchestratorAgent(stock_engine, csa, optimizer=optimizer, behavior_store=store)
+    if oa.history.tickers != states['history']['tickers']:
+        raise ValueError("StockEngine 종목 구성이 체크포인트와 다릅니다.")
+    oa.set_state(states['oa'])
+    oa.history.set_state(states['history'])
+    oa.signal_state.set_state(states['signals'])
+    if 'lag' in states:
+        oa.lag_model = LagModel.from_state(states['lag'])
+
+    da = DebaterAgent(universe=oa.universe)
+    da.set_state(states['da'])
+    performance = PerformanceTracker()
+    performance.set_state(states['performance'])
+    return Checkpoint(oa, da, performance, meta['feedback'], meta)
+
+
+def list_checkpoints(root=None):
+    """저장된 체크포인트 [(경로, 메타)] (최근 저장 순)"""
+    root = root or os.environ.get('SMAES_CHECKPOINT_DIR', DEFAULT_CHECKPOINT_DIR)
+    if not os.path.isdir(root):
+        return []
+    found = []
+    for name in os.listdir(root):
+        path = os.path.join(root, name)
+        if os.path.isfile(os.path.join(path, 'meta.json')):
+            found.append((path, read_meta(path)))
+    return sorted(found, key=lambda item: item[1]['created'], reverse=True)
+
+
+if __name__ == "__main__":
+    import tempfile
+    import time
+
+    from engine.price_backend import SyntheticBackend
+    from simulation_service import advance
+
+    # 1개월 진행 후 저장 -> 복원, 원본과 복원본을 각각 48시간 더 진행해 비교
+    engine = StockEngine(backend=SyntheticBackend())
+    oa = OrchestratorAgent(engine, CrowdSimulatorAgent(10_000, seed=0), optimizer=ConstrainedOptimizer())
+    da, performance = DebaterAgent(), PerformanceTracker()
+    feedback = advance(oa, da, performance, 24 * 30)[0]['feedback']
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'month')
+        t0 = time.perf_counter()
+        save(path, oa, da, performance, feedback)
+        saved = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        restored = load(path, stock_engine=engine)
+        loaded = time.perf_counter() - t0
+        size = sum(os.path.getsize(os.path.join(d, f)) for d, _, files in os.walk(path) for f in files)
+        print(f"저장 {saved * 1000:.1f}ms, 복원 {loaded * 1000:.1f}ms, {size / 2**20:.2f}MiB ({restored.meta['hours']}시간)")
+
+    advance(oa, da, performance, 48, feedback)
+    advance(restored.oa, restored.da, restored.performance, 48, restored.feedback)
+    print("NAV 일치:", np.array_equal(performance['nav'], restored.performance['nav']))
+    print("비중 이력 일치:", np.array_equal(oa.history.weights, restored.oa.history.weights))
+    print("비평 일치:", da.latest_critique() == restored.da.latest_critique())
@@ -0,0 +1,174 @@
+"""S-MAES 헤드리스 실행기
+
+    python cli.py run --hours 720 --personas 10000 --seed 0 --output result.json
+    python cli.py run --hours 168 --profile --prometheus metrics.prom
+    python cli.py run --hours 720 --seed 0 --checkpoint month && python cli.py run --resume month --hours 24
+    python cli.py bench --personas 500,10000 --output bench.json --baseline baseline.json
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+
+import checkpoint
+from agents.behavior_store import BehaviorStore
+from agents.csa import CrowdSimulatorAgent
+from agents.da import DebaterAgent
+from agents.oa import OrchestratorAgent
+from engine.instrumentation import metrics
+from engine.optimizer import ConstrainedOptimizer
+from engine.performance import PerformanceTracker
+from engine.price_backend import SyntheticBackend, make_backend
+from engine.stock_api import StockEngine
+from simulation_service import advance
+
+
+def _int_list(text):
+    return [int(x) for x in text.split(',') if x]
+
+
+def simulate(hours, personas=500, seed=None, shards=0, prices='synthetic', store=None, optimizer='constrained',
+             chunk_hours=24 * 30, resume=None, checkpoint_path=None):
+    """hours 시간 시뮬레이션 후 요약 dict 반환 (Streamlit 없이 CSA -> OA -> DA 루프 실행)
+
+    resume: 이어서 진행할 체크포인트 경로 (personas/seed/shards/optimizer는 체크포인트 설정 사용)
+    checkpoint_path: 진행 후 상태를 저장할 경로
+    """
+    backend = SyntheticBackend() if prices == 'synthetic' else make_backend()
+    stock_engine = StockEngine(backend=backend)
+    feedback = None
+    if resume:
+        restored = checkpoint.load(resume, stock_engine)
+        oa, da, performance, feedback = restored.oa, restored.da, restored.performance, restored.feedback
+        if store:
+            oa.behavior_store = BehaviorStore(store)
+        csa, personas, seed, shards = oa.csa_agent, oa.csa_agent.num_personas, None, 0
+    else:
+        if shards:
+            from agents.sharded import ShardedCrowdSimulator
+            csa = ShardedCrowdSimulator(personas, n_shards=shards, seed=seed)
+        else:
+            csa = CrowdSimulatorAgent(personas, seed=seed)
+        oa = OrchestratorAgent(
+            stock_engine, csa,
+            optimizer=ConstrainedOptimizer() if optimizer == 'constrained' else None,
+            behavior_store=BehaviorStore(store) if store else None,
+        )
+        da = DebaterAgent(render_text=False)
+        performance = PerformanceTracker()
+
+    behaviors = 0
+    t0 = time.perf_counter()
+    try:
+        for start in range(0, hours, chunk_hours):
+            result, _ = advance(oa, da, performance, min(chunk_hours, hours - start), feedback)
+            feedback = result['feedback']
+            behaviors += int(result['behaviors_count'].sum())
+        if oa.behavior_store is not None:
+            oa.behavior_store.flush()
+        if checkpoint_path:
+            checkpoint.save(checkpoint_path, oa, da, performance, feedback)
+    finally:
+        if shards:
+            csa.close()
+    elapsed = time.perf_counter() - t0
+
+    return {
+        'hours': hours,
+        'personas': personas,
+        'seed': seed,
+        'shards': csa.n_shards if shards else 0, # 블록 수보다 많이 요청하면 블록 수로 제한
+        'elapsed_sec': elapsed,
+        'hours_per_sec': hours / elapsed if elapsed > 0 else None,
+        'behaviors': behaviors,
+        'end_time': oa.current_sim_time.isoformat(),
+        'cumulative_return': float(performance.cumulative_return()),
+        'max_drawdown': float(performance.max_drawdown()),
+        'portfolio': oa.etf_portfolio,
+        'risk_sentiment': feedback['risk_sentiment'] if feedback else 0.0,
+        'checkpoint': checkpoint_path,
+    }
+
+
+def cmd_run(args):
+    if args.profile:
+        metrics.configure(enabled=True, trace_memory=args.profile == 'memory')
+    # 진행 로그는 stderr로 (stdout은 요약 JSON만)
+    logging.basicConfig(level=logging.WARNING if args.quiet else logging.INFO, format='%(message)s')
+    summary = simulate(args.hours, args.personas, args.seed, args.shards, args.prices, args.store, args.optimizer,
+                       resume=args.resume, checkpoint_path=args.checkpoint)
+    if args.profile:
+        summary['metrics'] = metrics.to_dict()
+    if args.prometheus:
+        with open(args.prometheus, 'w', encoding='utf-8') as f:
+            f.write(metrics.to_prometheus())
+    text = json.dumps(summary, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text)
+    print(text)
+    return 0
+
+
+def cmd_bench(args):
+    from benchmarks import runner
+
+    results = runner.run_suite(args.pattern, args.personas, args.repeat)
+    if args.output:
+        runner.save(args.output, results)
+    if not args.baseline:
+        return 0
+    if not os.path.exists(args.baseline):
+        # 첫 실행: 이 머신의 기준 결과로 저장 (측정값은 머신마다 달라 저장소에는 포함하지 않음)
+        runner.save(args.baseline, results)
+        print(f"기준 결과가 없어 {args.baseline}에 이번 결과를 저장했습니다. 다음 실행부터 비교합니다.")
+        return 0
+
+    regressions = runner.compare(results, runner.load(args.baseline), args.threshold)
+    for name, param, base, current, ratio in regressions:
+        print(f"REGRESSION {name} [{param}]: {base * 1000:.3f} ms -> {current * 1000:.3f} ms ({ratio:.2f}x)")
+    if regressions:
+        return 1
+    print(f"기준 대비 {args.threshold:.2f}배 이상 느려진 항목 없음")
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="S-MAES 헤드리스 실행기")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    run = sub.add_parser('run', help="N시간 시뮬레이션 실행 후 JSON 요약 출력")
+    run.add_argument('--hours', type=int, default=24)
+    run.add_argument('--personas', type=int, default=500)
+    run.add_argument('--seed', type=int, default=None)
+    run.add_argument('--shards', type=int, default=0, help="0이면 단일 프로세스, N이면 N개 프로세스로 분할")
+    run.add_argument('--prices', choices=['synthetic', 'cached'], default='synthetic',
+                     help="synthetic: 오프라인 가상 시세, cached: 기본 시세 백엔드 (SMAES_* 환경변수)")
+    run.add_argument('--store', default=None, help="행동 로그 저장 경로 (지정 시 BehaviorStore에 기록)")
+    run.add_argument('--optimizer', choices=['constrained', 'legacy'], default='constrained')
+    run.add_argument('--resume', default=None, help="이어서 진행할 체크포인트 경로")
+    run.add_argument('--checkpoint', default=None, help="진행 후 상태를 저장할 체크포인트 경로")
+    run.add_argument('--output', default=None, help="요약 JSON 저장 경로")
+    run.add_argument('--quiet', action='store_true', help="진행 로그 숨김")
+    run.add_argument('--profile', nargs='?', const='time', choices=['time', 'memory'], default=None,
+                     help="단계별 계측 결과를 요약에 포함 (memory: tracemalloc 할당 추적 포함)")
+    run.add_argument('--prometheus', default=None, help="계측 결과를 Prometheus 텍스트 형식으로 저장할 경로")
+    run.set_defaults(func=cmd_run)
+
+    bench = sub.add_parser('bench', help="벤치마크 실행 및 기준 결과 비교")
+    bench.add_argument('--pattern', default=None, help="벤치마크 이름 필터 (부분 문자열)")
+    bench.add_argument('--personas', type=_int_list, default=None, help="페르소나 수 목록 (예: 500,10000)")
+    bench.add_argument('--repeat', type=int, default=7)
+    bench.add_argument('--output', default=None, help="결과 JSON 저장 경로")
+    bench.add_argument('--baseline', default=None, help="비교할 기준 결과 JSON (없으면 이번 결과를 기준으로 저장)")
+    bench.add_argument('--threshold', type=float, default=1.5, help="회귀로 판단할 최솟값 배율 (사분위 범위가 겹치면 제외)")
+    bench.set_defaults(func=cmd_bench)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,237 @@
+import bisect
+import json
+import os
+import threading
+import time
+import tracemalloc
+
+import numpy as np
+
+# 단계 소요 시간 히스토그램 구간 상한 (초, Prometheus 기본 구간을 0.1ms까지 확장)
+TIME_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram:
+    """고정 구간 히스토그램 (마지막 칸은 +Inf)"""
+
+    def __init__(self, buckets=TIME_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        if value > self.max:
+            self.max = value
+
+    def quantile(self, q):
+        """구간 내 선형 보간으로 근사한 분위수 (+Inf 구간은 최댓값 사용)"""
+        if self.count == 0:
+            return 0.0
+        target = q * self.count
+        cumulative = np.cumsum(self.counts)
+        i = int(np.searchsorted(cumulative, target))
+        if i >= len(self.buckets):
+            return self.max
+        lo = self.buckets[i - 1] if i > 0 else 0.0
+        before = cumulative[i - 1] if i > 0 else 0
+        inside = self.counts[i]
+        return min(lo + (self.buckets[i] - lo) * (target - before) / inside, self.max) if inside else lo
+
+
+class _StageStats:
+    def __init__(self):
+        self.seconds = Histogram()
+        self.rows = 0
+        self.peak_bytes = 0 # tracemalloc 추적 시 단계 중 최대 추가 메모리
+
+
+class _Stage:
+    """계측 중인 단계 (with 블록 안에서 rows에 생성 행 수를 기록)"""
+
+    __slots__ = ('owner', 'name', 'rows', '_start', '_mem')
+
+    def __init__(self, owner, name, rows):
+        self.owner = owner
+        self.name = name
+        self.rows = rows
+
+    def __enter__(self):
+        # 진입 시점의 추적 여부를 보관 (단계 도중 configure로 바뀌어도 종료 시 같은 기준 사용)
+        self._mem = None
+        if self.owner.trace_memory:
+            self._mem = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self._start
+        peak = 0
+        if self._mem is not None and tracemalloc.is_tracing():
+            peak = max(tracemalloc.get_traced_memory()[1] - self._mem, 0)
+        self.owner._record(self.name, elapsed, self.rows, peak)
+        return False
+
+
+class _NullStage:
+    """계측 비활성화 시 공유하는 빈 단계 (rows 대입은 무시)"""
+
+    __slots__ = ('rows',)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+class Instrumentation:
+    """단계별 소요 시간/생성 행 수/메모리/캐시 적중 계측 (기본 비활성화)
+
+    with metrics.stage('csa.generate') as s: ... s.rows = n 형태로 사용하며,
+    비활성화 상태에서는 공유 빈 컨텍스트만 반환하므로 추가 비용이 거의 없습니다.
+    trace_memory를 켜면 tracemalloc으로 단계 중 최대 추가 메모리를 기록합니다
+    (중첩 단계에서는 바깥 단계의 값이 근사치가 됩니다).
+    """
+
+    def __init__(self, enabled=False, trace_memory=False):
+        self.enabled = enabled
+        self.trace_memory = False
+        self._lock = threading.Lock()
+        self._stages = {}
+        self._counters = {}
+        if trace_memory:
+            self.configure(trace_memory=True)
+
+    def configure(self, enabled=None, trace_memory=None):
+        if enabled is not None:
+            self.enabled = enabled
+        if trace_memory is not None:
+            if trace_memory and not tracemalloc.is_tracing():
+                tracemalloc.start()
+            elif not trace_memory and self.trace_memory and tracemalloc.is_tracing():
+                tracemalloc.stop()
+            self.trace_memory = trace_memory
+
+    def stage(self, name, rows=0):
+        if not self.enabled:
+            return _NULL_STAGE
+        return _Stage(self, name, rows)
+
+    def count(self, name, n=1):
+        """이벤트 카운터 증가 (예: price_cache.hit / price_cache.miss)"""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + n
+
+    def _record(self, name, seconds, rows, peak):
+        with self._lock:
+            stats = self._stages.get(name)
+            if stats is None:
+                stats = self._stages[name] = _StageStats()
+            stats.seconds.observe(seconds)
+            stats.rows += rows or 0
+            if peak > stats.peak_bytes:
+                stats.peak_bytes = peak
+
+    def reset(self):
+        with self._lock:
+            self._stages = {}
+            self._counters = {}
+
+    def hit_rate(self, prefix):
+        """'<prefix>.hit' / ('<prefix>.hit' + '<prefix>.miss')"""
+        hits = self._counters.get(f'{prefix}.hit', 0)
+        total = hits + self._counters.get(f'{prefix}.miss', 0)
+        return hits / total if total else None
+
+    def to_dict(self):
+        """단계별 요약과 카운터 (JSON 직렬화 가능)"""
+        with self._lock:
+            stages = {
+                name: {
+                    'count': s.seconds.count,
+                    'total_sec': s.seconds.sum,
+                    'mean_ms': s.seconds.sum / s.seconds.count * 1000 if s.seconds.count else 0.0,
+                    'p50_ms': s.seconds.quantile(0.5) * 1000,
+                    'p95_ms': s.seconds.quantile(0.95) * 1000,
+                    'max_ms': s.seconds.max * 1000,
+                    'rows': s.rows,
+                    'peak_kib': s.peak_bytes / 1024,
+                    'buckets': dict(zip([str(b) for b in s.seconds.buckets] + ['+Inf'], s.seconds.counts)),
+                }
+                for name, s in self._stages.items()
+            }
+            counters = dict(self._counters)
+        prefixes = {name.rsplit('.', 1)[0] for name in counters if name.endswith(('.hit', '.miss'))}
+        return {
+            'enabled': self.enabled,
+            'trace_memory': self.trace_memory,
+            'stages': stages,
+            'counters': counters,
+            'hit_rates': {prefix: self.hit_rate(prefix) for prefix in sorted(prefixes)},
+        }
+
+    def to_json(self, indent=2):
+        return json.dumps(self.to_dict(), ensure_ascii=False, indent=indent)
+
+    def to_prometheus(self, prefix='smaes'):
+        """Prometheus 텍스트 노출 형식"""
+        with self._lock:
+            stages = [(name, s.seconds.buckets, list(s.seconds.counts), s.seconds.sum, s.seconds.count, s.rows, s.peak_bytes)
+                      for name, s in sorted(self._stages.items())]
+            counters = sorted(self._counters.items())
+
+        lines = [f'# HELP {prefix}_stage_seconds Pipeline stage wall time per call',
+                 f'# TYPE {prefix}_stage_seconds histogram']
+        for name, buckets, counts, total, count, _, _ in stages:
+            cumulative = np.cumsum(counts)
+            for upper, c in zip(list(buckets) + ['+Inf'], cumulative):
+                lines.append(f'{prefix}_stage_seconds_bucket{{stage="{name}",le="{upper}"}} {c}')
+            lines.append(f'{prefix}_stage_seconds_sum{{stage="{name}"}} {total}')
+            lines.append(f'{prefix}_stage_seconds_count{{stage="{name}"}} {count}')
+
+        lines += [f'# HELP {prefix}_stage_rows_total Rows produced by stage',
+                  f'# TYPE {prefix}_stage_rows_total counter']
+        lines += [f'{prefix}_stage_rows_total{{stage="{name}"}} {rows}' for name, *_, rows, _ in stages]
+
+        lines += [f'# HELP {prefix}_stage_peak_bytes Peak traced allocation above stage start',
+                  f'# TYPE {prefix}_stage_peak_bytes gauge']
+        lines += [f'{prefix}_stage_peak_bytes{{stage="{name}"}} {peak}' for name, *_, peak in stages]
+
+        lines += [f'# HELP {prefix}_events_total Event counters (cache hits/misses)',
+                  f'# TYPE {prefix}_events_total counter']
+        lines += [f'{prefix}_events_total{{name="{name}"}} {n}' for name, n in counters]
+        return '\n'.join(lines) + '\n'
+
+
+# 프로세스 공용 계측기 (환경변수 SMAES_PROFILE=1이면 시작 시 활성화)
+metrics = Instrumentation(enabled=os.environ.get('SMAES_PROFILE', '').lower() in ('1', 'true', 'yes'))
+
+
+if __name__ == "__main__":
+    # 비활성화 상태의 단계 진입 비용 측정
+    idle = Instrumentation()
+    n = 1_000_000
+    t0 = time.perf_counter()
+    for _ in range(n):
+        with idle.stage('noop') as s:
+            s.rows = 1
+    print(f"비활성화 단계 1회: {(time.perf_counter() - t0) / n * 1e9:.0f}ns")
+
+    active = Instrumentation(enabled=True, trace_memory=True)
+    for i in range(200):
+        with active.stage('alloc') as s:
+            s.rows = len(np.ones(1000 * (i % 10 + 1)))
+        active.count('cache.hit' if i % 4 else 'cache.miss')
+    print(json.dumps(active.to_dict()['stages']['alloc'], indent=2)[:400])
+    print(active.to_prometheus().splitlines()[-3:])
@@ -0,0 +1,105 @@
+import numpy as np
+
+
+def _standardize(x):
+    """열별 표준화 (NaN은 0, 분산이 0인 열은 전부 0)"""
+    x = np.nan_to_num(np.asarray(x, dtype=np.float64), nan=0.0)
+    x = x - x.mean(axis=0)
+    std = x.std(axis=0)
+    return np.divide(x, std, out=np.zeros_like(x), where=std > 0), std
+
+
+def cross_correlation(signals, returns, max_lag, chunk=64):
+    """섹터 시그널과 종목 수익률의 시차별 상관계수 (FFT 일괄 계산)
+
+    signals: (T, S) 시간별 섹터 시그널, returns: (T, N) 같은 시각 기준 종목 수익률
+    반환: (max_lag + 1, S, N) 배열, [l, s, n] = corr(signals[t, s], returns[t + l, n])
+    메모리 사용을 제한하기 위해 종목 축은 chunk 단위로 나누어 계산합니다.
+    """
+    zs, _ = _standardize(signals)
+    zr, _ = _standardize(returns)
+    T, S = zs.shape
+    N = zr.shape[1]
+    max_lag = min(max_lag, T - 1)
+
+    n_fft = 1 << int(np.ceil(np.log2(2 * T)))
+    fs = np.conj(np.fft.rfft(zs, n=n_fft, axis=0))  # (F, S)
+    overlap = (T - np.arange(max_lag + 1)).astype(np.float64)[:, None, None]
+
+    corr = np.empty((max_lag + 1, S, N))
+    for lo in range(0, N, chunk):
+        fr = np.fft.rfft(zr[:, lo:lo + chunk], n=n_fft, axis=0)  # (F, n)
+        cross = np.fft.irfft(fs[:, :, None] * fr[:, None, :], n=n_fft, axis=0)[:max_lag + 1]
+        corr[:, :, lo:lo + chunk] = cross / overlap
+    return corr
+
+
+class LagModel:
+    """행동 시그널 -> 수익률 선행 관계(Time-Lag) 추정 모델
+
+    (섹터, 종목) 쌍마다 상관계수 절댓값이 가장 큰 시차와 그 상관계수를 고르고,
+    예측 시에는 각 쌍의 최적 시차만큼 이전의 표준화 시그널에 상관계수를 곱해 합산합니다.
+    """
+
+    def __init__(self, max_lag=48, min_corr=0.05):
+        self.max_lag = max_lag
+        self.min_corr = min_corr
+        self.best_lag = None   # (S, N)
+        self.best_corr = None  # (S, N)
+
+    def fit(self, signals, returns):
+        """signals[t]와 returns[t] (t 시점 이후 1시간 수익률)로 시차별 상관 추정"""
+        signals = np.asarray(signals, dtype=np.float64)
+        corr = cross_correlation(signals, returns, self.max_lag)
+        best = np.abs(corr).argmax(axis=0)
+        self.best_lag = best
+        self.best_corr = np.take_along_axis(corr, best[None], axis=0)[0]
+        # 최소 상관 및 유의 수준(약 3 / sqrt(T)) 미만은 선행 관계 없음으로 처리
+        threshold = max(self.min_corr, 3.0 / np.sqrt(len(signals)))
+        self.best_corr[np.abs(self.best_corr) < threshold] = 0.0
+        self._mean = signals.mean(axis=0)
+        self._std = signals.std(axis=0)
+        return self
+
+    def get_state(self):
+        return {'max_lag': self.max_lag, 'min_corr': self.min_corr, 'best_lag': self.best_lag,
+                'best_corr': self.best_corr, 'mean': self._mean, 'std': self._std}
+
+    @classmethod
+    def from_state(cls, state):
+        model = cls(state['max_lag'], state['min_corr'])
+        model.best_lag = state['best_lag']
+        model.best_corr = state['best_corr']
+        model._mean = state['mean']
+        model._std = state['std']
+        return model
+
+    def predict(self, signal_history):
+        """최근 시그널 이력(시간순 (H, S))으로 다음 1시간 종목별 선행 점수 (N,) 산출"""
+        history = np.asarray(signal_history, dtype=np.float64)
+        z = np.divide(history - self._mean, self._std, out=np.zeros_like(history), where=self._std > 0)
+        # 시차 l인 쌍은 l시간 전 시그널 사용 (이력이 부족하면 0)
+        idx = len(z) - 1 - self.best_lag
+        sectors = np.broadcast_to(np.arange(z.shape[1])[:, None], idx.shape)
+        lagged = np.where(idx >= 0, z[np.maximum(idx, 0), sectors], 0.0)
+        return (self.best_corr * lagged).sum(axis=0)
+
+
+if __name__ == "__main__":
+    import time
+
+    # 섹터 시그널이 종목 수익률을 일정 시차로 선행하는 가상 데이터로 검증
+    rng = np.random.default_rng(0)
+    T, S, N = 24 * 90, 7, 300
+    signals = rng.normal(size=(T, S))
+    true_lag = rng.integers(1, 24, N)
+    true_sector = rng.integers(0, S, N)
+    returns = rng.normal(size=(T, N))
+    for n in range(N):
+        returns[true_lag[n]:, n] += 0.5 * signals[:T - true_lag[n], true_sector[n]]
+
+    t0 = time.perf_counter()
+    model = LagModel(max_lag=48).fit(signals, returns)
+    elapsed = time.perf_counter() - t0
+    found = model.best_lag[true_sector, np.arange(N)] == true_lag
+    print(f"{T}시간 x {S}섹터 x {N}종목 x {model.max_lag + 1}시차: {elapsed:.2f}s, 시차 복원율 {found.mean():.0%}")
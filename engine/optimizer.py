@@ -0,0 +1,172 @@
+import warnings
+
+import numpy as np
+
+# 종목 수가 이 이하면 꺾이는 점 x 종목 행렬로 f를 직접 계산 (정렬/누적합 호출보다 빠름)
+DENSE_PROJECTION_MAX = 32
+
+
+def project_capped_simplex(v, upper, total=1.0):
+    """v를 {w : sum(w) = total, 0 <= w <= upper}에 유클리드 사영
+
+    f(tau) = sum(clip(v - tau, 0, upper))는 tau에 대해 단조 감소하는 구간별 선형 함수입니다.
+    꺾이는 점(v - upper, v)을 정렬하고 누적합으로 모든 꺾이는 점의 f 값을 O(n log n)에
+    계산한 뒤, total을 지나는 구간을 선형 보간해 tau를 구합니다.
+    종목 수가 DENSE_PROJECTION_MAX 이하면 (2n x n) 행렬로 f를 직접 계산합니다.
+    """
+    v = np.asarray(v, dtype=np.float64)
+    upper = np.broadcast_to(np.asarray(upper, dtype=np.float64), v.shape)
+    if total >= upper.sum():
+        return upper.copy()
+    if total <= 0:
+        return np.zeros_like(v)
+
+    lo = v - upper
+    breaks = np.concatenate([lo, v])
+    breaks.sort()
+    if len(v) <= DENSE_PROJECTION_MAX:
+        f = np.minimum(np.maximum(v - breaks[:, None], 0.0), upper).sum(axis=1)
+    else:
+        lo_order, hi_order = np.argsort(lo), np.argsort(v)
+        lo_sorted, hi_sorted = lo[lo_order], v[hi_order]
+        # 접미 누적합: 기준값 이상인 종목들의 upper / v 합
+        upper_suffix = np.concatenate([np.cumsum(upper[lo_order][::-1])[::-1], [0.0]])
+        v_lo_suffix = np.concatenate([np.cumsum(v[lo_order][::-1])[::-1], [0.0]])
+        v_hi_suffix = np.concatenate([np.cumsum(hi_sorted[::-1])[::-1], [0.0]])
+
+        a = np.searchsorted(lo_sorted, breaks, side='left')   # lo >= b 인 종목 시작 위치 (상한에 걸림)
+        h = np.searchsorted(hi_sorted, breaks, side='right')  # v > b 인 종목 시작 위치
+        # f(b) = sum(upper | lo >= b) + sum(v - b | lo < b < v)
+        f = upper_suffix[a] + (v_hi_suffix[h] - v_lo_suffix[a]) - breaks * ((len(v) - h) - (len(v) - a))
+
+    # f는 breaks 증가에 따라 감소: f[j] >= total >= f[j + 1]인 구간 탐색
+    j = np.searchsorted(-f, -total, side='right') - 1
+    j = min(max(j, 0), len(breaks) - 2)
+    span = f[j] - f[j + 1]
+    tau = breaks[j] if span <= 0 else breaks[j] + (f[j] - total) / span * (breaks[j + 1] - breaks[j])
+    return np.clip(v - tau, 0.0, upper)
+
+
+class ConstrainedOptimizer:
+    """종목 점수 벡터 기반 제약 포트폴리오 최적화
+
+    1. Selection: 점수 순으로 top_k 종목을 채우되 섹터별 편입 종목 수를 sector_cap * top_k개로 제한
+       (기존 편입 종목은 hold_margin x 종목 간 점수 표준편차만큼 가산해 도전 종목이 그 이상 앞설 때만 교체)
+    2. Target: 1/k 균등 비중 + score_scale * 점수
+    3. Turnover 페널티: min ||w - target||^2 + turnover_penalty * ||w - prev||^2
+    4. 제약: 합계 1, 0 <= w <= max_weight, 섹터 합계 <= sector_cap
+
+    제약을 지킬 수 없어 완화한 경우 RuntimeWarning을 내고 relaxed에 완화한 제약 이름을 기록합니다.
+    """
+
+    def __init__(self, max_weight=0.20, top_k=10, sector_cap=0.40, turnover_penalty=2.0, score_scale=0.01,
+                 hold_margin=4.0):
+        self.max_weight = max_weight
+        self.top_k = top_k
+        self.sector_cap = sector_cap
+        self.turnover_penalty = turnover_penalty
+        self.score_scale = score_scale
+        self.hold_margin = hold_margin
+        self.relaxed = () # 최근 optimize에서 완화한 제약 ('max_weight', 'sector_cap')
+
+    def get_state(self):
+        """생성 인자 (체크포인트용, ConstrainedOptimizer(**state)로 복원)"""
+        return {'max_weight': self.max_weight, 'top_k': self.top_k, 'sector_cap': self.sector_cap,
+                'turnover_penalty': self.turnover_penalty, 'score_scale': self.score_scale,
+                'hold_margin': self.hold_margin}
+
+    def optimize(self, scores, sector_idx, prev_weights=None):
+        """scores/sector_idx/prev_weights: 종목 순서의 (N,) 벡터 (미분류 섹터 -1)"""
+        scores = np.asarray(scores, dtype=np.float64)
+        sector_idx = np.asarray(sector_idx)
+        n = len(scores)
+        prev = np.zeros(n) if prev_weights is None else np.asarray(prev_weights, dtype=np.float64)
+        self.relaxed = ()
+
+        # 1. 섹터 상한 안에서 상위 top_k 종목 선정 (기존 편입 종목 가산)
+        k = n if self.top_k is None else min(self.top_k, n)
+        if n > 1:
+            # scores.std()와 같은 값 (시간마다 호출되므로 _methods 경유 오버헤드 없이 계산)
+            centered = scores - scores.sum() / n
+            hold_bonus = self.hold_margin * np.sqrt(centered @ centered / n)
+        else:
+            hold_bonus = 0.0
+        selected = self._select(scores + hold_bonus * (prev > 0), sector_idx, k)
+
+        # 2~3. 목표 비중과 직전 비중을 turnover 페널티로 혼합
+        target = 1.0 / k + self.score_scale * scores[selected]
+        gamma = self.turnover_penalty
+        target = (target + gamma * prev[selected]) / (1.0 + gamma)
+
+        # 4. 제약 사영 (종목 수가 부족하면 단일 종목 상한을 1/k까지 완화)
+        cap = self.max_weight
+        if cap * k < 1.0:
+            cap = 1.0 / k
+            self.relaxed += ('max_weight',)
+        w = self._project(target, sector_idx[selected], cap)
+
+        if self.relaxed:
+            warnings.warn(f"ConstrainedOptimizer: 제약을 지킬 수 없어 {', '.join(self.relaxed)}를 완화했습니다.",
+                          RuntimeWarning, stacklevel=2)
+
+        weights = np.zeros(n)
+        weights[selected] = w
+        return weights
+
+    def _select(self, key, sectors, k):
+        """key 내림차순으로 k개 선정 (섹터별 최대 floor(sector_cap * k)개, 미분류 종목은 제한 없음)
+
+        섹터 한도 때문에 k개를 채우지 못하면 한도를 넘는 종목 중 상위 종목으로 나머지를 채웁니다
+        (이 경우 섹터 상한은 _project에서 지킬 수 있는 만큼만 적용).
+        """
+        order = np.argsort(-key, kind='stable')
+        if self.sector_cap is None:
+            return order[:k]
+        slots = max(1, int(np.floor(self.sector_cap * k + 1e-9)))
+
+        # 섹터 내 순위 (stable 정렬이므로 같은 섹터 안에서는 key 순서 유지)
+        codes = sectors[order]
+        by_sector = np.argsort(codes, kind='stable')
+        sorted_codes = codes[by_sector]
+        rank = np.empty(len(order), dtype=np.intp)
+        rank[by_sector] = np.arange(len(order)) - np.searchsorted(sorted_codes, sorted_codes, side='left')
+        eligible = (codes < 0) | (rank < slots)
+        selected = order[eligible][:k]
+        if len(selected) < k:
+            selected = np.concatenate([selected, order[~eligible][:k - len(selected)]])
+        return selected
+
+    def _project(self, v, sectors, cap):
+        """합계 1 / 종목 상한 / 섹터 상한 제약 사영
+
+        섹터 상한을 넘는 섹터는 상한 합계로 고정하고, 나머지 종목에 남은 비중을
+        다시 배분하는 과정을 위반 섹터가 없을 때까지 반복합니다 (최대 섹터 수만큼).
+        섹터 상한을 모두 지킬 수 없는 구성이면 섹터 상한을 완화합니다 (relaxed에 기록).
+        """
+        upper = np.full(len(v), cap)
+        w = project_capped_simplex(v, upper)
+        if self.sector_cap is None:
+            return w
+
+        # 섹터 코드 +1 (0 = 미분류, 섹터 상한 없음)
+        groups = sectors + 1
+        n_groups = groups.max() + 1
+        group_capacity = np.bincount(groups, upper, n_groups)
+        group_capacity[1:] = np.minimum(group_capacity[1:], self.sector_cap)
+        if group_capacity.sum() < 1.0 - 1e-12:
+            self.relaxed += ('sector_cap',)
+            return w
+
+        fixed = np.zeros(n_groups, dtype=bool)
+        for _ in range(n_groups):
+            over = (np.bincount(groups, w, n_groups) > self.sector_cap + 1e-12) & ~fixed
+            over[0] = False
+            if not over.any():
+                break
+            for g in np.flatnonzero(over):
+                members = groups == g
+                w[members] = project_capped_simplex(v[members], upper[members], self.sector_cap)
+            fixed |= over
+            free = ~fixed[groups]
+            w[free] = project_capped_simplex(v[free], upper[free], 1.0 - self.sector_cap * fixed.sum())
+        return w
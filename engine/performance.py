@@ -0,0 +1,180 @@
+import numpy as np
+import pandas as pd
+
+
+def weights_matrix(history, tickers):
+    """OrchestratorAgent.history(agents.history.PortfolioHistory)를 (시각, tickers 순서 비중 행렬)로 변환
+
+    history에 없는 종목의 비중은 0입니다.
+    """
+    col = {t: j for j, t in enumerate(history.tickers)}
+    weights = np.zeros((len(history), len(tickers)), dtype=np.float64)
+    for j, t in enumerate(tickers):
+        if t in col:
+            weights[:, j] = history.weights[:, col[t]]
+    return history.times.copy(), weights
+
+
+def align_prices(prices, times, tickers, bar_length=None):
+    """가격 DataFrame(StockEngine.get_stock_data)을 시뮬레이션 시각에 맞춰 정렬
+
+    각 시각 직전(포함)의 마지막 가격을 사용하며(as-of), 이전 가격이 없으면 NaN입니다.
+    bar_length: 봉 길이 (Yahoo/yfinance처럼 봉 시작 시각으로 라벨된 경우 지정,
+    라벨을 봉 종료 시각으로 옮겨 각 시각에 이미 완료된 봉의 종가만 사용)
+    반환: (len(times), len(tickers)) 가격 행렬
+    """
+    times = np.asarray(times, dtype='datetime64[ns]')
+    prices = prices.reindex(columns=list(tickers)).sort_index()
+    # 종목별 직전 유효 가격을 채워 두고 시각별 위치를 한 번에 찾음
+    filled = prices.ffill().to_numpy(dtype=np.float64)
+    labels = prices.index.values.astype('datetime64[ns]')
+    if bar_length is not None:
+        labels = labels + np.timedelta64(pd.Timedelta(bar_length).value, 'ns')
+    idx = np.searchsorted(labels, times, side='right') - 1
+    aligned = np.full((len(times), len(prices.columns)), np.nan)
+    valid = idx >= 0
+    aligned[valid] = filled[idx[valid]]
+    return aligned
+
+
+class PerformanceEngine:
+    """비중 행렬 x 가격 행렬 기반 시가평가(mark-to-market) 성과 계산
+
+    weights[t]는 시각 t에 확정되어 (t, t+1] 구간 동안 보유하는 비중이며,
+    prices는 weights보다 한 시점 많은 (T+1, N) 가격 행렬입니다.
+    회전율은 직전 비중이 가격 변동으로 표류(drift)한 뒤의 비중 대비 변경분입니다.
+    가격이 하나도 갱신되지 않은 구간(장 마감, 시세 조회 실패)은 거래할 수 없으므로
+    목표 비중 대신 직전 표류 비중을 그대로 보유하고 회전율/비용을 0으로 둡니다.
+    """
+
+    def __init__(self, cost_bps=10.0):
+        self.cost_bps = cost_bps
+
+    def run(self, weights, prices, prev_drifted=None, nav0=1.0, peak0=None):
+        """전체 구간을 한 번에 계산 (prev_drifted/nav0/peak0로 이전 구간과 이어서 계산 가능)
+
+        반환: dict(asset_returns, held, gross, turnover, costs, net, nav, drawdown, drifted)
+        (held: 가격 미갱신 구간을 반영한 실제 보유 비중)
+        """
+        weights = np.asarray(weights, dtype=np.float64)
+        prices = np.asarray(prices, dtype=np.float64)
+        T, N = weights.shape
+        if prices.shape != (T + 1, N):
+            raise ValueError(f"prices는 ({T + 1}, {N}) 형태여야 합니다: {prices.shape}")
+
+        out = {name: np.empty(T) for name in ('gross', 'turnover', 'costs', 'net', 'nav', 'drawdown')}
+
+        # 종목 수익률 (가격이 없는 구간은 0)
+        asset_returns = np.divide(prices[1:], prices[:-1], out=np.ones((T, N)), where=prices[:-1] > 0) - 1.0
+        np.nan_to_num(asset_returns, copy=False, nan=0.0)
+
+        # 가격 미갱신 구간: 직전 갱신 구간의 표류 비중(없으면 prev_drifted)을 그대로 보유
+        stale = ~(asset_returns != 0.0).any(axis=1)
+        if stale.any():
+            held = weights.copy()
+            drifted = weights * (1.0 + asset_returns) / (1.0 + np.einsum('tn,tn->t', weights, asset_returns))[:, None]
+            last = np.maximum.accumulate(np.where(stale, -1, np.arange(T)))
+            start = np.zeros(N) if prev_drifted is None else np.asarray(prev_drifted, dtype=np.float64)
+            carried = np.concatenate([start[None], drifted])[last + 1]
+            held[stale] = carried[stale]
+            weights = held
+
+        np.einsum('tn,tn->t', weights, asset_returns, out=out['gross'])
+
+        # 보유 후 표류 비중: w * (1 + r) / (1 + g)
+        drifted = weights * (1.0 + asset_returns) / (1.0 + out['gross'])[:, None]
+        before = np.empty_like(weights)
+        before[0] = prev_drifted if prev_drifted is not None else 0.0
+        before[1:] = drifted[:-1]
+        np.abs(weights - before).sum(axis=1, out=out['turnover'])
+
+        np.multiply(out['turnover'], self.cost_bps / 10_000, out=out['costs'])
+        np.subtract(out['gross'], out['costs'], out=out['net'])
+        np.cumprod(1.0 + out['net'], out=out['nav'])
+        out['nav'] *= nav0
+
+        peak = np.maximum.accumulate(out['nav'])
+        if peak0 is not None:
+            np.maximum(peak, peak0, out=peak)
+        np.divide(out['nav'], peak, out=out['drawdown'])
+        out['drawdown'] -= 1.0
+
+        out['asset_returns'] = asset_returns
+        out['held'] = weights
+        out['drifted'] = drifted
+        return out
+
+
+class PerformanceTracker:
+    """구간별 성과 계산 결과를 미리 할당한 배열에 누적 (용량은 2배씩 확장)"""
+
+    _FIELDS = ('gross', 'turnover', 'costs', 'net', 'nav', 'drawdown')
+
+    def __init__(self, engine=None, capacity=24 * 30):
+        self.engine = engine if engine is not None else PerformanceEngine()
+        self.size = 0
+        self._times = np.empty(capacity, dtype='datetime64[ns]')
+        self._data = {name: np.empty(capacity) for name in self._FIELDS}
+        self._drifted = None
+        self._peak = 1.0 # 시작 NAV도 고점에 포함
+
+    def _reserve(self, n):
+        capacity = len(self._times)
+        if self.size + n <= capacity:
+            return
+        while capacity < self.size + n:
+            capacity *= 2
+        self._times = np.resize(self._times, capacity)
+        for name in self._FIELDS:
+            self._data[name] = np.resize(self._data[name], capacity)
+
+    def append(self, times, weights, prices):
+        """times: 각 보유 구간의 종료 시각 (T,), weights: (T, N), prices: (T+1, N)"""
+        n = len(weights)
+        if n == 0:
+            return
+        nav0 = self._data['nav'][self.size - 1] if self.size else 1.0
+        result = self.engine.run(weights, prices, self._drifted, nav0, self._peak)
+        self._drifted = result['drifted'][-1]
+        self._peak = max(result['nav'].max(), self._peak)
+
+        self._reserve(n)
+        self._times[self.size:self.size + n] = times
+        for name in self._FIELDS:
+            self._data[name][self.size:self.size + n] = result[name]
+        self.size += n
+
+    def get_state(self):
+        state = {'cost_bps': self.engine.cost_bps, 'size': self.size, 'peak': float(self._peak),
+                 'times': self.times, 'drifted': self._drifted}
+        state.update({name: self[name] for name in self._FIELDS})
+        return state
+
+    def set_state(self, state):
+        self.engine.cost_bps = state['cost_bps']
+        self.size = 0
+        self._times = np.empty(max(state['size'], 1), dtype='datetime64[ns]')
+        self._data = {name: np.empty(len(self._times)) for name in self._FIELDS}
+        self._times[:state['size']] = state['times']
+        for name in self._FIELDS:
+            self._data[name][:state['size']] = state[name]
+        self.size = state['size']
+        self._drifted = state['drifted']
+        self._peak = state['peak']
+
+    @property
+    def times(self):
+        return self._times[:self.size]
+
+    def __getitem__(self, name):
+        return self._data[name][:self.size]
+
+    def cumulative_return(self):
+        return self['nav'][-1] - 1.0 if self.size else 0.0
+
+    def max_drawdown(self):
+        return self['drawdown'].min() if self.size else 0.0
+
+    def frame(self):
+        """차트용 (Time, Return) DataFrame"""
+        return pd.DataFrame({'Time': self.times, 'Return': self['nav'] - 1.0})
@@ -0,0 +1,261 @@
+import os
+import re
+import tempfile
+import zlib
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from engine.instrumentation import metrics
+from engine.price_fetch import ChartHttpBackend, CircuitBreaker, RateLimiter, RetryingBackend
+
+# 봉 간격별 길이
+INTERVALS = {
+    '1m': timedelta(minutes=1), '5m': timedelta(minutes=5), '15m': timedelta(minutes=15),
+    '30m': timedelta(minutes=30), '1h': timedelta(hours=1), '1d': timedelta(days=1),
+}
+_PERIOD_UNITS = {'d': 1, 'wk': 7, 'mo': 30, 'y': 365}
+
+# KRX 정규장 (시간봉 기준 09:00 ~ 15:00 시작 봉)
+_MARKET_OPEN_HOUR, _MARKET_CLOSE_HOUR = 9, 15
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 's-maes', 'prices')
+
+
+def parse_period(period):
+    """yfinance 스타일 기간 문자열('1d', '5d', '1mo', '1y', '2wk')을 timedelta로 변환"""
+    match = re.fullmatch(r'(\d+)(d|wk|mo|y)', period)
+    if not match:
+        raise ValueError(f"지원하지 않는 기간 형식입니다: {period}")
+    return timedelta(days=int(match.group(1)) * _PERIOD_UNITS[match.group(2)])
+
+
+def resolve_range(period, interval, start=None, end=None):
+    """조회 구간 [start, end) 산출 (end는 봉 간격 단위로 내림해 캐시 키를 고정)"""
+    step = INTERVALS[interval]
+    if end is None:
+        end = datetime.now()
+    end = pd.Timestamp(end).floor(step).to_pydatetime()
+    if start is None:
+        start = end - parse_period(period)
+    return pd.Timestamp(start).to_pydatetime(), end
+
+
+def _to_ns(value):
+    return pd.Timestamp(value).as_unit('ns').value
+
+
+def _index_ns(index):
+    """DatetimeIndex를 int64 ns 배열로 변환 (pandas 해상도와 무관)"""
+    return np.asarray(index.values.astype('datetime64[ns]').view(np.int64))
+
+
+class YFinanceBackend:
+    """Yahoo Finance 원격 조회"""
+
+    name = 'yfinance'
+
+    def fetch(self, ticker, start, end, interval):
+        import yfinance as yf
+
+        hist = yf.Ticker(ticker).history(start=start, end=end, interval=interval)
+        if hist.empty:
+            return pd.Series(dtype=np.float64, index=pd.DatetimeIndex([]), name='Close')
+        close = hist['Close']
+        if close.index.tz is not None:
+            close.index = close.index.tz_convert('Asia/Seoul').tz_localize(None)
+        return close[(close.index >= start) & (close.index < end)]
+
+
+class SyntheticBackend:
+    """결정적(deterministic) 가상 시세 생성기 (오프라인/폐쇄망용)
+
+    각 봉의 가격은 종목과 시각만으로 결정되므로 조회 구간이 달라도 같은 시각에는
+    항상 같은 값을 반환합니다. 캐시의 빈 구간을 채워도 이어지는 시계열이 유지됩니다.
+    """
+
+    name = 'synthetic'
+
+    # 추세 성분 주기(일)
+    _PERIODS = np.array([3.0, 11.0, 47.0, 180.0])
+
+    def __init__(self, seed=0, noise=0.004):
+        self.seed = seed
+        self.noise = noise
+
+    def bar_times(self, start, end, interval):
+        """[start, end) 구간의 거래 시간 봉 시각 (평일, 일중 봉은 정규장만)"""
+        step = INTERVALS[interval]
+        first = pd.Timestamp(start).ceil(step)
+        times = pd.date_range(first, pd.Timestamp(end), freq=step, inclusive='left')
+        times = times[times.dayofweek < 5]
+        if step < INTERVALS['1d']:
+            times = times[(times.hour >= _MARKET_OPEN_HOUR) & (times.hour <= _MARKET_CLOSE_HOUR)]
+        return times
+
+    def fetch(self, ticker, start, end, interval):
+        times = self.bar_times(start, end, interval)
+        return pd.Series(self.prices(ticker, _index_ns(times)), index=times, name='Close')
+
+    def prices(self, ticker, ts_ns):
+        key = np.uint64(zlib.crc32(f'{self.seed}:{ticker}'.encode()))
+        params = np.random.default_rng(int(key)).random((3, len(self._PERIODS)))
+        base = 10_000 + 490_000 * params[0, 0]
+        amplitudes = 0.02 + 0.10 * params[1] * np.sqrt(self._PERIODS / self._PERIODS[-1])
+        phases = 2 * np.pi * params[2]
+
+        days = np.asarray(ts_ns, dtype=np.int64) / 86_400e9
+        trend = (amplitudes * np.sin(2 * np.pi * days[:, None] / self._PERIODS + phases)).sum(axis=1)
+        noise = self.noise * _hash_normal(np.asarray(ts_ns, dtype=np.int64).view(np.uint64) ^ key)
+        return np.round(base * np.exp(trend + noise), 0)
+
+
+def _hash_uniform(keys):
+    """splitmix64 해시 기반 [0, 1) 균등 난수 (키별로 결정적)"""
+    x = keys.astype(np.uint64) + np.uint64(0x9E3779B97F4A7C15)
+    x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    x = x ^ (x >> np.uint64(31))
+    return (x >> np.uint64(11)).astype(np.float64) * 2.0 ** -53
+
+
+def _hash_normal(keys):
+    """Box-Muller 변환으로 키별 결정적 표준정규 난수 생성"""
+    u1 = _hash_uniform(keys * np.uint64(2))
+    u2 = _hash_uniform(keys * np.uint64(2) + np.uint64(1))
+    return np.sqrt(-2.0 * np.log1p(-u1)) * np.cos(2 * np.pi * u2)
+
+
+class PriceCache:
+    """종목/봉 간격별 온디스크 컬럼형 시세 캐시 (무압축 NumPy .npz)
+
+    <root>/<interval>/<ticker>.npz 한 파일에 ts(int64 ns), close(float64),
+    ranges(이미 조회한 [start, end) 구간 목록)를 함께 저장합니다.
+    고유한 임시 파일에 쓴 뒤 한 번의 rename으로 교체하므로, 동시에 저장하거나
+    도중에 중단되어도 세 배열이 서로 다른 시점의 내용으로 섞이지 않습니다.
+    """
+
+    def __init__(self, root=DEFAULT_CACHE_DIR):
+        self.root = root
+
+    def _path(self, ticker, interval):
+        return os.path.join(self.root, interval, f'{ticker}.npz')
+
+    def load(self, ticker, interval):
+        """(ts, close, ranges) 반환, 캐시가 없으면 빈 배열"""
+        try:
+            with np.load(self._path(ticker, interval)) as data:
+                return data['ts'], data['close'], data['ranges']
+        except FileNotFoundError:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64), np.empty((0, 2), dtype=np.int64)
+
+    def store(self, ticker, interval, ts, close, ranges):
+        path = self._path(ticker, interval)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(prefix=f'.{ticker}.', suffix='.tmp', dir=os.path.dirname(path))
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                np.savez(f, ts=np.asarray(ts, dtype=np.int64), close=np.asarray(close, dtype=np.float64),
+                         ranges=np.asarray(ranges, dtype=np.int64).reshape(-1, 2))
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+
+def missing_ranges(ranges, start, end):
+    """이미 조회한 구간(ranges)을 제외한 [start, end)의 빈 구간 목록"""
+    gaps = []
+    cursor = start
+    for lo, hi in ranges[np.argsort(ranges[:, 0])] if len(ranges) else []:
+        if hi <= cursor:
+            continue
+        if lo >= end:
+            break
+        if lo > cursor:
+            gaps.append((cursor, lo))
+        cursor = max(cursor, hi)
+    if cursor < end:
+        gaps.append((cursor, end))
+    return gaps
+
+
+def merge_ranges(ranges):
+    """겹치거나 맞닿은 구간 병합"""
+    if len(ranges) == 0:
+        return np.empty((0, 2), dtype=np.int64)
+    ranges = ranges[np.argsort(ranges[:, 0])]
+    merged = [list(ranges[0])]
+    for lo, hi in ranges[1:]:
+        if lo <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], hi)
+        else:
+            merged.append([lo, hi])
+    return np.asarray(merged, dtype=np.int64)
+
+
+class CachedBackend:
+    """캐시 우선 조회 후 빈 구간만 upstream에서 가져오는 백엔드
+
+    persist=False이면 upstream 결과를 캐시에 기록하지 않습니다 (예: 오프라인
+    재생 시 캐시된 실데이터는 그대로 쓰고 빈 구간만 가상 시세로 채움).
+    봉 시각은 시작 시각 기준이므로 clock() 시점에 아직 형성 중인 봉(시작 시각이
+    현재 봉 간격 경계 이후)은 호출자에게만 반환하고 캐시/조회 완료 구간에는 넣지 않습니다.
+    """
+
+    def __init__(self, upstream, cache=None, persist=True, clock=datetime.now):
+        self.upstream = upstream
+        self.cache = cache if cache is not None else PriceCache()
+        self.persist = persist
+        self.clock = clock
+        self.name = f'cached:{upstream.name}'
+
+    def fetch(self, ticker, start, end, interval):
+        start_ns, end_ns = _to_ns(start), _to_ns(end)
+        ts, close, ranges = self.cache.load(ticker, interval)
+        gaps = missing_ranges(ranges, start_ns, end_ns)
+        metrics.count('price_cache.miss' if gaps else 'price_cache.hit')
+
+        if gaps:
+            fetched = [self.upstream.fetch(ticker, pd.Timestamp(lo).to_pydatetime(),
+                                           pd.Timestamp(hi).to_pydatetime(), interval) for lo, hi in gaps]
+            new_ts = np.concatenate([ts] + [_index_ns(f.index) for f in fetched])
+            new_close = np.concatenate([close] + [f.to_numpy(dtype=np.float64) for f in fetched])
+            order = np.argsort(new_ts, kind='stable')
+            ts, keep = np.unique(new_ts[order], return_index=True)
+            close = new_close[order][keep]
+
+            # 완료된 봉(시작 시각 < 현재 봉 경계)까지만 조회 완료로 기록
+            complete_ns = _to_ns(pd.Timestamp(self.clock()).floor(INTERVALS[interval]))
+            done = np.asarray([(lo, min(hi, complete_ns)) for lo, hi in gaps if lo < complete_ns], dtype=np.int64)
+            if self.persist and len(done):
+                stored = np.searchsorted(ts, complete_ns)
+                self.cache.store(ticker, interval, ts[:stored], close[:stored],
+                                 merge_ranges(np.concatenate([ranges, done.reshape(-1, 2)])))
+
+        lo, hi = np.searchsorted(ts, [start_ns, end_ns])
+        return pd.Series(np.array(close[lo:hi]), index=pd.DatetimeIndex(np.array(ts[lo:hi]).view('datetime64[ns]')), name='Close')
+
+
+def make_backend(offline=None, cache_dir=None, source=None, rate=None, burst=16):
+    """기본 시세 백엔드 구성
+
+    offline (기본값: 환경변수 SMAES_OFFLINE): 캐시된 시세를 재생하고 빈 구간은 가상 시세로 채움
+    cache_dir (기본값: 환경변수 SMAES_PRICE_CACHE 또는 ~/.cache/s-maes/prices)
+    source (기본값: 환경변수 SMAES_PRICE_SOURCE 또는 'http'): 'http'(chart API 연결 풀) / 'yfinance'
+    rate (기본값: 환경변수 SMAES_RATE_LIMIT, 미지정 시 제한 없음): 원격 조회 초당 최대 요청 수
+    burst: 속도 제한 시 연속 허용 요청 수 (동시 조회 스레드 수에 맞춰 첫 배치가 대기하지 않도록)
+    """
+    if offline is None:
+        offline = os.environ.get('SMAES_OFFLINE', '').lower() in ('1', 'true', 'yes')
+    cache = PriceCache(cache_dir or os.environ.get('SMAES_PRICE_CACHE', DEFAULT_CACHE_DIR))
+    if offline:
+        return CachedBackend(SyntheticBackend(), cache, persist=False)
+
+    source = source or os.environ.get('SMAES_PRICE_SOURCE', 'http')
+    upstream = YFinanceBackend() if source == 'yfinance' else ChartHttpBackend()
+    if rate is None and os.environ.get('SMAES_RATE_LIMIT'):
+        rate = float(os.environ['SMAES_RATE_LIMIT'])
+    rate_limiter = RateLimiter(rate, burst=max(burst, rate)) if rate else None
+    return CachedBackend(RetryingBackend(upstream, rate_limiter=rate_limiter, breaker=CircuitBreaker()), cache)
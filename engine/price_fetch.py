@@ -0,0 +1,214 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_CHART_URL = 'https://query1.finance.yahoo.com'
+_USER_AGENT = 'Mozilla/5.0 (compatible; s-maes/1.0)'
+
+
+class RateLimiter:
+    """스레드 안전 토큰 버킷 (초당 rate회, 최대 burst회 연속 허용)"""
+
+    def __init__(self, rate, burst=None):
+        self.rate = float(rate)
+        self.capacity = float(burst if burst is not None else max(1.0, rate))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1.0:
+                    self._tokens -= 1.0
+                    return
+                wait = (1.0 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+def make_session(pool_size=32):
+    """연결 풀을 공유하는 requests 세션"""
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    session.headers['User-Agent'] = _USER_AGENT
+    return session
+
+
+class ChartHttpBackend:
+    """Yahoo Finance chart API(v8) 직접 조회 백엔드 (공유 연결 풀 사용)
+
+    base_url을 바꾸면 같은 응답 형식의 로컬 스텁 서버로도 조회할 수 있습니다.
+    """
+
+    name = 'chart-http'
+
+    def __init__(self, base_url=DEFAULT_CHART_URL, session=None, pool_size=32, timeout=10.0):
+        self.base_url = base_url.rstrip('/')
+        self.session = session if session is not None else make_session(pool_size)
+        self.timeout = timeout
+
+    def fetch(self, ticker, start, end, interval):
+        params = {
+            'period1': int(pd.Timestamp(start).tz_localize('Asia/Seoul').timestamp()),
+            'period2': int(pd.Timestamp(end).tz_localize('Asia/Seoul').timestamp()),
+            'interval': interval,
+        }
+        response = self.session.get(f'{self.base_url}/v8/finance/chart/{ticker}', params=params, timeout=self.timeout)
+        response.raise_for_status()
+        result = (response.json().get('chart') or {}).get('result') or [{}]
+        timestamps = result[0].get('timestamp') or []
+        closes = ((result[0].get('indicators') or {}).get('quote') or [{}])[0].get('close') or []
+
+        index = pd.to_datetime(np.asarray(timestamps, dtype=np.int64), unit='s', utc=True)
+        index = index.tz_convert('Asia/Seoul').tz_localize(None)
+        close = pd.Series(np.asarray(closes, dtype=np.float64), index=index, name='Close').dropna()
+        return close[(close.index >= start) & (close.index < end)]
+
+
+def is_retryable(error):
+    """재시도할 오류인지 (시간 초과, HTTP 5xx/429만 재시도, 연결 거부/4xx는 즉시 실패)"""
+    status = getattr(getattr(error, 'response', None), 'status_code', None)
+    if status is not None:
+        return status == 429 or status >= 500
+    if isinstance(error, TimeoutError):
+        return True
+    try:
+        import requests
+    except ImportError:
+        return False
+    return isinstance(error, requests.Timeout)
+
+
+class CircuitOpenError(RuntimeError):
+    """차단기가 열려 upstream 호출을 생략함"""
+
+
+class CircuitBreaker:
+    """연속 실패 시 upstream 호출을 일정 시간 차단하는 스레드 안전 차단기
+
+    threshold회 연속 실패하면 reset_after초 동안 열린 상태가 되어 즉시 실패하고,
+    이후 첫 호출 하나만 시험 삼아 통과시켜 성공하면 닫힙니다.
+    """
+
+    def __init__(self, threshold=5, reset_after=60.0, clock=time.monotonic):
+        self.threshold = threshold
+        self.reset_after = reset_after
+        self.clock = clock
+        self.failures = 0
+        self._opened = None
+        self._lock = threading.Lock()
+
+    @property
+    def is_open(self):
+        with self._lock:
+            return self._opened is not None and self.clock() - self._opened < self.reset_after
+
+    def allow(self):
+        """호출 허용 여부 (차단 시간이 지나면 시험 호출 1회 허용 후 다시 차단)"""
+        with self._lock:
+            if self._opened is None:
+                return True
+            if self.clock() - self._opened < self.reset_after:
+                return False
+            self._opened = self.clock()
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self._opened = None
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.failures >= self.threshold:
+                self._opened = self.clock()
+
+
+class RetryingBackend:
+    """upstream 호출에 재시도(지수 백오프), 호출 속도 제한, 차단기를 적용하는 래퍼
+
+    is_retryable 오류만 재시도합니다. 최종 실패한 종목은 ticker_cooldown초 동안
+    기억해 upstream을 다시 호출하지 않고 같은 오류를 반환하며, breaker가 열리면
+    모든 종목이 CircuitOpenError로 즉시 실패합니다.
+    """
+
+    def __init__(self, upstream, retries=3, backoff=0.5, rate_limiter=None, breaker=None, ticker_cooldown=300.0,
+                 clock=time.monotonic):
+        self.upstream = upstream
+        self.retries = retries
+        self.backoff = backoff
+        self.rate_limiter = rate_limiter
+        self.breaker = breaker
+        self.ticker_cooldown = ticker_cooldown
+        self.clock = clock
+        self.name = upstream.name
+        self._failed = {} # {티커: (재시도 가능 시각, 예외)}
+        self._lock = threading.Lock()
+
+    def fetch(self, ticker, start, end, interval):
+        with self._lock:
+            failed = self._failed.get(ticker)
+        if failed is not None:
+            if self.clock() < failed[0]:
+                raise failed[1]
+            with self._lock:
+                self._failed.pop(ticker, None)
+
+        for attempt in range(self.retries + 1):
+            if self.breaker is not None and not self.breaker.allow():
+                raise CircuitOpenError(f"{self.name} 연속 실패로 조회를 잠시 중단했습니다.")
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire()
+            try:
+                result = self.upstream.fetch(ticker, start, end, interval)
+            except Exception as e:
+                if attempt < self.retries and is_retryable(e):
+                    time.sleep(self.backoff * (2 ** attempt))
+                    continue
+                self._record_failure(ticker, e)
+                raise
+            if self.breaker is not None:
+                self.breaker.record_success()
+            return result
+
+    def _record_failure(self, ticker, error):
+        # 종목 고유 오류(4xx)는 차단기에 반영하지 않음
+        status = getattr(getattr(error, 'response', None), 'status_code', None)
+        if self.breaker is not None and (status is None or status == 429 or status >= 500):
+            self.breaker.record_failure()
+        with self._lock:
+            self._failed[ticker] = (self.clock() + self.ticker_cooldown, error)
+
+
+def fetch_many(backend, tickers, start, end, interval, max_workers=16):
+    """여러 종목을 동시에 조회 (종목별 오류 격리)
+
+    tickers: {이름: 티커} dict
+    반환: ({이름: Close Series}, {이름: 예외}) - 실패한 종목은 빈 Series
+    """
+    def fetch_one(ticker):
+        try:
+            return backend.fetch(ticker, start, end, interval), None
+        except Exception as e:
+            return pd.Series(dtype=np.float64, index=pd.DatetimeIndex([]), name='Close'), e
+
+    names = list(tickers.keys())
+    workers = max(1, min(max_workers, len(names)))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(fetch_one, [tickers[n] for n in names]))
+
+    data = {name: series for name, (series, _) in zip(names, results)}
+    errors = {name: error for name, (_, error) in zip(names, results) if error is not None}
+    return data, errors
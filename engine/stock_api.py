@@ -1,41 +1,49 @@
-import yfinance as yf
+import numpy as np
 import pandas as pd
 from datetime import datetime, timedelta
 
+from engine.instrumentation import metrics
+from engine.price_backend import INTERVALS, make_backend, resolve_range
+from engine.performance import align_prices
+from engine.price_fetch import fetch_many
+from engine.universe import default_universe
+
 class StockEngine:
-    def __init__(self):
-        # 주요 KOSPI/KOSDAQ 종목 티커 (예시)
-        self.tickers = {
-            '삼성전자': '005930.KS',
-            'SK하이닉스': '000660.KS',
-            'LG에너지솔루션': '373220.KS',
-            '삼성바이오로직스': '207940.KS',
-            '현대차': '005380.KS',
-            'NAVER': '035420.KS',
-            '카카오': '035720.KS',
-            'POSCO홀딩스': '005490.KS',
-            '기아': '000270.KS',
-            '셀트리온': '068270.KS'
-        }
+    def __init__(self, backend=None, max_workers=16, universe=None):
+        # 투자 유니버스 (기본: 내장 구성 종목 파일의 앞 10종목, 환경변수 SMAES_UNIVERSE / SMAES_UNIVERSE_LIMIT로 교체 가능)
+        self.universe = universe if universe is not None else default_universe()
+        self.tickers = self.universe.ticker_map # {종목명: 티커}
+        # 시세 백엔드 (기본: 온디스크 캐시 + yfinance, SMAES_OFFLINE=1이면 캐시 재생 + 가상 시세)
+        self.backend = backend if backend is not None else make_backend()
+        self.max_workers = max_workers # 동시 조회 스레드 수
+        self.last_errors = {} # 최근 조회에서 실패한 종목 {종목명: 예외}
         
-    def get_stock_data(self, period="1mo", interval="1h"):
-        """종목별 가격 데이터 수집"""
-        data = {}
-        for name, ticker in self.tickers.items():
-            stock = yf.Ticker(ticker)
-            hist = stock.history(period=period, interval=interval)
-            data[name] = hist['Close']
+    def get_stock_data(self, period="1mo", interval="1h", start=None, end=None):
+        """종목별 가격 데이터 수집 (start/end를 주면 period 대신 해당 구간 조회)"""
+        start, end = resolve_range(period, interval, start, end)
+        with metrics.stage('stock.fetch') as stage:
+            data, self.last_errors = fetch_many(self.backend, self.tickers, start, end, interval, self.max_workers)
+            stage.rows = sum(len(series) for series in data.values())
         return pd.DataFrame(data)
 
+    def get_price_matrix(self, times, interval="1h", lookback=timedelta(days=7)):
+        """시각 배열에 맞춘 (시각 x 종목) 가격 행렬 (각 시각까지 완료된 마지막 봉의 종가 사용)"""
+        times = np.asarray(times, dtype='datetime64[ns]')
+        start = pd.Timestamp(times[0]) - lookback
+        # 봉은 시작 시각으로 라벨되므로 마지막 시각에 완료되는 봉(시작 < times[-1])까지만 조회
+        end = pd.Timestamp(times[-1])
+        prices = self.get_stock_data(interval=interval, start=start, end=end)
+        return align_prices(prices, times, self.universe.names, bar_length=INTERVALS[interval])
+
     def get_current_prices(self):
         """최근 종가 수집"""
+        start, end = resolve_range("5d", "1h", end=datetime.now() + timedelta(hours=1))
+        data, self.last_errors = fetch_many(self.backend, self.tickers, start, end, "1h", self.max_workers)
         prices = {}
-        for name, ticker in self.tickers.items():
-            stock = yf.Ticker(ticker)
-            # 최신 1일치 데이터의 마지막 값
-            hist = stock.history(period="1d")
+        for name, hist in data.items():
+            # 최근 시간봉의 마지막 값
             if not hist.empty:
-                prices[name] = hist['Close'].iloc[-1]
+                prices[name] = float(hist.iloc[-1])
             else:
                 prices[name] = 0.0
         return prices
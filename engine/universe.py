@@ -0,0 +1,166 @@
+import csv
+import functools
+import os
+
+import numpy as np
+
+DEFAULT_UNIVERSE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'krx_universe.csv')
+# 기본 유니버스 종목 수 (내장 파일 앞부분 = 기존 10종목)
+DEFAULT_UNIVERSE_SIZE = 10
+UNCLASSIFIED = '기타'
+
+
+class SectorIndex:
+    """종목 유니버스를 섹터 분류(taxonomy) 기준으로 정수화한 인덱스
+
+    codes: (N,) 종목별 섹터 코드 (taxonomy 인덱스, 분류에 없는 섹터는 -1)
+    membership: (N, S) 0/1 소속 행렬, counts: (S,) 섹터별 종목 수
+    members(sector)는 섹터 코드순으로 정렬한 종목 위치 배열의 구간(복사 없음)을 반환합니다.
+    """
+
+    def __init__(self, sectors, taxonomy):
+        self.taxonomy = tuple(taxonomy)
+        code = {sector: i for i, sector in enumerate(self.taxonomy)}
+        self.codes = np.array([code.get(sector, -1) for sector in sectors], dtype=np.intp)
+
+        n_sectors = len(self.taxonomy)
+        classified = np.flatnonzero(self.codes >= 0)
+        self.membership = np.zeros((len(self.codes), n_sectors), dtype=np.float64)
+        self.membership[classified, self.codes[classified]] = 1.0
+        self.counts = np.bincount(self.codes[classified], minlength=n_sectors)
+
+        # 섹터 코드 -1(미분류), 0, 1, ... 순서의 구간 경계
+        self._order = np.argsort(self.codes, kind='stable')
+        self._bounds = np.searchsorted(self.codes[self._order], np.arange(-1, n_sectors + 1))
+
+    def members(self, sector):
+        """섹터(이름 또는 코드)에 속한 종목 위치 (미분류는 -1 또는 UNCLASSIFIED)"""
+        if isinstance(sector, (int, np.integer)):
+            code = int(sector)
+        elif sector == UNCLASSIFIED:
+            code = -1
+        else:
+            code = self.taxonomy.index(sector)
+        return self._order[self._bounds[code + 1]:self._bounds[code + 2]]
+
+    def expand(self, sector_values, fill=0.0):
+        """섹터 벡터((..., S))를 종목 벡터((..., N))로 확장 (미분류 종목은 fill)"""
+        sector_values = np.asarray(sector_values, dtype=np.float64)
+        padded = np.concatenate([sector_values, np.full(sector_values.shape[:-1] + (1,), fill)], axis=-1)
+        return padded[..., self.codes]
+
+    def totals(self, values):
+        """종목 벡터((..., N))의 섹터별 합계((..., S), 미분류 종목 제외)"""
+        return np.asarray(values, dtype=np.float64) @ self.membership
+
+    def active(self, weights):
+        """비중이 0보다 큰 종목이 하나라도 있는 섹터 (S,) bool"""
+        held = self.codes[(np.asarray(weights) > 0) & (self.codes >= 0)]
+        return np.bincount(held, minlength=len(self.taxonomy)) > 0
+
+
+class Universe:
+    """투자 유니버스 (종목명/티커/시장/섹터)
+
+    종목 순서가 곧 비중 벡터/가격 행렬의 열 순서입니다. 섹터 분류별 정수 인덱스는
+    sector_index(taxonomy)로 처음 요청될 때 한 번만 만들어 재사용합니다.
+    """
+
+    def __init__(self, names, tickers, sectors, markets=None):
+        self.names = tuple(names)
+        self.tickers = tuple(tickers)
+        self.sectors = tuple(sectors)
+        self.markets = tuple(markets) if markets is not None else ('',) * len(self.names)
+        if len(set(self.names)) != len(self.names):
+            raise ValueError("종목명이 중복되었습니다.")
+        if not len(self.names) == len(self.tickers) == len(self.sectors) == len(self.markets):
+            raise ValueError("종목명/티커/섹터/시장 길이가 다릅니다.")
+        self.position = {name: i for i, name in enumerate(self.names)}
+        self._indexes = {}
+
+    def __len__(self):
+        return len(self.names)
+
+    @classmethod
+    def load(cls, path=None, markets=None, limit=None):
+        """CSV(name, ticker, market, sector)에서 로드
+
+        path 기본값: 환경변수 SMAES_UNIVERSE 또는 내장 KOSPI/KOSDAQ 구성 종목 파일 (시가총액 순)
+        markets: 포함할 시장 목록 (예: ['KOSPI']), limit: 앞에서부터 limit개 종목만 사용
+        """
+        path = path or os.environ.get('SMAES_UNIVERSE', DEFAULT_UNIVERSE_PATH)
+        with open(path, encoding='utf-8', newline='') as f:
+            rows = [row for row in csv.DictReader(f) if markets is None or row['market'] in markets]
+        rows = rows[:limit]
+        return cls([r['name'] for r in rows], [r['ticker'] for r in rows],
+                   [r['sector'] or UNCLASSIFIED for r in rows], [r['market'] for r in rows])
+
+    @classmethod
+    def from_dict(cls, tickers, sectors=None):
+        """{종목명: 티커}와 {종목명: 섹터}로 생성 (섹터가 없는 종목은 미분류)"""
+        sectors = sectors or {}
+        return cls(tickers.keys(), tickers.values(), [sectors.get(name, UNCLASSIFIED) for name in tickers])
+
+    @functools.cached_property
+    def ticker_map(self):
+        """{종목명: 티커} (시세 조회용)"""
+        return dict(zip(self.names, self.tickers))
+
+    def sector_index(self, taxonomy):
+        """섹터 분류 기준 SectorIndex (분류별로 한 번만 생성)"""
+        taxonomy = tuple(taxonomy)
+        index = self._indexes.get(taxonomy)
+        if index is None:
+            index = self._indexes[taxonomy] = SectorIndex(self.sectors, taxonomy)
+        return index
+
+    def vector(self, values, fill=0.0):
+        """{종목명: 값} dict를 종목 순서 벡터로 변환 (유니버스에 없는 종목은 무시)"""
+        out = np.full(len(self.names), fill, dtype=np.float64)
+        for name, value in values.items():
+            i = self.position.get(name)
+            if i is not None:
+                out[i] = value
+        return out
+
+    def get_state(self):
+        return {'names': list(self.names), 'tickers': list(self.tickers), 'sectors': list(self.sectors),
+                'markets': list(self.markets)}
+
+    @classmethod
+    def from_state(cls, state):
+        return cls(state['names'], state['tickers'], state['sectors'], state['markets'])
+
+
+@functools.lru_cache(maxsize=None)
+def default_universe():
+    """기본 유니버스 (프로세스당 한 번만 로드, StockEngine/에이전트 공용)
+
+    환경변수 SMAES_UNIVERSE_LIMIT로 종목 수 지정 (0이면 전체), 없으면 SMAES_UNIVERSE 파일은 전체,
+    내장 파일은 앞 DEFAULT_UNIVERSE_SIZE종목을 사용합니다.
+    """
+    limit = os.environ.get('SMAES_UNIVERSE_LIMIT')
+    if limit is None:
+        limit = 0 if os.environ.get('SMAES_UNIVERSE') else DEFAULT_UNIVERSE_SIZE
+    return Universe.load(limit=int(limit) or None)
+
+
+if __name__ == "__main__":
+    import time
+
+    t0 = time.perf_counter()
+    universe = Universe.load()
+    index = universe.sector_index(('IT', '금융', '바이오', '제조', '에너지', '소비재', '플랫폼'))
+    print(f"{len(universe)}종목 로드 + 인덱스 {(time.perf_counter() - t0) * 1000:.1f}ms")
+    for sector, count in zip(index.taxonomy, index.counts):
+        print(f"  {sector}: {count}종목 (예: {universe.names[index.members(sector)[0]]})")
+    print(f"  {UNCLASSIFIED}: {len(index.members(UNCLASSIFIED))}종목")
+
+    # 섹터 점수 -> 종목 점수 확장과 종목 비중 -> 섹터 합계 (시간 x 종목 행렬 일괄)
+    rng = np.random.default_rng(0)
+    weights = rng.dirichlet(np.ones(len(universe)), 24 * 30)
+    t0 = time.perf_counter()
+    sector_weights = index.totals(weights)
+    scores = index.expand(rng.normal(size=(24 * 30, len(index.taxonomy))))
+    print(f"720시간 섹터 합계/확장 {(time.perf_counter() - t0) * 1000:.2f}ms",
+          sector_weights.shape, scores.shape)
@@ -0,0 +1,206 @@
+import multiprocessing as mp
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from agents.behavior_schema import RISK_PROFILES
+from agents.csa import CrowdSimulatorAgent
+from agents.da import DebaterAgent
+from agents.oa import OrchestratorAgent
+from engine.optimizer import ConstrainedOptimizer
+from engine.performance import PerformanceEngine
+from engine.price_backend import SyntheticBackend
+from engine.stock_api import StockEngine
+
+# 워커 프로세스 공용 입력 (initializer에서 한 번만 설정)
+_WORKER = {}
+
+
+def make_scenarios(n_runs, hours, seed=None, shock_scale=0.5, risk_alpha=2.0, da_weight_range=(0.0, 2.0), price_paths=1):
+    """경로별 시나리오 파라미터 생성
+
+    shock_hour/shock_size: 해당 시각에 CSA 시장 심리에 더하는 충격 (정규분포, 표준편차 shock_scale)
+    risk_probs: 페르소나 위험 성향 분포 (Dirichlet(risk_alpha))
+    da_weight: DA 피드백 반영 강도 (균등분포)
+    price_path: 사용할 가상 시세 경로 번호
+    seed_seq: 경로별 독립 난수 스트림 (SeedSequence.spawn)
+    """
+    root = np.random.SeedSequence(seed)
+    rng = np.random.default_rng(root.spawn(1)[0])
+    return {
+        'shock_hour': rng.integers(0, hours, n_runs),
+        'shock_size': rng.normal(0.0, shock_scale, n_runs),
+        'risk_probs': rng.dirichlet(np.full(len(RISK_PROFILES), risk_alpha), n_runs),
+        'da_weight': rng.uniform(*da_weight_range, n_runs),
+        'price_path': np.arange(n_runs) % price_paths,
+        'seed_seq': root.spawn(n_runs),
+    }
+
+
+def _init_worker(config):
+    _WORKER.update(config)
+
+
+def _run_path(task):
+    """시나리오 1개 실행: CSA -> OA -> DA 루프 후 시가평가 결과만 반환"""
+    seed_seq, shock_hour, shock_size, risk_probs, da_weight, price_path = task
+    cfg = _WORKER
+    hours = cfg['hours']
+
+    csa = CrowdSimulatorAgent(cfg['num_personas'], seed=seed_seq, risk_probs=risk_probs, risk_effects=True)
+    oa = OrchestratorAgent(cfg['stock_engine'], csa, optimizer=ConstrainedOptimizer())
+    oa.current_sim_time = cfg['start']
+    da = DebaterAgent(weight=da_weight, render_text=False)
+
+    # 충격 시각 전후로 나누어 진행 (구간 사이 DA 피드백은 이어서 전달)
+    first = oa.step_hours(int(shock_hour), debater=da)
+    csa.global_sentiment = float(np.clip(csa.global_sentiment + shock_size, -1.0, 1.0))
+    second = oa.step_hours(hours - int(shock_hour), debater=da, feedback=first['feedback'])
+
+    weights = np.concatenate([first['weights'], second['weights']])
+    result = cfg['engine'].run(weights, cfg['prices'][price_path])
+    return {
+        'nav': result['nav'].astype(np.float32),
+        'final_weights': weights[-1],
+        'mean_weights': weights.mean(axis=0),
+        'turnover': result['turnover'].mean(),
+        'behaviors': int(first['behaviors_count'].sum() + second['behaviors_count'].sum()),
+    }
+
+
+class EnsembleResult:
+    """경로별 결과 배열 묶음 (R: 경로 수, T: 시간 수, N: 종목 수)"""
+
+    def __init__(self, tickers, scenarios, nav, final_weights, mean_weights, turnover, behaviors):
+        self.tickers = tickers
+        self.scenarios = scenarios          # make_scenarios 결과 (seed_seq 제외)
+        self.nav = nav                      # (R, T) float32
+        self.final_weights = final_weights  # (R, N)
+        self.mean_weights = mean_weights    # (R, N)
+        self.turnover = turnover            # (R,) 시간당 평균 회전율
+        self.behaviors = behaviors          # (R,) 총 행동 건수
+
+    @property
+    def total_return(self):
+        return self.nav[:, -1].astype(np.float64) - 1.0
+
+    @property
+    def max_drawdown(self):
+        # 시작 NAV(1.0)도 고점에 포함
+        peak = np.maximum(np.maximum.accumulate(self.nav, axis=1), 1.0)
+        return (self.nav / peak).min(axis=1).astype(np.float64) - 1.0
+
+    def runs(self):
+        """경로별 시나리오 파라미터와 성과 DataFrame"""
+        frame = pd.DataFrame({
+            'shock_hour': self.scenarios['shock_hour'],
+            'shock_size': self.scenarios['shock_size'],
+            'da_weight': self.scenarios['da_weight'],
+            'price_path': self.scenarios['price_path'],
+        })
+        for j, name in enumerate(RISK_PROFILES):
+            frame[name] = self.scenarios['risk_probs'][:, j]
+        frame['total_return'] = self.total_return
+        frame['max_drawdown'] = self.max_drawdown
+        frame['turnover'] = self.turnover
+        return frame
+
+    def summary(self, quantiles=(0.05, 0.25, 0.5, 0.75, 0.95)):
+        """수익률/MDD/회전율 분포 요약"""
+        stats = pd.DataFrame({
+            'total_return': self.total_return,
+            'max_drawdown': self.max_drawdown,
+            'turnover': self.turnover,
+        })
+        return stats.describe(percentiles=list(quantiles)).T
+
+    def weight_distribution(self, which='mean', quantiles=(0.05, 0.5, 0.95)):
+        """종목별 비중 분포 (which: 'mean' 기간 평균 비중, 'final' 마지막 비중)"""
+        weights = self.mean_weights if which == 'mean' else self.final_weights
+        q = np.quantile(weights, quantiles, axis=0)
+        frame = pd.DataFrame(q.T, index=self.tickers, columns=[f'p{int(x * 100)}' for x in quantiles])
+        frame['mean'] = weights.mean(axis=0)
+        frame['held'] = (weights > 0).mean(axis=0) # 편입 경로 비율
+        return frame
+
+    def nav_quantiles(self, quantiles=(0.05, 0.5, 0.95)):
+        """시간별 NAV 분위수 (len(quantiles), T)"""
+        return np.quantile(self.nav, quantiles, axis=0)
+
+
+class EnsembleRunner:
+    """CSA -> OA -> DA 피드백 루프의 몬테카를로 앙상블 실행기 (헤드리스)
+
+    경로마다 시장 심리 충격, 페르소나 위험 성향 구성, DA 피드백 강도를 바꿔 독립 실행하고
+    프로세스 풀로 병렬 처리합니다. 시세는 결정적 가상 시세(SyntheticBackend)를 한 번만
+    계산해 워커에 전달하며, 워커는 NAV와 비중 요약만 반환합니다.
+    """
+
+    def __init__(self, num_personas=500, hours=24 * 30, start=datetime(2024, 5, 23, 9, 0),
+                 cost_bps=10.0, max_workers=None, context='spawn'):
+        self.num_personas = num_personas
+        self.hours = hours
+        self.start = start
+        self.cost_bps = cost_bps
+        self.max_workers = max_workers or os.cpu_count()
+        self.context = context
+
+    def price_paths(self, n_paths):
+        """가상 시세 경로별 (T+1, N) 가격 행렬"""
+        start = np.datetime64(self.start, 'h')
+        times = np.arange(start, start + np.timedelta64(self.hours + 1, 'h'))
+        return np.stack([StockEngine(backend=SyntheticBackend(seed=p)).get_price_matrix(times) for p in range(n_paths)])
+
+    def run(self, n_runs, seed=None, chunksize=None, **scenario_options):
+        """n_runs개 경로 실행 (scenario_options는 make_scenarios 인자)"""
+        scenarios = make_scenarios(n_runs, self.hours, seed, **scenario_options)
+        stock_engine = StockEngine(backend=SyntheticBackend())
+        config = {
+            'hours': self.hours,
+            'start': self.start,
+            'num_personas': self.num_personas,
+            'stock_engine': stock_engine,
+            'engine': PerformanceEngine(self.cost_bps),
+            'prices': self.price_paths(int(scenarios['price_path'].max()) + 1),
+        }
+        tasks = zip(scenarios['seed_seq'], scenarios['shock_hour'], scenarios['shock_size'],
+                    scenarios['risk_probs'], scenarios['da_weight'], scenarios['price_path'])
+        chunksize = chunksize or max(1, n_runs // (self.max_workers * 4))
+
+        if self.max_workers == 1:
+            _init_worker(config)
+            results = [_run_path(task) for task in tasks]
+        else:
+            with ProcessPoolExecutor(self.max_workers, mp_context=mp.get_context(self.context),
+                                     initializer=_init_worker, initargs=(config,)) as pool:
+                results = list(pool.map(_run_path, tasks, chunksize=chunksize))
+
+        return EnsembleResult(
+            list(stock_engine.tickers.keys()),
+            {k: v for k, v in scenarios.items() if k != 'seed_seq'},
+            np.stack([r['nav'] for r in results]),
+            np.stack([r['final_weights'] for r in results]),
+            np.stack([r['mean_weights'] for r in results]),
+            np.array([r['turnover'] for r in results]),
+            np.array([r['behaviors'] for r in results]),
+        )
+
+
+if __name__ == "__main__":
+    import time
+
+    runner = EnsembleRunner(hours=24 * 30)
+    t0 = time.perf_counter()
+    result = runner.run(64, seed=0, price_paths=4)
+    elapsed = time.perf_counter() - t0
+    print(f"{len(result.nav)}개 경로 x {runner.hours}시간, 워커 {runner.max_workers}개: {elapsed:.1f}s")
+    print("\n[성과 분포]")
+    print(result.summary().round(4))
+    print("\n[종목별 평균 비중 분포]")
+    print(result.weight_distribution().round(3))
+    print("\n[DA 반영 강도 상/하위 절반별 평균 수익률]")
+    runs = result.runs()
+    print(runs.groupby(runs['da_weight'] > runs['da_weight'].median())['total_return'].mean())
@@ -0,0 +1,323 @@
+import queue
+import threading
+import time
+import traceback
+from collections import namedtuple
+from concurrent.futures import Future
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+
+import checkpoint
+from agents.behavior_store import BehaviorStore, new_store_path
+from agents.csa import CrowdSimulatorAgent
+from agents.da import DebaterAgent
+from agents.oa import OrchestratorAgent
+from engine.instrumentation import metrics
+from engine.optimizer import ConstrainedOptimizer
+from engine.performance import PerformanceTracker
+from engine.stock_api import StockEngine
+
+# 대시보드에 전달하는 읽기 전용 상태 (발행 시마다 새로 만들어 통째로 교체)
+Snapshot = namedtuple('Snapshot', [
+    'version', 'sim_time', 'hours', 'busy', 'pending_hours', 'auto', 'rate', 'num_personas',
+    'portfolio', 'cumulative_return', 'max_drawdown', 'performance',
+    'heatmap', 'heatmap_times', 'best_daily', 'best_monthly',
+    'recent_behaviors', 'rows_written', 'critique', 'csa_instructions', 'metrics', 'error',
+])
+
+
+def advance(oa, da, performance, hours, feedback=None):
+    """CSA -> OA -> DA 루프를 hours 시간 진행하고 시가평가/시차 모델까지 갱신 (서비스/CLI 공용 1단계)
+
+    반환: (step_hours 결과, 시세 조회에 실패한 종목 {종목명: 예외})
+    """
+    result = oa.step_hours(hours, debater=da, feedback=feedback)
+
+    # 시가평가 수익률: 각 시간 비중을 다음 1시간 동안 보유
+    with metrics.stage('sim.performance', rows=hours):
+        end_times = result['time'] + np.timedelta64(1, 'h')
+        prices = oa.stock_engine.get_price_matrix(np.append(result['time'], end_times[-1]))
+        performance.append(end_times, result['weights'], prices)
+        fetch_errors = dict(oa.stock_engine.last_errors)
+
+    # 누적 시그널로 행동 -> 주가 시차 모델 재추정 (다음 스텝부터 선행 지표로 반영)
+    oa.fit_lag_model()
+    return result, fetch_errors
+
+
+def downsample(frame, max_points):
+    """차트용 행 수 제한 (균등 간격으로 고르고 마지막 행은 항상 포함)"""
+    if len(frame) <= max_points:
+        return frame
+    idx = np.unique(np.linspace(0, len(frame) - 1, max_points).round().astype(np.intp))
+    return frame.iloc[idx].reset_index(drop=True)
+
+
+class SimulationService(threading.Thread):
+    """에이전트를 소유하고 백그라운드에서 시뮬레이션을 진행하는 서비스 스레드
+
+    대시보드는 명령 큐(advance/set_auto/set_rate)로만 요청하고, 서비스는 chunk_hours마다
+    새 Snapshot을 만들어 참조를 교체(원자적 대입)하는 방식으로 발행합니다.
+    자동 모드에서는 초당 rate 시간(가상 시간) 속도로 진행합니다.
+    lease(초)를 주면 그 시간 동안 touch()가 없을 때 남은 요청과 자동 모드를 버리고 스레드를
+    종료합니다 (브라우저 세션이 닫힌 뒤 계속 진행하지 않도록). 종료된 서비스는 restart()로
+    같은 상태에서 다시 시작할 수 있습니다.
+    """
+
+    def __init__(self, oa=None, da=None, performance=None, rate=1.0, chunk_hours=24, max_points=500,
+                 min_interval=0.25, feedback=None, lease=None):
+        super().__init__(daemon=True)
+        if oa is None:
+            store = BehaviorStore(new_store_path()) # 전체 행동 로그 (일자별 Arrow 파일)
+            oa = OrchestratorAgent(
+                StockEngine(),
+                CrowdSimulatorAgent(),
+                optimizer=ConstrainedOptimizer(), # 상위 10종목, 단일 종목 20% / 섹터 40% 상한
+                behavior_store=store,
+            )
+        self.oa = oa
+        self.da = da if da is not None else DebaterAgent()
+        self.performance = performance if performance is not None else PerformanceTracker()
+        self.last_feedback = feedback # 최근 DA의 피드백 데이터
+        self.rate = rate
+        self.chunk_hours = chunk_hours
+        self.max_points = max_points
+        self.min_interval = min_interval
+        self.lease = lease
+        self._touched = time.monotonic()
+
+        self._commands = queue.Queue()
+        self._lock = threading.Lock() # 대기 시간 수 카운터 보호
+        self._pending = 0
+        self._auto = False
+        self._busy = False
+        self._error = None
+        self._version = 0
+        self._snapshot = None
+        self._idle = threading.Event()
+        self._idle.set()
+        self._publish()
+
+    # --- 대시보드 쪽 API (큐에 넣기만 하고 바로 반환) ---
+
+    def advance(self, hours):
+        with self._lock:
+            self._pending += hours
+            self._idle.clear()
+        self._commands.put(('advance', hours))
+
+    def set_auto(self, enabled):
+        if enabled != self._auto:
+            self._auto = bool(enabled)
+            self._commands.put(('auto', None)) # 대기 중인 서비스 스레드를 깨움
+
+    def set_rate(self, rate):
+        if rate != self.rate:
+            self._commands.put(('rate', float(rate)))
+
+    def save_checkpoint(self, path=None):
+        """현재 상태 저장 요청 (앞서 요청된 진행이 끝난 뒤 저장, 완료 시 경로를 담는 Future 반환)"""
+        future = Future()
+        self._commands.put(('checkpoint', (path or checkpoint.new_checkpoint_path(), future)))
+        return future
+
+    @classmethod
+    def from_checkpoint(cls, path, stock_engine=None, behavior_store=None, **kwargs):
+        """체크포인트에서 복원한 상태로 서비스 생성 (시작은 start()로 별도 호출)
+
+        behavior_store: 이후 행동 로그를 기록할 저장소 (기본값: 저장 시점의 저장소에 이어서 기록)
+        """
+        restored = checkpoint.load(path, stock_engine)
+        if behavior_store is not None:
+            restored.oa.behavior_store = behavior_store
+        return cls(oa=restored.oa, da=restored.da, performance=restored.performance,
+                   feedback=restored.feedback, **kwargs)
+
+    def stop(self):
+        self._commands.put(('stop', None))
+
+    def touch(self):
+        """대시보드 세션이 살아 있음을 알림 (lease 연장)"""
+        self._touched = time.monotonic()
+
+    def restart(self):
+        """종료된 서비스의 에이전트/성과 상태와 설정을 이어받은 새 서비스를 시작"""
+        self.join()
+        service = type(self)(oa=self.oa, da=self.da, performance=self.performance, rate=self.rate,
+                             chunk_hours=self.chunk_hours, max_points=self.max_points,
+                             min_interval=self.min_interval, feedback=self.last_feedback, lease=self.lease)
+        service._error = self._error
+        service._publish()
+        service.start()
+        return service
+
+    def snapshot(self):
+        """가장 최근 발행된 Snapshot"""
+        return self._snapshot
+
+    def active(self):
+        """진행 중이거나 대기 중인 요청이 있거나 자동 모드인지 여부 (대시보드 폴링 여부)"""
+        return self._auto or not self._idle.is_set()
+
+    def wait_idle(self, timeout=None):
+        """대기 중인 진행 요청이 모두 끝날 때까지 대기"""
+        return self._idle.wait(timeout)
+
+    # --- 서비스 스레드 ---
+
+    def run(self):
+        next_tick = time.monotonic()
+        while True:
+            timeout = max(0.0, next_tick - time.monotonic()) if self._auto else None
+            if self.lease is not None:
+                remaining = max(0.0, self._touched + self.lease - time.monotonic())
+                timeout = remaining if timeout is None else min(timeout, remaining)
+            try:
+                command, arg = self._commands.get(timeout=timeout)
+            except queue.Empty:
+                command, arg = None, None
+
+            if command == 'stop':
+                break
+            if self._expired():
+                # 세션이 닫힌 뒤에는 남은 요청/자동 모드를 버리고 종료
+                self._shutdown_idle()
+                break
+
+            if command == 'advance':
+                self._run_hours(arg, queued=True)
+            elif command == 'auto':
+                next_tick = time.monotonic()
+                self._publish()
+            elif command == 'rate':
+                self.rate = arg
+                self._publish()
+            elif command == 'checkpoint':
+                path, future = arg
+                try:
+                    future.set_result(checkpoint.save(path, self.oa, self.da, self.performance, self.last_feedback))
+                except Exception as e:
+                    future.set_exception(e)
+
+            if self._auto and time.monotonic() >= next_tick:
+                # 틱 간격이 너무 짧지 않도록 여러 시간을 한 번에 진행
+                interval = max(1.0 / self.rate, self.min_interval)
+                self._run_hours(max(1, int(round(self.rate * interval))))
+                next_tick = max(next_tick + interval, time.monotonic())
+
+        # 종료 시 버퍼에 남은 행동 로그 기록
+        if self.oa.behavior_store is not None:
+            self.oa.behavior_store.flush()
+
+    def _run_hours(self, hours, queued=False):
+        """hours 시간을 chunk_hours 단위로 진행하며 단위마다 Snapshot 발행
+
+        queued: advance 요청분이면 진행한 만큼 대기 시간 수에서 차감
+        """
+        self._busy = True
+        remaining = hours
+        try:
+            while remaining > 0 and not self._expired():
+                n = min(self.chunk_hours, remaining)
+                # 진행은 성공했어도 시세 조회 실패는 화면에 알림 (해당 구간은 거래/비용 없이 보유)
+                self._error = self._describe_fetch_errors(self._step(n))
+                remaining -= n
+                if queued:
+                    self._consume(n)
+                if remaining > 0:
+                    self._publish()
+        except Exception:
+            self._error = traceback.format_exc()
+            if queued:
+                self._consume(remaining)
+        finally:
+            self._busy = False
+        self._publish()
+        # 마지막 Snapshot 발행 후에 대기 완료 알림
+        with self._lock:
+            if self._pending == 0:
+                self._idle.set()
+
+    def _expired(self):
+        return self.lease is not None and time.monotonic() - self._touched > self.lease
+
+    def _shutdown_idle(self):
+        """lease 만료: 남은 진행 요청과 자동 모드를 버리고 종료 상태 발행"""
+        self._auto = False
+        with self._lock:
+            self._pending = 0
+        self._publish()
+        self._idle.set()
+
+    def _consume(self, hours):
+        with self._lock:
+            self._pending -= hours
+
+    @staticmethod
+    def _describe_fetch_errors(errors, limit=3):
+        if not errors:
+            return None
+        names = ', '.join(f"{name}({type(e).__name__})" for name, e in list(errors.items())[:limit])
+        more = f" 외 {len(errors) - limit}종목" if len(errors) > limit else ''
+        return f"시세 조회 실패 {len(errors)}종목: {names}{more}"
+
+    def _step(self, hours):
+        """hours 시간 진행 후 시세 조회에 실패한 종목 {종목명: 예외} 반환"""
+        result, fetch_errors = advance(self.oa, self.da, self.performance, hours, self.last_feedback)
+        # 새로운 피드백 저장
+        self.last_feedback = result['feedback']
+        return fetch_errors
+
+    def _publish(self):
+        """현재 상태로 Snapshot을 만들어 교체"""
+        with metrics.stage('sim.publish'):
+            self._build_snapshot()
+
+    def _build_snapshot(self):
+        oa = self.oa
+        signal_state = oa.signal_state
+        recent_counts = signal_state.recent_counts(24)
+        heatmap_times = pd.date_range(end=oa.current_sim_time - timedelta(hours=1), periods=len(recent_counts), freq='h')
+        store = oa.behavior_store
+        feedback = self.last_feedback
+
+        self._version += 1
+        self._snapshot = Snapshot(
+            version=self._version,
+            sim_time=oa.current_sim_time,
+            hours=signal_state.hours,
+            busy=self._busy or self._pending > 0,
+            pending_hours=self._pending,
+            auto=self._auto,
+            rate=self.rate,
+            num_personas=oa.csa_agent.num_personas,
+            portfolio=dict(oa.etf_portfolio),
+            cumulative_return=self.performance.cumulative_return(),
+            max_drawdown=self.performance.max_drawdown(),
+            performance=downsample(self.performance.frame(), self.max_points),
+            heatmap=recent_counts.sum(axis=2).T,
+            heatmap_times=heatmap_times,
+            best_daily=oa.best_active_etf('1d'),
+            best_monthly=oa.best_active_etf('1m'),
+            recent_behaviors=store.latest(10) if store is not None else oa.csa_agent.last_behaviors(oa.current_sim_time).head(10),
+            rows_written=store.total_rows if store is not None else 0,
+            critique=self.da.latest_critique(),
+            csa_instructions=list(feedback['csa_instructions']) if feedback else [],
+            metrics=metrics.to_dict() if metrics.enabled else None,
+            error=self._error,
+        )
+
+
+if __name__ == "__main__":
+    # 1개월 진행 요청 후 진행 중인 Snapshot을 폴링
+    service = SimulationService()
+    service.start()
+    service.advance(24 * 30)
+    while not service.wait_idle(0.5):
+        snap = service.snapshot()
+        print(f"v{snap.version} {snap.sim_time} 남은 {snap.pending_hours}h 수익률 {snap.cumulative_return:.2%}")
+    snap = service.snapshot()
+    print(f"완료: {snap.sim_time}, {snap.hours}시간, 차트 {len(snap.performance)}점, 로그 {snap.rows_written:,}건")
+    service.stop()
@@ -0,0 +1,80 @@
+"""agents.behavior_store.BehaviorStore 기록/조건 조회 테스트"""
+import glob
+import os
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pytest
+
+from agents.behavior_store import BehaviorStore
+from agents.csa import CrowdSimulatorAgent
+
+TIMES = pd.date_range('2024-05-31 09:00', periods=48, freq='h')
+
+
+@pytest.fixture(scope='module')
+def batches():
+    csa = CrowdSimulatorAgent(num_personas=500, seed=0)
+    return [csa.generate_hourly_batch() for _ in TIMES], csa.personas.user_id
+
+
+def _fill(root, batches, **kwargs):
+    records, user_ids = batches
+    store = BehaviorStore(str(root), **kwargs)
+    for t, batch in zip(TIMES, records):
+        store.append(batch, t, user_ids)
+    return store
+
+
+def _parts(root):
+    return sorted(glob.glob(os.path.join(str(root), 'day=*', 'part-*.arrow')))
+
+
+def test_filtered_scan_matches_in_memory_filter(tmp_path, batches):
+    store = _fill(tmp_path, batches)
+    store.flush()
+    records, user_ids = batches
+
+    # 조건 조회 결과가 메모리에서 직접 거른 결과와 같은지 (6/1 하루, 증권, 특정 고객)
+    user = user_ids[records[20]['user_idx'][0]]
+    expected = sum(int(((b['type'] == 2) & (user_ids[b['user_idx']] == user)).sum())
+                   for t, b in zip(TIMES, records) if t.day == 1)
+    user = user.decode() if isinstance(user, bytes) else str(user)
+    frame = store.read_frame(start='2024-06-01', end='2024-06-02', types=['Securities'], user_ids=[user])
+
+    assert len(frame) == expected
+    assert (frame['type'] == 'Securities').all() and (frame['user_id'] == user).all()
+    assert frame['timestamp'].between(pd.Timestamp('2024-06-01'), pd.Timestamp('2024-06-02'), inclusive='left').all()
+    assert store.count_rows(start='2024-06-01', end='2024-06-02', types=['Securities'], user_ids=[user]) == expected
+
+
+def test_one_part_per_day_however_often_the_caller_steps(tmp_path, batches):
+    store = _fill(tmp_path, batches)
+    # 날짜가 바뀔 때마다 지난 날짜만 기록, 마지막 날짜는 버퍼에 남아 있음
+    assert [os.path.basename(os.path.dirname(p)) for p in _parts(tmp_path)] == ['day=2024-05-31', 'day=2024-06-01']
+    store.flush()
+    assert len(_parts(tmp_path)) == 3
+    assert store.rows_written == sum(len(b['user_idx']) for b in batches[0])
+
+
+def test_unflushed_rows_are_visible_to_queries(tmp_path, batches):
+    store = _fill(tmp_path, batches)
+    total = sum(len(b['user_idx']) for b in batches[0])
+
+    assert store.total_rows == total
+    assert store.count_rows() == total
+    assert store.scan(start='2024-06-02', columns=['timestamp']).num_rows == store._pending_rows
+    latest = store.latest(5)
+    assert len(latest) == 5 and (latest['timestamp'] == TIMES[-1]).all()
+
+
+def test_files_are_uncompressed_by_default(tmp_path, batches):
+    store = _fill(tmp_path, batches)
+    store.flush()
+    with pa.memory_map(_parts(tmp_path)[0]) as source:
+        reader = pa.ipc.open_file(source)
+        column = reader.get_batch(0).column('amount')
+        # 무압축이면 버퍼가 메모리 맵 영역을 그대로 가리킴
+        assert column.buffers()[1].address != 0 and not column.buffers()[1].is_mutable
+    assert np.isfinite(store.scan(columns=['amount'])['amount'].to_numpy()).all()
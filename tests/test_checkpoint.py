@@ -0,0 +1,59 @@
+"""checkpoint 저장/복원 후 이어서 진행한 결과가 원본과 같은지 테스트"""
+import numpy as np
+import pytest
+
+import checkpoint
+from agents.csa import CrowdSimulatorAgent
+from agents.da import DebaterAgent
+from agents.oa import OrchestratorAgent
+from engine.optimizer import ConstrainedOptimizer
+from engine.performance import PerformanceTracker
+from engine.price_backend import SyntheticBackend
+from engine.stock_api import StockEngine
+from engine.universe import Universe
+from simulation_service import advance
+
+
+def step(oa, da, performance, feedback, hours):
+    result, errors = advance(oa, da, performance, hours, feedback)
+    assert not errors
+    return result['feedback']
+
+
+@pytest.fixture(scope='module')
+def engine():
+    return StockEngine(backend=SyntheticBackend())
+
+
+@pytest.mark.parametrize('risk_effects', [False, True])
+def test_restored_run_continues_identically(tmp_path, engine, risk_effects):
+    oa = OrchestratorAgent(engine, CrowdSimulatorAgent(2_000, seed=0, risk_effects=risk_effects),
+                           optimizer=ConstrainedOptimizer())
+    da, performance = DebaterAgent(), PerformanceTracker()
+    feedback = step(oa, da, performance, None, 96) # 시차 모델 추정(72시간 이상) 이후 저장
+    assert oa.lag_model is not None
+
+    restored = checkpoint.load(checkpoint.save(str(tmp_path / 'ckpt'), oa, da, performance, feedback), stock_engine=engine)
+    assert restored.feedback == feedback
+
+    feedback = step(oa, da, performance, feedback, 48)
+    restored_feedback = step(restored.oa, restored.da, restored.performance, restored.feedback, 48)
+
+    assert restored_feedback == feedback
+    np.testing.assert_array_equal(restored.performance['nav'], performance['nav'])
+    np.testing.assert_array_equal(restored.performance['turnover'], performance['turnover'])
+    np.testing.assert_array_equal(restored.oa.history.weights, oa.history.weights)
+    np.testing.assert_array_equal(restored.oa.history.times, oa.history.times)
+    assert restored.da.latest_critique() == da.latest_critique()
+    assert restored.oa.csa_agent.rng.bit_generator.state == oa.csa_agent.rng.bit_generator.state
+    assert restored.oa.csa_agent.global_sentiment == oa.csa_agent.global_sentiment
+    assert restored.oa.current_sim_time == oa.current_sim_time
+
+
+def test_rejects_other_universe(tmp_path, engine):
+    oa = OrchestratorAgent(engine, CrowdSimulatorAgent(200, seed=0))
+    path = checkpoint.save(str(tmp_path / 'ckpt'), oa, DebaterAgent(), PerformanceTracker())
+    u = engine.universe
+    other = StockEngine(backend=SyntheticBackend(), universe=Universe(u.names[:5], u.tickers[:5], u.sectors[:5]))
+    with pytest.raises(ValueError):
+        checkpoint.load(path, stock_engine=other)
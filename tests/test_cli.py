@@ -0,0 +1,37 @@
+"""cli 헤드리스 실행 테스트"""
+import json
+
+import cli
+from agents.csa import CrowdSimulatorAgent
+from agents.da import DebaterAgent
+from agents.oa import OrchestratorAgent
+from engine.optimizer import ConstrainedOptimizer
+from engine.performance import PerformanceTracker
+from engine.price_backend import SyntheticBackend
+from engine.stock_api import StockEngine
+from simulation_service import advance
+
+
+def test_simulate_matches_service_step_routine():
+    # CLI와 서비스가 같은 단계(시가평가 + 시차 모델 재추정)로 진행하는지
+    summary = cli.simulate(96, personas=300, seed=3, chunk_hours=24)
+
+    oa = OrchestratorAgent(StockEngine(backend=SyntheticBackend()), CrowdSimulatorAgent(300, seed=3),
+                           optimizer=ConstrainedOptimizer())
+    da, performance, feedback = DebaterAgent(render_text=False), PerformanceTracker(), None
+    for _ in range(4):
+        feedback = advance(oa, da, performance, 24, feedback)[0]['feedback']
+
+    assert oa.lag_model is not None
+    assert summary['cumulative_return'] == performance.cumulative_return()
+    assert summary['portfolio'] == oa.etf_portfolio
+
+
+def test_bench_writes_baseline_on_first_run(tmp_path, capsys):
+    baseline = tmp_path / 'baseline.json'
+    args = ['bench', '--pattern', 'generate_hourly_batch', '--personas', '500', '--repeat', '3',
+            '--baseline', str(baseline)]
+
+    assert cli.main(args) == 0
+    assert '기준 결과가 없어' in capsys.readouterr().out
+    assert 'HourlyPipeline.time_generate_hourly_batch' in json.loads(baseline.read_text())['results']
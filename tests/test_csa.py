@@ -0,0 +1,50 @@
+"""agents.csa.CrowdSimulatorAgent 행동 생성 분포 테스트"""
+import numpy as np
+import pytest
+
+from agents.behavior_schema import SIDE_BUY
+from agents.csa import CrowdSimulatorAgent
+
+STABLE, AGGRESSIVE = [0.9, 0.05, 0.05], [0.05, 0.05, 0.9]
+
+
+def _batches(csa, hours):
+    return [csa.generate_hourly_batch() for _ in range(hours)]
+
+
+def test_default_behavior_ignores_risk_profile():
+    stable = _batches(CrowdSimulatorAgent(2_000, seed=7, risk_probs=STABLE), 24)
+    aggressive = _batches(CrowdSimulatorAgent(2_000, seed=7, risk_probs=AGGRESSIVE), 24)
+
+    for a, b in zip(stable, aggressive):
+        for name in a:
+            if name != 'risk_profile':
+                np.testing.assert_array_equal(a[name], b[name])
+
+
+def test_default_distribution_is_unchanged():
+    # 중립 심리: 행동 발생 30%, 유형 균등, 증권 매수 50%
+    csa = CrowdSimulatorAgent(5_000, seed=0, risk_probs=AGGRESSIVE)
+    batches = _batches(csa, 48)
+    active = sum(len(b['user_idx']) for b in batches) / (5_000 * 48)
+    types = np.concatenate([b['type'] for b in batches])
+    sides = np.concatenate([b['side'][b['type'] == 2] for b in batches])
+
+    assert active == pytest.approx(0.3, abs=0.005)
+    np.testing.assert_allclose(np.bincount(types, minlength=4) / len(types), 0.25, atol=0.01)
+    assert (sides == SIDE_BUY).mean() == pytest.approx(0.5, abs=0.01)
+
+
+def test_risk_effects_follow_risk_mix():
+    stable = _batches(CrowdSimulatorAgent(2_000, seed=7, risk_probs=STABLE, risk_effects=True), 24)
+    aggressive = _batches(CrowdSimulatorAgent(2_000, seed=7, risk_probs=AGGRESSIVE, risk_effects=True), 24)
+
+    count = lambda batches: sum(len(b['user_idx']) for b in batches)
+    assert count(aggressive) > count(stable) * 1.3
+
+
+def test_risk_effects_survive_state_round_trip():
+    csa = CrowdSimulatorAgent(100, seed=0, risk_effects=True)
+    restored = CrowdSimulatorAgent(personas=csa.personas)
+    restored.set_state(csa.get_state())
+    assert restored.risk_effects
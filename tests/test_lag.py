@@ -0,0 +1,93 @@
+"""engine.lag 시차 상관/시차 모델 테스트"""
+import numpy as np
+
+from agents.csa import CrowdSimulatorAgent
+from agents.oa import OrchestratorAgent
+from engine.lag import LagModel, cross_correlation
+from engine.price_backend import SyntheticBackend
+from engine.stock_api import StockEngine
+
+
+def direct_correlation(signals, returns, max_lag):
+    """시차별 피어슨 상관 직접 계산 (겹치는 구간 길이로 나눈 표준화 곱의 합)"""
+    zs = (signals - signals.mean(axis=0)) / signals.std(axis=0)
+    zr = (returns - returns.mean(axis=0)) / returns.std(axis=0)
+    T = len(signals)
+    corr = np.empty((max_lag + 1, signals.shape[1], returns.shape[1]))
+    for lag in range(max_lag + 1):
+        corr[lag] = zs[:T - lag].T @ zr[lag:] / (T - lag)
+    return corr
+
+
+def lagged_data(T, S, N, seed=0, strength=0.5):
+    rng = np.random.default_rng(seed)
+    signals = rng.normal(size=(T, S))
+    true_lag = rng.integers(1, 24, N)
+    true_sector = rng.integers(0, S, N)
+    returns = rng.normal(size=(T, N))
+    for n in range(N):
+        returns[true_lag[n]:, n] += strength * signals[:T - true_lag[n], true_sector[n]]
+    return signals, returns, true_lag, true_sector
+
+
+def test_fft_matches_direct_computation():
+    rng = np.random.default_rng(1)
+    signals, returns = rng.normal(size=(200, 3)), rng.normal(size=(200, 11))
+    # chunk < N로 종목 축 분할 경로도 함께 검증
+    np.testing.assert_allclose(cross_correlation(signals, returns, 30, chunk=4),
+                               direct_correlation(signals, returns, 30), atol=1e-10)
+
+
+def test_max_lag_is_capped_by_history_length():
+    rng = np.random.default_rng(2)
+    corr = cross_correlation(rng.normal(size=(10, 2)), rng.normal(size=(10, 3)), max_lag=48)
+    assert corr.shape == (10, 2, 3)
+
+
+def test_constant_columns_have_zero_correlation():
+    rng = np.random.default_rng(3)
+    signals = np.column_stack([np.ones(50), rng.normal(size=50)])
+    corr = cross_correlation(signals, rng.normal(size=(50, 2)), 5)
+    assert not corr[:, 0].any() and np.isfinite(corr).all()
+
+
+def test_recovers_planted_lags():
+    signals, returns, true_lag, true_sector = lagged_data(24 * 30, 5, 40)
+    model = LagModel(max_lag=36).fit(signals, returns)
+
+    np.testing.assert_array_equal(model.best_lag[true_sector, np.arange(40)], true_lag)
+    assert (model.best_corr[true_sector, np.arange(40)] > 0.3).all()
+
+
+def test_predict_uses_signal_from_best_lag_ago():
+    signals, returns, true_lag, true_sector = lagged_data(24 * 30, 5, 40)
+    model = LagModel(max_lag=36).fit(signals, returns)
+    model = LagModel.from_state(model.get_state())
+
+    history = signals[-48:]
+    z = (history - signals.mean(axis=0)) / signals.std(axis=0)
+    expected = np.zeros(40)
+    for s in range(5):
+        for n in range(40):
+            expected[n] += model.best_corr[s, n] * z[len(z) - 1 - model.best_lag[s, n], s]
+    np.testing.assert_allclose(model.predict(history), expected)
+
+
+def test_weak_correlations_are_dropped():
+    rng = np.random.default_rng(4)
+    model = LagModel(max_lag=12).fit(rng.normal(size=(100, 2)), rng.normal(size=(100, 5)))
+    # 유의 수준 3 / sqrt(100) = 0.3 미만은 0
+    assert (np.abs(model.best_corr) >= 0.3).sum() == (model.best_corr != 0).sum()
+
+
+def test_fit_lag_model_waits_for_min_hours():
+    oa = OrchestratorAgent(StockEngine(backend=SyntheticBackend()), CrowdSimulatorAgent(200, seed=0))
+    oa.step_hours(24)
+    assert oa.fit_lag_model(min_hours=72) is None
+    assert oa.lag_model is None
+
+    oa.step_hours(48)
+    model = oa.fit_lag_model(max_lag=24, min_hours=72)
+    assert model is oa.lag_model
+    assert model.best_lag.shape == (len(model.best_corr), len(oa.universe))
+    assert model.best_lag.max() <= 24
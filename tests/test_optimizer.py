@@ -0,0 +1,58 @@
+"""engine.optimizer.ConstrainedOptimizer 선정/제약 테스트"""
+import numpy as np
+import pytest
+
+from engine import optimizer as optimizer_module
+from engine.optimizer import ConstrainedOptimizer, project_capped_simplex
+
+# 섹터 4개 x 6종목, 섹터 점수를 종목에 그대로 확장한 경우 (OA와 같은 형태)
+SECTORS = np.repeat(np.arange(4), 6)
+
+
+def test_sector_cap_holds_when_sector_scores_are_tied():
+    scores = np.repeat([9.0, 5.0, 3.0, 1.0], 6)
+    optimizer = ConstrainedOptimizer()
+    weights = optimizer.optimize(scores, SECTORS)
+
+    assert optimizer.relaxed == ()
+    assert weights.sum() == pytest.approx(1.0)
+    assert (weights > 0).sum() == 10
+    assert np.bincount(SECTORS, weights).max() <= 0.40 + 1e-9
+    assert weights.max() <= 0.20 + 1e-9
+
+
+def test_held_names_survive_small_score_changes():
+    rng = np.random.default_rng(0)
+    base = rng.normal(size=len(SECTORS))
+    optimizer = ConstrainedOptimizer()
+    weights = optimizer.optimize(base, SECTORS)
+
+    noisy = optimizer.optimize(base + 0.5 * rng.normal(size=len(SECTORS)), SECTORS, weights)
+    assert np.array_equal(noisy > 0, weights > 0)
+
+    # 편입되지 않은 종목이 크게 앞서면 교체
+    challenger = np.flatnonzero((weights == 0) & (SECTORS == SECTORS[np.argmax(weights)]))[0]
+    jumped = base.copy()
+    jumped[challenger] += 100.0
+    assert optimizer.optimize(jumped, SECTORS, weights)[challenger] > 0
+
+
+def test_infeasible_sector_cap_is_reported():
+    optimizer = ConstrainedOptimizer()
+    with pytest.warns(RuntimeWarning, match='sector_cap'):
+        weights = optimizer.optimize(np.array([1.0, 2.0, 3.0]), np.zeros(3, dtype=np.intp))
+    assert weights.sum() == pytest.approx(1.0)
+    assert 'sector_cap' in optimizer.relaxed
+
+
+@pytest.mark.parametrize('n', [2, 10, 32])
+def test_dense_projection_matches_sorted_path(n, monkeypatch):
+    rng = np.random.default_rng(n)
+    cases = [(rng.normal(scale=scale, size=n), rng.uniform(0.1, 0.6, n), total)
+             for scale in (0.01, 1.0) for total in (0.5, 1.0)]
+    dense = [project_capped_simplex(v, upper, total) for v, upper, total in cases]
+    monkeypatch.setattr(optimizer_module, 'DENSE_PROJECTION_MAX', 0)
+    for (v, upper, total), w in zip(cases, dense):
+        np.testing.assert_allclose(w, project_capped_simplex(v, upper, total), atol=1e-12)
+        assert w.sum() == pytest.approx(min(total, upper.sum()))
+        assert (w >= 0).all() and (w <= upper + 1e-12).all()
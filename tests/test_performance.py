@@ -0,0 +1,35 @@
+"""engine.performance.PerformanceEngine 회전율/비용 테스트"""
+import numpy as np
+import pytest
+
+from engine.performance import PerformanceEngine
+
+
+def test_no_cost_when_prices_do_not_update():
+    # 1~2번째 구간은 가격 변동 없음 (장 마감): 목표 비중이 바뀌어도 거래하지 않음
+    weights = np.array([[1.0, 0.0], [0.0, 1.0], [0.0, 1.0], [0.5, 0.5]])
+    prices = np.array([[10.0, 10.0], [11.0, 10.0], [11.0, 10.0], [11.0, 10.0], [12.0, 11.0]])
+    result = PerformanceEngine(cost_bps=10.0).run(weights, prices)
+
+    np.testing.assert_array_equal(result['turnover'], [1.0, 0.0, 0.0, 1.0])
+    np.testing.assert_array_equal(result['held'][1:3], [[1.0, 0.0], [1.0, 0.0]])
+    assert result['nav'][2] == result['nav'][0]
+
+
+def test_failed_fetch_costs_nothing():
+    weights = np.tile([0.5, 0.5], (5, 1))
+    prices = np.full((6, 2), np.nan)
+    result = PerformanceEngine().run(weights, prices, prev_drifted=np.array([0.2, 0.8]))
+
+    assert not result['costs'].any()
+    np.testing.assert_array_equal(result['nav'], 1.0)
+    np.testing.assert_array_equal(result['drifted'][-1], [0.2, 0.8])
+
+
+def test_rebalance_is_charged_when_prices_move():
+    weights = np.array([[1.0, 0.0], [0.0, 1.0]])
+    prices = np.array([[10.0, 10.0], [11.0, 10.0], [11.0, 11.0]])
+    result = PerformanceEngine(cost_bps=10.0).run(weights, prices)
+
+    assert result['turnover'][1] == pytest.approx(2.0)
+    assert result['costs'][1] == pytest.approx(2.0 * 10.0 / 10_000)
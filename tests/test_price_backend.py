@@ -0,0 +1,45 @@
+"""engine.price_backend.PriceCache 저장/복원 테스트"""
+import os
+import threading
+
+import numpy as np
+
+from engine.price_backend import PriceCache
+
+
+def test_store_and_load_round_trip(tmp_path):
+    cache = PriceCache(str(tmp_path))
+    ts = np.arange(5, dtype=np.int64) * 3_600_000_000_000
+    close = np.linspace(100.0, 104.0, 5)
+    ranges = np.array([[0, 5 * 3_600_000_000_000]], dtype=np.int64)
+    cache.store('005930.KS', '1h', ts, close, ranges)
+
+    loaded = cache.load('005930.KS', '1h')
+    for expected, actual in zip((ts, close, ranges), loaded):
+        np.testing.assert_array_equal(actual, expected)
+    assert os.listdir(tmp_path / '1h') == ['005930.KS.npz']
+
+
+def test_missing_entry_is_empty(tmp_path):
+    ts, close, ranges = PriceCache(str(tmp_path)).load('000000.KS', '1h')
+    assert len(ts) == len(close) == 0 and ranges.shape == (0, 2)
+
+
+def test_concurrent_stores_never_mix_arrays(tmp_path):
+    cache = PriceCache(str(tmp_path))
+
+    def writer(n):
+        for _ in range(20):
+            ts = np.arange(n, dtype=np.int64)
+            cache.store('005930.KS', '1h', ts, np.full(n, float(n)), np.array([[0, n]]))
+
+    threads = [threading.Thread(target=writer, args=(n,)) for n in (3, 50, 400)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    ts, close, ranges = cache.load('005930.KS', '1h')
+    n = len(ts)
+    assert len(close) == n and (close == n).all() and ranges.tolist() == [[0, n]]
+    assert os.listdir(tmp_path / '1h') == ['005930.KS.npz'] # 임시 파일이 남지 않음
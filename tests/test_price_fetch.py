@@ -0,0 +1,170 @@
+"""engine.price_fetch 동시 조회/재시도/차단기/속도 제한 테스트 (로컬 스텁 chart 서버 사용)"""
+import json
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pandas as pd
+import pytest
+
+from engine.price_backend import SyntheticBackend, make_backend
+from engine.price_fetch import (ChartHttpBackend, CircuitBreaker, CircuitOpenError, RateLimiter, RetryingBackend,
+                                fetch_many)
+
+START, END = pd.Timestamp('2024-05-20').to_pydatetime(), pd.Timestamp('2024-05-25').to_pydatetime()
+
+
+class StubChart:
+    """chart API(v8) 형식 스텁 서버
+
+    'BAD'로 시작하는 티커는 항상 503, 'FLAKY'로 시작하는 티커는 첫 요청만 503,
+    'MISSING'으로 시작하는 티커는 404를 반환합니다. 티커별 요청 수와 최대 동시 처리 수를 기록합니다.
+    """
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.attempts = {}
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+        synthetic = SyntheticBackend()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                ticker = url.path.rsplit('/', 1)[-1]
+                with stub._lock:
+                    stub.attempts[ticker] = stub.attempts.get(ticker, 0) + 1
+                    attempt = stub.attempts[ticker]
+                    stub.in_flight += 1
+                    stub.max_in_flight = max(stub.max_in_flight, stub.in_flight)
+                try:
+                    time.sleep(stub.latency)
+                    if ticker.startswith('BAD') or (ticker.startswith('FLAKY') and attempt == 1):
+                        return self._reply(503, b'')
+                    if ticker.startswith('MISSING'):
+                        return self._reply(404, b'')
+                    query = parse_qs(url.query)
+                    start = pd.Timestamp(int(query['period1'][0]), unit='s', tz='UTC').tz_convert('Asia/Seoul').tz_localize(None)
+                    end = pd.Timestamp(int(query['period2'][0]), unit='s', tz='UTC').tz_convert('Asia/Seoul').tz_localize(None)
+                    bars = synthetic.fetch(ticker, start, end, query['interval'][0])
+                    utc = bars.index.tz_localize('Asia/Seoul').tz_convert('UTC')
+                    self._reply(200, json.dumps({'chart': {'result': [{
+                        'timestamp': [int(t.timestamp()) for t in utc],
+                        'indicators': {'quote': [{'close': bars.tolist()}]},
+                    }]}}).encode())
+                finally:
+                    with stub._lock:
+                        stub.in_flight -= 1
+
+            def _reply(self, status, body):
+                self.send_response(status)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.server.daemon_threads = True
+        self.url = f'http://127.0.0.1:{self.server.server_port}'
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def stub():
+    server = StubChart()
+    yield server
+    server.close()
+
+
+def test_retries_transient_503(stub):
+    backend = RetryingBackend(ChartHttpBackend(stub.url), retries=2, backoff=0.0)
+    close = backend.fetch('FLAKY1.KS', START, END, '1h')
+    assert stub.attempts['FLAKY1.KS'] == 2
+    assert len(close) > 0
+    pd.testing.assert_series_equal(close, SyntheticBackend().fetch('FLAKY1.KS', START, END, '1h'), check_freq=False,
+                                   check_index_type=False)
+
+
+def test_does_not_retry_client_error_and_remembers_failed_ticker(stub):
+    backend = RetryingBackend(ChartHttpBackend(stub.url), retries=3, backoff=0.0)
+    for _ in range(2):
+        with pytest.raises(Exception) as error:
+            backend.fetch('MISSING1.KS', START, END, '1h')
+        assert error.value.response.status_code == 404
+    assert stub.attempts['MISSING1.KS'] == 1
+
+
+def test_bad_ticker_is_isolated(stub):
+    tickers = {f'종목{i}': f'{i:06d}.KS' for i in range(8)}
+    tickers['불량'] = 'BAD000.KS'
+    backend = RetryingBackend(ChartHttpBackend(stub.url), retries=2, backoff=0.0, breaker=CircuitBreaker(threshold=3))
+
+    data, errors = fetch_many(backend, tickers, START, END, '1h', max_workers=4)
+
+    assert list(errors) == ['불량']
+    assert stub.attempts['BAD000.KS'] == 3
+    assert data['불량'].empty
+    assert all(len(data[name]) > 0 for name in tickers if name != '불량')
+
+
+def test_concurrency_is_bounded_by_max_workers():
+    server = StubChart(latency=0.05)
+    try:
+        backend = RetryingBackend(ChartHttpBackend(server.url), retries=0)
+        tickers = {f'{i:06d}.KS': f'{i:06d}.KS' for i in range(24)}
+        data, errors = fetch_many(backend, tickers, START, END, '1h', max_workers=4)
+    finally:
+        server.close()
+    assert not errors and len(data) == 24
+    assert 1 < server.max_in_flight <= 4
+
+
+def test_circuit_breaker_fails_fast_when_upstream_is_down():
+    # 닫힌 포트 (연결 거부)
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+    upstream = ChartHttpBackend(f'http://127.0.0.1:{port}', timeout=1.0)
+    backend = RetryingBackend(upstream, retries=3, backoff=1.0, breaker=CircuitBreaker(threshold=3, reset_after=60.0))
+    tickers = {f'{i:06d}.KS': f'{i:06d}.KS' for i in range(50)}
+
+    t0 = time.perf_counter()
+    data, errors = fetch_many(backend, tickers, START, END, '1h', max_workers=1)
+    elapsed = time.perf_counter() - t0
+
+    assert len(errors) == 50
+    assert backend.breaker.is_open
+    assert sum(isinstance(e, CircuitOpenError) for e in errors.values()) == 47
+    assert elapsed < 5.0 # 연결 거부는 재시도하지 않음 (backoff 1초가 한 번도 적용되지 않음)
+
+
+def test_rate_limiter_allows_burst_then_throttles():
+    limiter = RateLimiter(rate=50.0, burst=16)
+    t0 = time.perf_counter()
+    for _ in range(16):
+        limiter.acquire()
+    assert time.perf_counter() - t0 < 0.05 # 첫 배치는 대기 없음
+    for _ in range(5):
+        limiter.acquire()
+    assert time.perf_counter() - t0 >= 0.08 # 이후 초당 50회
+
+
+def test_make_backend_rate_limit_is_opt_in(tmp_path, monkeypatch):
+    monkeypatch.delenv('SMAES_RATE_LIMIT', raising=False)
+    assert make_backend(offline=False, cache_dir=str(tmp_path)).upstream.rate_limiter is None
+
+    limiter = make_backend(offline=False, cache_dir=str(tmp_path), rate=20.0).upstream.rate_limiter
+    assert limiter.rate == 20.0 and limiter.capacity == 20.0
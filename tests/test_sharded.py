@@ -0,0 +1,43 @@
+"""agents.sharded.ShardedCrowdSimulator 재현성/공유 메모리 정리 테스트"""
+from multiprocessing import shared_memory
+
+import numpy as np
+import pytest
+
+from agents.sharded import ShardedCrowdSimulator
+
+
+def _run(n_shards, hours=6):
+    with ShardedCrowdSimulator(2_000, n_shards=n_shards, seed=42, block_size=500) as sim:
+        out = []
+        for _ in range(hours):
+            sim.update_sentiment(-0.5)
+            signals = sim.generate_hourly_signals()
+            out.append((signals.counts.copy(), signals.risk_counts.copy(), signals.total))
+    return out
+
+
+def test_aggregate_signals_do_not_depend_on_shard_count():
+    single, double = _run(1), _run(2)
+    assert sum(total for _, _, total in single) > 0
+    for (counts1, risk1, total1), (counts2, risk2, total2) in zip(single, double):
+        np.testing.assert_array_equal(counts1, counts2)
+        np.testing.assert_array_equal(risk1, risk2)
+        assert total1 == total2
+
+
+def test_close_releases_shared_memory_and_workers():
+    sim = ShardedCrowdSimulator(1_000, n_shards=2, seed=0, block_size=500)
+    name, procs = sim._shm.name, list(sim._procs)
+    sim.generate_hourly_signals()
+    sim.close()
+    sim.close() # 두 번 닫아도 안전
+
+    assert not any(proc.is_alive() for proc in procs)
+    with pytest.raises(FileNotFoundError):
+        shared_memory.SharedMemory(name=name)
+
+
+def test_shard_count_is_capped_by_blocks():
+    with ShardedCrowdSimulator(600, n_shards=4, seed=0, block_size=500) as sim:
+        assert sim.n_shards == 2
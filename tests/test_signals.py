@@ -0,0 +1,115 @@
+"""SectorSignals/DA 수치 피드백이 기존 문자열 기반 OA/DA 로직과 같은 결과를 내는지 테스트"""
+import numpy as np
+import pytest
+
+from agents import behavior_schema as schema
+from agents.csa import CrowdSimulatorAgent
+from agents.da import DebaterAgent
+from agents.signals import COUNTS_SHAPE, SECTORS, SectorSignals
+from engine.universe import default_universe
+
+STOCK_SECTORS = dict(zip(default_universe().names, default_universe().sectors))
+
+
+# --- 기존(행 단위 detail 문자열) 구현 ---
+
+def baseline_oa_scores(behaviors):
+    scores = dict.fromkeys(SECTORS, 0.0)
+    for _, row in behaviors.iterrows():
+        if row['type'] == 'Card':
+            if '온라인배달' in row['detail']:
+                scores['플랫폼'] += 1
+            elif '쇼핑' in row['detail']:
+                scores['소비재'] += 1
+        elif row['type'] == 'Securities':
+            for sector in scores:
+                if sector in row['detail']:
+                    scores[sector] += 2 if '매수' in row['detail'] else -1
+    return scores
+
+
+def baseline_da_feedback(behaviors, portfolio):
+    sector_signals = {}
+    for _, row in behaviors.iterrows():
+        if row['type'] == 'Card' and '온라인배달' in row['detail']:
+            sector_signals['플랫폼'] = sector_signals.get('플랫폼', 0) + 1
+        if row['type'] == 'Securities' and '매수' in row['detail']:
+            for s in schema.SECTORS:
+                if s in row['detail']:
+                    sector_signals[s] = sector_signals.get(s, 0) + 1
+    active = {STOCK_SECTORS.get(s, '기타') for s, w in portfolio.items() if w > 0}
+    sector_recs = {s: 0.05 for s, score in sector_signals.items() if score >= 3 and s not in active}
+
+    risk = 0.0
+    if ((behaviors['type'] == 'Bank') & behaviors['detail'].str.contains('예금출금')).sum() > 5:
+        risk -= 0.4
+    if ((behaviors['type'] == 'Life') & behaviors['detail'].str.contains('사고접수')).sum() > 3:
+        risk -= 0.2
+    return sector_recs, risk
+
+
+def _hours(n_hours=40, personas=200):
+    """심리를 -1 ~ 1로 바꿔 가며 생성한 (배치, detail 포함 로그) 목록"""
+    csa = CrowdSimulatorAgent(personas, seed=11)
+    out = []
+    for sentiment in np.linspace(-1.0, 1.0, n_hours):
+        csa.global_sentiment = sentiment
+        batch = csa.generate_hourly_batch()
+        frame = csa.batch_to_frame(batch, '2024-05-23 09:00')
+        out.append((batch, frame.assign(detail=schema.render_detail(frame))))
+    return out
+
+
+HOURS = _hours()
+
+
+def test_oa_scores_match_baseline():
+    for batch, frame in HOURS:
+        expected = baseline_oa_scores(frame)
+        np.testing.assert_array_equal(SectorSignals.from_batch(batch).oa_scores, [expected[s] for s in SECTORS])
+        np.testing.assert_array_equal(SectorSignals.from_frame(frame).oa_scores, [expected[s] for s in SECTORS])
+
+
+@pytest.mark.parametrize('held', [slice(None), slice(0, 5), slice(5, 10)])
+def test_da_feedback_matches_baseline(held):
+    universe = default_universe()
+    weights = np.zeros(len(universe))
+    weights[held] = 1.0
+    weights /= weights.sum()
+    portfolio = dict(zip(universe.names, weights))
+    da = DebaterAgent(render_text=False)
+    sector_index = universe.sector_index(SECTORS)
+
+    hits = set()
+    for batch, frame in HOURS:
+        recs, risk = baseline_da_feedback(frame, portfolio)
+        signals = SectorSignals.from_batch(batch)
+
+        _, feedback = da.analyze_strategy('t', portfolio, frame, signals)
+        assert feedback['sector_recs'] == recs
+        assert feedback['risk_sentiment'] == pytest.approx(risk)
+
+        vector, numeric_risk = da.feedback_from_signals(signals, weights, sector_index)
+        np.testing.assert_allclose(vector, [recs.get(s, 0.0) for s in SECTORS])
+        assert numeric_risk == pytest.approx(risk)
+        hits.update(recs)
+        hits.add(risk)
+    # 제안/거시 리스크가 실제로 발생하는 구간을 포함해야 의미 있는 비교
+    assert len(hits & set(SECTORS)) > 0 and {-0.4, -0.6} & hits and 0.0 in hits
+
+
+@pytest.mark.parametrize('weight, expected', [
+    (1.0, ["거시 리스크 감지로 인한 소비 위축 반영", "플랫폼 섹터 관심도 상향 유도"]),
+    (0.5, ["플랫폼 섹터 관심도 상향 유도"]), # risk -0.4 x 0.5 = -0.2 > -0.3
+    (0.0, []),
+])
+def test_csa_instructions_follow_scaled_feedback(weight, expected):
+    counts = np.zeros(COUNTS_SHAPE, dtype=np.int64)
+    counts[schema.TYPE_BANK, schema.ACTION_WITHDRAW - schema.BANK_ACTION_START] = 6
+    counts[schema.TYPE_CARD, schema.CATEGORY_DELIVERY] = 3
+    portfolio = dict.fromkeys(default_universe().names, 0.0)
+
+    _, feedback = DebaterAgent(weight=weight, render_text=False).analyze_strategy(
+        't', portfolio, None, SectorSignals(counts))
+    assert feedback['risk_sentiment'] == pytest.approx(-0.4 * weight)
+    assert feedback['csa_instructions'] == expected